@@ -0,0 +1,530 @@
+import asyncio
+import collections
+import inspect
+import logging
+import tempfile
+import time
+import urllib.parse
+import requests
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .mixins import *
+from .exceptions import *
+from .geoserver import Geoserver,GeoserverUtils,get_default_geoserver
+from .retrypolicy import RetryPolicy
+from .metrics import RequestMetrics
+from .capabilities import CapabilitiesIndex
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class AsyncResponse(object):
+    """
+    A fully read http response which exposes the subset of 'requests.Response' used by the mixins and the response error handlers
+    """
+    class Request(object):
+        def __init__(self,method,url):
+            self.method = method
+            self.url = url
+
+    def __init__(self,method,url,status_code,reason,headers,content,encoding=None):
+        self.request = self.Request(method,url)
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding,errors="replace")
+
+    def json(self):
+        return requests.compat.json.loads(self.content)
+
+    def iter_content(self,chunk_size=1024):
+        for i in range(0,len(self.content),chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 500:
+            raise requests.HTTPError("{} Client Error: {} for url: {}".format(self.status_code,self.reason,self.url),response=self)
+        elif 500 <= self.status_code < 600:
+            raise requests.HTTPError("{} Server Error: {} for url: {}".format(self.status_code,self.reason,self.url),response=self)
+
+class AsyncGeoserver(WMSServiceMixin,AboutMixin,DatastoreMixin,FeaturetypeMixin,GWCMixin,LayergroupMixin,ReloadMixin,SecurityMixin,StyleMixin,WMSLayerMixin,WMSStoreMixin,WorkspaceMixin,UsergroupMixin,CoverageStoreMixin,CoverageMixin,RolesMixin,GeoserverUtils):
+    """
+    The asyncio version of Geoserver with the same method surface.
+    The url builders, payload templates, field getters and response parsers are inherited from the same mixins used by Geoserver.
+    The read methods used by the catalog crawl and the map service probing are native coroutines;
+    the other methods(create, update, delete) are coroutines which run the Geoserver method in the default executor.
+
+    concurrency: the maximum in-flight requests per host, default is settings.ASYNC_CONCURRENCY_PER_HOST
+    retrypolicy: the policy to retry the failed requests, shared with the companion Geoserver
+    metrics: the RequestMetrics to record the requests, shared with the companion Geoserver
+    """
+    def __init__(self,geoserver_url,username,password,headers=None,ssl_verify=True,concurrency=None,retrypolicy=None,metrics=None):
+        if aiohttp is None:
+            raise Exception("AsyncGeoserver requires the package 'aiohttp'")
+        assert geoserver_url,"Geoserver URL is not configured"
+        assert username,"Geoserver user is not configured"
+        assert password,"Geoserver user password is not configured"
+        self.geoserver_url = geoserver_url
+        self.username = username
+        self.password = password
+        self.headers = headers
+        self.ssl_verify = ssl_verify
+        self.concurrency = concurrency or settings.ASYNC_CONCURRENCY_PER_HOST
+        self._session = None
+        self._semaphores = {}
+        self._geoserver = None
+        self.retrypolicy = retrypolicy or RetryPolicy()
+        self.metrics = metrics or RequestMetrics()
+
+    def __str__(self):
+        return self.geoserver_url
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self,t,value,tb):
+        await self.close()
+        return False
+
+    @property
+    def geoserver(self):
+        """
+        The synchronous Geoserver used by the methods which are not native coroutines
+        """
+        if self._geoserver is None:
+            self._geoserver = Geoserver(self.geoserver_url,self.username,self.password,headers=self.headers,ssl_verify=self.ssl_verify,retrypolicy=self.retrypolicy,metrics=self.metrics)
+        return self._geoserver
+
+    @property
+    def session(self):
+        """
+        Return the aiohttp session, create it if doesn't exist; must be called in the event loop
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=0,limit_per_host=self.concurrency,ssl=None if self.ssl_verify else False)
+            self._session = aiohttp.ClientSession(connector=connector,auth=aiohttp.BasicAuth(self.username,self.password))
+        return self._session
+
+    def _get_semaphore(self,url):
+        host = urllib.parse.urlparse(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            self._semaphores[host] = semaphore
+        return semaphore
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+        if self._geoserver:
+            self._geoserver.close()
+            self._geoserver = None
+
+    async def _request(self,method,url,data=None,headers=None,timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        if self.headers:
+            if headers:
+                headers = collections.ChainMap(headers,self.headers)
+            else:
+                headers = self.headers
+        bytes_out = len(data) if isinstance(data,(bytes,str)) else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            self.retrypolicy.requested()
+            starttime = time.time()
+            try:
+                res = await self._send(method,url,data,headers,timeout)
+            except requests.RequestException as ex:
+                self.metrics.record(method,url,ex.__class__.__name__,time.time() - starttime,bytes_out=bytes_out)
+                delay = self.retrypolicy.retry(method,self.retrypolicy.classify(ex=ex),attempt)
+                if delay is None:
+                    raise
+                self.metrics.retried(url)
+                logger.info("{} {} failed, retry in {:.2f} seconds.{}".format(method,url,delay,str(ex)))
+                await asyncio.sleep(delay)
+                continue
+
+            self.metrics.record(method,url,res.status_code,time.time() - starttime,bytes_in=len(res.content),bytes_out=bytes_out)
+            delay = self.retrypolicy.retry(method,self.retrypolicy.classify(res=res),attempt)
+            if delay is None:
+                break
+            self.metrics.retried(url)
+            logger.info("{} {} failed with status code {}, retry in {:.2f} seconds.".format(method,url,res.status_code,delay))
+            await asyncio.sleep(delay)
+
+        (error_handler or self._handle_response_error)(res)
+        return res
+
+    async def _send(self,method,url,data,headers,timeout):
+        async with self._get_semaphore(url):
+            try:
+                async with self.session.request(
+                    method,
+                    url,
+                    data=data,
+                    headers=dict(headers) if headers else None,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as resp:
+                    return AsyncResponse(method,url,resp.status,resp.reason,resp.headers,await resp.read(),encoding=resp.charset)
+            except asyncio.TimeoutError as ex:
+                raise requests.Timeout("{} {} timed out after {} seconds".format(method,url,timeout))
+            except aiohttp.ClientConnectionError as ex:
+                raise requests.ConnectionError("{} {} failed.{}".format(method,url,str(ex)))
+            except aiohttp.ClientPayloadError as ex:
+                raise requests.exceptions.ChunkedEncodingError("{} {} failed.{}".format(method,url,str(ex)))
+
+    async def get(self,url,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        logger.debug("GET {}".format(url))
+        return await self._request("GET",url,headers=headers,timeout=timeout,error_handler=error_handler)
+
+    async def has(self,url,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        try:
+            r = await self.get(url , headers=headers,timeout=timeout,error_handler=error_handler)
+            return True if r.status_code == 200 else False
+        except ResourceNotFound as ex:
+            return False
+
+    async def post(self,url,data,headers=GeoserverUtils.contenttype_header("xml"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        logger.debug("POST {}".format(url))
+        return await self._request("POST",url,data=data,headers=headers,timeout=timeout,error_handler=error_handler)
+
+    async def put(self,url,data,headers=GeoserverUtils.contenttype_header("xml"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        logger.debug("PUT {}".format(url))
+        return await self._request("PUT",url,data=data,headers=headers,timeout=timeout,error_handler=error_handler)
+
+    async def delete(self,url,headers=None,timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        logger.debug("DELETE {}".format(url))
+        return await self._request("DELETE",url,headers=headers,timeout=timeout,error_handler=error_handler)
+
+    async def _save(self,res,outputfile,prefix,suffix):
+        """
+        Save the response body to outputfile or a temporary file in the default executor, return the file
+        """
+        return await asyncio.to_thread(self._write,res.content,outputfile,prefix,suffix)
+
+    def _write(self,content,outputfile,prefix,suffix):
+        if outputfile:
+            output = open(outputfile,'wb')
+        else:
+            output = tempfile.NamedTemporaryFile(
+                mode='wb',
+                prefix=prefix,
+                suffix=suffix,
+                delete = False,
+                delete_on_close = False
+            )
+            outputfile = output.name
+        try:
+            output.write(content)
+            return outputfile
+        finally:
+            output.close()
+
+    async def _read_image_async(self,res,*args,output="file",**kwargs):
+        """
+        Read the image from the fully read response, the image file is written in the default executor, see _read_image
+        """
+        if output == "file":
+            return await asyncio.to_thread(self._read_image,res,*args,output=output,**kwargs)
+        return self._read_image(res,*args,output=output,**kwargs)
+
+    async def _get_capabilities_index(self,service,url,chunk_size=65536):
+        """
+        Parse the GetCapabilities document into a CapabilitiesIndex
+        """
+        res = await self.get(url,headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+        return CapabilitiesIndex.parse(service,res.iter_content(chunk_size=chunk_size))
+
+    #about
+    async def get_version(self,component="geoserver"):
+        if self.geoserver_url not in self.VERSIONS:
+            res = await self.get(self.version_url(),headers=self.accept_header("json"))
+            self.VERSIONS[self.geoserver_url] = self._parse_version(res.json())
+        return self._get_component_version(component)
+
+    #workspace
+    async def has_workspace(self,workspace):
+        return await self.has(self.workspace_url(workspace))
+
+    async def list_workspaces(self):
+        res = await self.get(self.workspaces_url(),headers=self.accept_header("json"))
+        return self._parse_workspaces(res.json())
+
+    #datastore
+    async def has_datastore(self,workspace,storename):
+        return await self.has(self.datastore_url(workspace,storename))
+
+    async def get_datastore(self,workspace,storename):
+        return self._parse_datastore((await self.get(self.datastore_url(workspace,storename))).json())
+
+    async def list_datastores(self,workspace):
+        res = await self.get(self.datastores_url(workspace), headers=self.accept_header("json"))
+        return self._parse_datastores(res.json())
+
+    #featuretype
+    async def has_featuretype(self,workspace,layername,storename=None):
+        return await self.has(self.featuretype_url(workspace,layername,storename=storename))
+
+    async def get_featuretype(self,workspace,layername,storename=None):
+        res = await self.get(self.featuretype_url(workspace,layername,storename=storename),headers=self.accept_header("json"))
+        return self._parse_featuretype(res.json())
+
+    async def get_featurecount(self,workspace,layername,storename=None):
+        res = await self.get(self.featurecount_url(workspace,layername),headers=self.accept_header("xml"),timeout=settings.GETFEATURE_TIMEOUT)
+        return self._parse_featurecount(res.text)
+
+    async def get_features(self,workspace,layername,storename=None,count=5,bbox=None,srs=None):
+        res = await self.get(self.features_url(workspace,layername,count=count,bbox=bbox,srs=srs),headers=self.accept_header("json"),timeout=settings.GETFEATURE_TIMEOUT)
+        return res.json()
+
+    async def list_featuretypes(self,workspace,storename=None):
+        res = await self.get(self.featuretypes_url(workspace,storename),headers=self.accept_header("json"))
+        return self._parse_featuretypes(res.json())
+
+    async def get_featuretype_styles(self,workspace,layername):
+        res = await self.get(self.layer_styles_url(workspace,layername),headers=self.accept_header("json"))
+        return self._parse_featuretype_styles(res.json())
+
+    async def get_wfscapabilities(self,version="2.0.0",outputfile=None):
+        res = await self.get(self.wfscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+        return await self._save(res,outputfile,"gswfscapabilities_",".xml")
+
+    async def get_wfscapabilities_index(self,version="2.0.0"):
+        return await self._get_capabilities_index("WFS",self.wfscapabilities_url(version=version))
+
+    #coveragestore
+    async def has_coveragestore(self,workspace,storename):
+        return await self.has(self.coveragestore_url(workspace,storename),headers=self.accept_header("json"))
+
+    async def get_coveragestore(self,workspace,storename):
+        res = await self.get(self.coveragestore_url(workspace,storename),headers=self.accept_header("json"))
+        return self._parse_coveragestore(res.json())
+
+    async def list_coveragestores(self,workspace):
+        res = await self.get(self.coveragestores_url(workspace),headers=self.accept_header("json"))
+        return self._parse_coveragestores(res.json())
+
+    #coverage
+    async def has_coverage(self,workspace,layername,storename=None):
+        return await self.has(self.coverage_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
+
+    async def get_coverage(self,workspace,layername,storename=None):
+        res = await self.get(self.coverage_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
+        return self._parse_coverage(res.json())
+
+    async def list_coverages(self,workspace,storename):
+        res = await self.get(self.coverages_url(workspace,storename),headers=self.accept_header("json"))
+        return self._parse_coverages(res.json())
+
+    async def get_coveragecapabilities(self,version="1.3.0",outputfile=None):
+        res = await self.get(self.coveragecapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+        return await self._save(res,outputfile,"gscoveragecapabilities_",".xml")
+
+    async def get_coveragecapabilities_index(self,version="2.0.1"):
+        return await self._get_capabilities_index("WCS",self.coveragecapabilities_url(version=version))
+
+    #wmsstore
+    async def has_wmsstore(self,workspace,storename):
+        return await self.has(self.wmsstore_url(workspace,storename),headers=self.accept_header("json"))
+
+    async def get_wmsstore(self,workspace,storename):
+        res = await self.get(self.wmsstore_url(workspace,storename),headers=self.accept_header("json"))
+        return self._parse_wmsstore(res.json())
+
+    async def list_wmsstores(self,workspace):
+        res = await self.get(self.wmsstores_url(workspace),headers=self.accept_header("json"))
+        return self._parse_wmsstores(res.json())
+
+    #wmslayer
+    async def has_wmslayer(self,workspace,layername,storename=None):
+        return await self.has(self.wmslayer_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
+
+    async def get_wmslayer(self,workspace,layername,storename=None):
+        res = await self.get(self.wmslayer_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
+        return self._parse_wmslayer(res.json())
+
+    async def list_wmslayers(self,workspace,storename):
+        res = await self.get(self.wmslayers_url(workspace,storename),headers=self.accept_header("json"))
+        return self._parse_wmslayers(res.json())
+
+    async def get_wmscapabilities(self,version="1.3.0",outputfile=None):
+        res = await self.get(self.wmscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+        return await self._save(res,outputfile,"gswmscapabilities_",".xml")
+
+    async def get_wmscapabilities_index(self,version="1.3.0"):
+        return await self._get_capabilities_index("WMS",self.wmscapabilities_url(version=version))
+
+    #layergroup
+    async def get_layergroup(self,workspace,groupname):
+        res = await self.get(self.layergroup_url(workspace,groupname),headers=self.accept_header("json"))
+        return self._parse_layergroup(res.json())
+
+    async def list_layergroups(self,workspace):
+        res = await self.get(self.layergroups_url(workspace),headers=self.accept_header("json"))
+        return self._parse_layergroups(res.json())
+
+    async def has_layergroup(self,workspace,groupname):
+        return groupname in await self.list_layergroups(workspace)
+
+    #style
+    async def list_styles(self,workspace):
+        res = await self.get(self.styles_url(workspace),headers=self.accept_header("json"))
+        return self._parse_styles(res.json())
+
+    async def get_style(self,workspace,stylename):
+        return self._parse_style((await self.get(self.style_url(workspace,stylename),headers=self.accept_header("json"))).json())
+
+    async def has_style(self,workspace,stylename):
+        return await self.has(self.style_url(workspace,stylename),headers=self.accept_header("json"))
+
+    #security
+    async def get_catalogue_mode(self):
+        res = await self.get(self.catalogue_mode_url(),headers=self.accept_header("json"))
+        return self._parse_catalogue_mode(res.json())
+
+    async def get_layer_access_rules(self):
+        res = await self.get(self.layer_access_rules_url(),headers=self.accept_header("json"))
+        return res.json()
+
+    #gwc
+    async def get_gridset(self,gridset):
+        key = (self.geoserver_url,gridset)
+        if key in self._gridsets:
+            return self._gridsets[key]
+        #load through the cache shared with Geoserver, the concurrent loads of the same gridset are coalesced
+        return await asyncio.to_thread(self._gridsets.get,key,self.geoserver._load_gridset,gridset)
+
+    async def get_gridsetutil(self,gridset):
+        key = (self.geoserver_url,gridset)
+        if key in self._gridsetutils:
+            return self._gridsetutils[key]
+        return await asyncio.to_thread(self._gridsetutils.get,key,self.geoserver._load_gridsetutil,gridset)
+
+    async def list_gwclayers(self,workspace=None):
+        res = await self.get(self.gwclayers_url(),headers=self.accept_header("json"))
+        return self._parse_gwclayers(res.json(),workspace)
+
+    async def has_gwclayer(self,workspace,layername):
+        return await self.has(self.gwclayer_url(workspace,layername) , headers=self.accept_header("json"),error_handler=self._handle_gwcresponse_error)
+
+    async def get_gwclayer(self,workspace,layername):
+        res = await self.get(self.gwclayer_url(workspace,layername,f="json") , headers=self.accept_header("json"),error_handler=self._handle_gwcresponse_error)
+        return self._parse_gwclayer(res.json())
+
+    async def get_wmtscapabilities(self,version="1.1.1",outputfile=None):
+        res = await self.get(self.wmtscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+        return await self._save(res,outputfile,"gswmtscapabilities_",".xml")
+
+    async def get_wmtscapabilities_index(self,version="1.1.1"):
+        return await self._get_capabilities_index("WMTS",self.wmtscapabilities_url(version=version))
+
+    async def get_tileposition(self,x,y,zoom,gridset=settings.GWC_GRIDSET):
+        return (await self.get_gridsetutil(gridset)).get_tile(x,y,zoom)
+
+    async def get_tilebbox(self,zoom,xtile,ytile,gridset=settings.GWC_GRIDSET):
+        return (await self.get_gridsetutil(gridset)).tile_bbox(zoom,xtile,ytile)
+
+    async def get_tile_count(self,gridset,bbox,zoom):
+        return (await self.get_gridsetutil(gridset)).get_tile_count(bbox,zoom)
+
+    async def get_layer_latlonbbox(self,workspace,layername):
+        for f_get,f_field,field in self.LAYER_LATLONBBOX_FIELDS:
+            try:
+                return self._parse_latlonbbox(getattr(self,f_field)(await getattr(self,f_get)(workspace,layername),field))
+            except ResourceNotFound as ex:
+                if f_get == self.LAYER_LATLONBBOX_FIELDS[-1][0]:
+                    raise
+
+    async def get_tile(self,workspace,layername,zoom=None,row=None,column=None,gridset=settings.GWC_GRIDSET,format="image/jpeg",style=None,version=settings.WMTS_VERSION,outputfile=None,output="file",chunk_size=settings.IMAGE_CHUNK_SIZE,validate=False):
+        if zoom is None or row is None or column is None:
+            zoom,column,row = self._get_layer_tile(await self.get_gridsetutil(gridset),await self.get_layer_latlonbbox(workspace,layername),workspace,layername)
+
+        url = self.tile_url(workspace,layername,zoom,row,column,gridset=gridset,format=format,style=style,version=version)
+        res = await self.get(url,headers=self.accept_header("jpeg"),error_handler=self._handle_gwcresponse_error,timeout=settings.WMTS_TIMEOUT)
+        self._check_image(res,workspace,layername,format)
+        gridsetdata = (await self.get_gridset(gridset)) if validate else None
+        return await self._read_image_async(res,workspace,layername,format,outputfile=outputfile,output=output,chunk_size=chunk_size,width=gridsetdata["tileWidth"] if validate else None,height=gridsetdata["tileHeight"] if validate else None,validate=validate,prefix="gswmts_")
+
+    #wms service
+    async def get_map(self,workspace,layername,bbox,version="1.1.0",srs="EPSG:4326",width=1024,height=1024,format="image/jpeg",style="",outputfile=None,output="file",chunk_size=settings.IMAGE_CHUNK_SIZE,validate=False):
+        if isinstance(bbox,dict):
+            bbox = [bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"]]
+        url = self.map_url(workspace,layername,bbox,version=version,srs=srs,width=width,height=height,format=format,style=style)
+        res = await self.get(url,headers=self.accept_header(format),timeout=settings.WMS_TIMEOUT)
+        self._check_image(res,workspace,layername,format)
+        return await self._read_image_async(res,workspace,layername,format,outputfile=outputfile,output=output,chunk_size=chunk_size,width=width if validate else None,height=height if validate else None,validate=validate,prefix="gswms_")
+
+    async def all_layers(self):
+        """
+        The same result as Geoserver.all_layers, the workspaces and stores are listed concurrently
+        """
+        async def _list_store(workspace,store,f_list):
+            return (store,await f_list(workspace,store))
+
+        async def _list_workspace(workspace):
+            datastores,wmsstores,layergroups = await asyncio.gather(
+                self.list_datastores(workspace),
+                self.list_wmsstores(workspace),
+                self.list_layergroups(workspace)
+            )
+            datastores = await asyncio.gather(*[_list_store(workspace,s,self.list_featuretypes) for s in datastores])
+            wmsstores = await asyncio.gather(*[_list_store(workspace,s,self.list_wmslayers) for s in wmsstores])
+            return (
+                (workspace,[d for d in datastores if d[1]]),
+                (workspace,[d for d in wmsstores if d[1]]),
+                (workspace,layergroups)
+            )
+
+        featuretypes = []
+        wmslayers = []
+        layergroups = []
+        for f,w,l in await asyncio.gather(*[_list_workspace(w) for w in await self.list_workspaces()]):
+            if f[1]:
+                featuretypes.append(f)
+            if w[1]:
+                wmslayers.append(w)
+            if l[1]:
+                layergroups.append(l)
+
+        return (featuretypes,wmslayers,layergroups)
+
+def _mirror(name):
+    """
+    Return a coroutine function which runs the Geoserver method in the default executor
+    """
+    method = getattr(Geoserver,name)
+    async def _func(self,*args,**kwargs):
+        return await asyncio.to_thread(getattr(self.geoserver,name),*args,**kwargs)
+
+    _func.__name__ = name
+    _func.__qualname__ = "AsyncGeoserver.{}".format(name)
+    _func.__doc__ = method.__doc__
+    return _func
+
+def _is_mirrored(name):
+    """
+    The url builders, field getters and header builders are shared as they are; the other public methods of the mixins must be coroutines
+    """
+    if name.startswith("_") or name.endswith(("_url","_field","_header")):
+        return False
+    if name in AsyncGeoserver.__dict__ or name in GeoserverUtils.__dict__:
+        return False
+    return any(name in cls.__dict__ and inspect.isfunction(cls.__dict__[name]) for cls in AsyncGeoserver.__mro__ if cls not in (AsyncGeoserver,GeoserverUtils,object))
+
+for _name in [n for n in dir(AsyncGeoserver) if _is_mirrored(n)]:
+    setattr(AsyncGeoserver,_name,_mirror(_name))
+
+def get_default_asyncgeoserver():
+    geoserver = get_default_geoserver()
+    return AsyncGeoserver(geoserver.geoserver_url,geoserver.username,geoserver.password,headers=geoserver.headers,ssl_verify=geoserver.ssl_verify)
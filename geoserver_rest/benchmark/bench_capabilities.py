@@ -0,0 +1,78 @@
+"""
+Benchmark the parsing of a large WMS GetCapabilities document served by a local stub geoserver.
+    download: download the document to a temporary file and parse it into a DOM, the way the document was processed before
+    index: stream the document and parse it incrementally into a CapabilitiesIndex
+The time is measured in a plain run, and the peak memory is measured in another run traced by tracemalloc.
+
+Environment variables:
+    BENCHMARK_SIZE_MB: the approximate size of the capabilities document in MB, default 50
+
+Run: python -m geoserver_rest.benchmark.bench_capabilities
+"""
+import os
+import time
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from .stubserver import StubGeoserver,StubCatalog
+from ..geoserver import Geoserver
+
+class CapabilitiesCatalog(StubCatalog):
+    """
+    Generate the wms capabilities document only once
+    """
+    _wms_capabilities = None
+
+    def wms_capabilities(self):
+        if self._wms_capabilities is None:
+            self._wms_capabilities = super().wms_capabilities().encode()
+        return self._wms_capabilities
+
+def download(geoserver):
+    res = geoserver.get(geoserver.wmscapabilities_url(),headers=geoserver.accept_header("xml"))
+    fd,outputfile = tempfile.mkstemp(prefix="gswmscapabilities_",suffix=".xml")
+    try:
+        with os.fdopen(fd,"wb") as f:
+            for data in res.iter_content(chunk_size = 1024):
+                f.write(data)
+        del res
+        root = ET.parse(outputfile).getroot()
+        layers = [e for e in root.iter("{http://www.opengis.net/wms}Layer") if e.find("{http://www.opengis.net/wms}Name") is not None]
+        return (len(layers),os.path.getsize(outputfile))
+    finally:
+        os.remove(outputfile)
+
+def index(geoserver):
+    capabilities = geoserver.get_wmscapabilities_index()
+    return (len(capabilities),capabilities.size)
+
+def run(stub,method):
+    with Geoserver(stub.geoserver_url,"admin","geoserver") as geoserver:
+        starttime = time.time()
+        layers,size = method(geoserver)
+        exectime = time.time() - starttime
+
+    with Geoserver(stub.geoserver_url,"admin","geoserver") as geoserver:
+        tracemalloc.start()
+        method(geoserver)
+        current,peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return (layers,size,exectime,peak)
+
+if __name__ == '__main__':
+    size = int(os.environ.get("BENCHMARK_SIZE_MB",50))
+    #each layer takes about 500 bytes in the document
+    featuretypes = max(1,size * 1048576 // 500 // 100)
+    catalog = CapabilitiesCatalog(workspaces=featuretypes,datastores=1,featuretypes=100)
+
+    with StubGeoserver(catalog) as stub:
+        catalog.wms_capabilities()
+        results = [(name,*run(stub,method)) for name,method in (("download",download),("index",index))]
+
+    print("{:<10}{:>10}{:>12}{:>10}{:>18}".format("Method","Layers","Size(MB)","Seconds","Peak Memory(MB)"))
+    for name,layers,size,exectime,peak in results:
+        print("{:<10}{:>10}{:>12.1f}{:>10.2f}{:>18.1f}".format(name,layers,size / 1048576,exectime,peak / 1048576))
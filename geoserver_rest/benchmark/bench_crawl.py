@@ -0,0 +1,48 @@
+"""
+Benchmark the catalog crawl of Geoserver.all_layers with different degrees of parallelism.
+A local stub geoserver is used, and the server side latency is simulated by delaying each request.
+
+Environment variables:
+    BENCHMARK_WORKSPACES: the number of workspaces in the stub catalog, default 20
+    BENCHMARK_DATASTORES: the number of datastores in each workspace, default 5
+    BENCHMARK_FEATURETYPES: the number of featuretypes in each datastore, default 10
+    BENCHMARK_LATENCY: the simulated latency of each request in milliseconds, default 20
+    BENCHMARK_DOPS: the comma separated degrees of parallelism, default "1,4,8,16"
+
+Run: python -m geoserver_rest.benchmark.bench_crawl
+"""
+import os
+import time
+import tempfile
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from .stubserver import StubGeoserver,StubCatalog
+from ..geoserver import Geoserver
+
+def run_crawl(stub,dop):
+    stub.reset()
+    with Geoserver(stub.geoserver_url,"admin","geoserver") as geoserver:
+        starttime = time.time()
+        featuretypes,wmslayers,layergroups = geoserver.all_layers(dop=dop)
+        exectime = time.time() - starttime
+    layers = sum(len(l) for w,stores in featuretypes for s,l in stores)
+    return (layers,stub.requests,exectime)
+
+if __name__ == '__main__':
+    catalog = StubCatalog(
+        workspaces=int(os.environ.get("BENCHMARK_WORKSPACES",20)),
+        datastores=int(os.environ.get("BENCHMARK_DATASTORES",5)),
+        featuretypes=int(os.environ.get("BENCHMARK_FEATURETYPES",10))
+    )
+    latency = int(os.environ.get("BENCHMARK_LATENCY",20)) / 1000
+    dops = [int(d) for d in os.environ.get("BENCHMARK_DOPS","1,4,8,16").split(",") if d.strip()]
+
+    with StubGeoserver(catalog,latency=latency) as stub:
+        results = [(dop,*run_crawl(stub,dop)) for dop in dops]
+
+    print("Simulated latency : {} ms".format(int(latency * 1000)))
+    print("{:<8}{:>10}{:>12}{:>12}{:>12}".format("DOP","Layers","Requests","Seconds","Speedup"))
+    for dop,layers,requests,exectime in results:
+        print("{:<8}{:>10}{:>12}{:>12.2f}{:>12.2f}".format(dop,layers,requests,exectime,results[0][3] / exectime if exectime else 0))
@@ -0,0 +1,59 @@
+"""
+Benchmark the memory retained by the finished tasks of a keep_tasks healthcheck, which are kept for the comparison among geoservers.
+    full: keep the finished task objects with their results, details and exceptions, the way the finished tasks were kept before
+    summary: keep the compact TaskSummary of the finished tasks
+The retained memory is the traced memory released when the finished tasks are dropped after the healthcheck.
+
+Environment variables:
+    BENCHMARK_WORKSPACES: the number of workspaces in the stub catalog, default 10
+    BENCHMARK_DATASTORES: the number of datastores in each workspace, default 5
+    BENCHMARK_FEATURETYPES: the number of featuretypes in each datastore, default 20
+    BENCHMARK_DOP: the degree of parallelism of the healthcheck, default 8
+
+Run: python -m geoserver_rest.benchmark.bench_finishedtasks
+"""
+import os
+import gc
+import time
+import tempfile
+import tracemalloc
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from .stubserver import StubGeoserver,StubCatalog
+from ..geoserverhealthcheck import GeoserverHealthCheck
+
+def run(stub,method,dop):
+    stub.reset()
+    healthcheck = GeoserverHealthCheck("bench_{}".format(method),stub.geoserver_url,"admin","geoserver",False,None,None,None,None,None,None,None,dop=dop,keep_tasks=True)
+    if method == "full":
+        healthcheck.taskrunner.keep = lambda task:task
+    tracemalloc.start()
+    starttime = time.time()
+    healthcheck.start()
+    healthcheck.wait_to_finish()
+    exectime = time.time() - starttime
+    tasks = len(healthcheck.finished_tasks)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    healthcheck._finished_tasks = None
+    gc.collect()
+    retained -= tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (tasks,retained,exectime)
+
+if __name__ == '__main__':
+    catalog = StubCatalog(
+        workspaces=int(os.environ.get("BENCHMARK_WORKSPACES",10)),
+        datastores=int(os.environ.get("BENCHMARK_DATASTORES",5)),
+        featuretypes=int(os.environ.get("BENCHMARK_FEATURETYPES",20))
+    )
+    dop = int(os.environ.get("BENCHMARK_DOP",8))
+
+    with StubGeoserver(catalog) as stub:
+        results = [(method,*run(stub,method,dop)) for method in ("full","summary")]
+
+    print("{:<10}{:>8}{:>22}{:>22}{:>10}".format("Method","Tasks","Retained Memory(MB)","Bytes per Task","Seconds"))
+    for method,tasks,retained,exectime in results:
+        print("{:<10}{:>8}{:>22.2f}{:>22.0f}{:>10.2f}".format(method,tasks,retained / 1048576,retained / tasks if tasks else 0,exectime))
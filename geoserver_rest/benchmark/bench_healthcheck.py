@@ -0,0 +1,53 @@
+"""
+Benchmark the catalog discovery of the healthcheck in the full mode and the fast mode.
+    full: discover the layers from the rest api, and get the detail, styles and gwc layer of each layer
+    fast: create the layer tests from the GetCapabilities documents
+A local stub geoserver is used, and the server side latency is simulated by delaying each request.
+
+Environment variables:
+    BENCHMARK_WORKSPACES: the number of workspaces in the stub catalog, default 10
+    BENCHMARK_DATASTORES: the number of datastores in each workspace, default 5
+    BENCHMARK_FEATURETYPES: the number of featuretypes in each datastore, default 20
+    BENCHMARK_LATENCY: the simulated latency of each request in milliseconds, default 5
+    BENCHMARK_DOP: the degree of parallelism of the healthcheck, default 8
+
+Run: python -m geoserver_rest.benchmark.bench_healthcheck
+"""
+import os
+import time
+import tempfile
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from .stubserver import StubGeoserver,StubCatalog
+from ..geoserverhealthcheck import GeoserverHealthCheck
+
+def run(stub,mode,dop):
+    stub.reset()
+    healthcheck = GeoserverHealthCheck("bench_{}".format(mode),stub.geoserver_url,"admin","geoserver",False,None,None,None,None,None,None,None,dop=dop,mode=mode)
+    starttime = time.time()
+    healthcheck.start()
+    healthcheck.wait_to_finish()
+    exectime = time.time() - starttime
+    requests = healthcheck.metadata["requests"]
+    rest = sum(m["requests"] for family,m in requests.items() if family.startswith(("rest","gwc/rest")))
+    return (healthcheck.tasks,rest,stub.requests - rest,exectime)
+
+if __name__ == '__main__':
+    catalog = StubCatalog(
+        workspaces=int(os.environ.get("BENCHMARK_WORKSPACES",10)),
+        datastores=int(os.environ.get("BENCHMARK_DATASTORES",5)),
+        featuretypes=int(os.environ.get("BENCHMARK_FEATURETYPES",20))
+    )
+    latency = int(os.environ.get("BENCHMARK_LATENCY",5)) / 1000
+    dop = int(os.environ.get("BENCHMARK_DOP",8))
+    layers = len(list(catalog.layers))
+
+    with StubGeoserver(catalog,latency=latency) as stub:
+        results = [(mode,*run(stub,mode,dop)) for mode in ("full","fast")]
+
+    print("Layers : {}, Latency : {}ms, DOP : {}".format(layers,int(latency * 1000),dop))
+    print("{:<6}{:>8}{:>15}{:>16}{:>10}".format("Mode","Tasks","REST Requests","OWS Requests","Seconds"))
+    for mode,tasks,rest,ows,exectime in results:
+        print("{:<6}{:>8}{:>15}{:>16}{:>10.2f}".format(mode,tasks,rest,ows,exectime))
@@ -0,0 +1,67 @@
+"""
+Benchmark the task scheduling of TaskRunner with a synthetic task tree shaped like the healthcheck task tree:
+each task creates its child tasks when it finishes, and each queued task holds a payload like the layer metadata held by the healthcheck tasks.
+The peak queue length and the peak memory of FIFO scheduling(breadth-first) and depth-first scheduling are compared.
+
+Environment variables:
+    BENCHMARK_FANOUTS: the comma separated number of children at each level of the task tree, default "20,5,10,6"
+                       (workspaces, stores per workspace, layers per store, checks per layer)
+    BENCHMARK_PAYLOAD: the payload size of each task in bytes, default 2048
+    BENCHMARK_LATENCY: the simulated latency of each task in milliseconds, default 1
+    BENCHMARK_DOP: the degree of parallelism, default 4
+
+Run: python -m geoserver_rest.benchmark.bench_scheduling
+"""
+import os
+import time
+import tempfile
+import tracemalloc
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from ..taskrunner import TaskRunner
+
+class SyntheticTask(object):
+    def __init__(self,fanouts,level,payload,latency):
+        self.fanouts = fanouts
+        self.level = level
+        self.payload = bytearray(payload)
+        self.latency = latency
+
+    def run(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.level < len(self.fanouts):
+            for i in range(self.fanouts[self.level]):
+                self.taskrunner.add_task(SyntheticTask(self.fanouts,self.level + 1,len(self.payload),self.latency),parent=self)
+        #the payload is released when the task is finished
+        self.payload = None
+
+    def __str__(self):
+        return "SyntheticTask(level={})".format(self.level)
+
+def run_scheduling(scheduling,fanouts,payload,latency,dop):
+    runner = TaskRunner("bench-{}".format(scheduling),dop=dop,priority=scheduling)
+    tracemalloc.start()
+    starttime = time.time()
+    runner.start()
+    runner.add_task(SyntheticTask(fanouts,0,payload,latency))
+    runner.wait_to_shutdown()
+    exectime = time.time() - starttime
+    current,peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (runner.total_tasks,runner.tasks.peak,peak,exectime)
+
+if __name__ == '__main__':
+    fanouts = [int(f) for f in os.environ.get("BENCHMARK_FANOUTS","20,5,10,6").split(",") if f.strip()]
+    payload = int(os.environ.get("BENCHMARK_PAYLOAD",2048))
+    latency = int(os.environ.get("BENCHMARK_LATENCY",1)) / 1000
+    dop = int(os.environ.get("BENCHMARK_DOP",4))
+
+    results = [(scheduling,*run_scheduling(scheduling,fanouts,payload,latency,dop)) for scheduling in ("fifo","depthfirst")]
+
+    print("Fanouts : {}, payload : {} bytes, simulated latency : {} ms, dop : {}".format(fanouts,payload,int(latency * 1000),dop))
+    print("{:<12}{:>10}{:>14}{:>16}{:>12}".format("Scheduling","Tasks","Peak Queue","Peak Memory(KB)","Seconds"))
+    for scheduling,tasks,peakqueue,peakmemory,exectime in results:
+        print("{:<12}{:>10}{:>14}{:>16}{:>12.2f}".format(scheduling,tasks,peakqueue,int(peakmemory / 1024),exectime))
@@ -0,0 +1,53 @@
+"""
+Benchmark the healthcheck throughput with and without the pooled keep-alive session.
+A local stub geoserver is used, and the handshake cost is simulated by delaying each new connection.
+
+Environment variables:
+    BENCHMARK_WORKSPACES: the number of workspaces in the stub catalog, default 5
+    BENCHMARK_DATASTORES: the number of datastores in each workspace, default 2
+    BENCHMARK_FEATURETYPES: the number of featuretypes in each datastore, default 10
+    BENCHMARK_HANDSHAKE_DELAY: the simulated handshake time in milliseconds, default 20
+    HEALTHCHECK_DOP: the degree of parallelism
+
+Run: python -m geoserver_rest.benchmark.bench_session
+"""
+import os
+import time
+import tempfile
+
+if not os.environ.get("REPORT_HOME"):
+    os.environ["REPORT_HOME"] = tempfile.mkdtemp(prefix="gsbenchmark_")
+
+from .stubserver import StubGeoserver,StubCatalog
+from ..geoserverhealthcheck import GeoserverHealthCheck
+from .. import settings
+
+def run_healthcheck(stub,keepalive):
+    stub.reset()
+    healthcheck = GeoserverHealthCheck("stub{}".format("keepalive" if keepalive else ""),stub.geoserver_url,"admin","geoserver",False,None,None,None,None,None,None,None,dop=settings.HEALTHCHECK_DOP)
+    healthcheck.geoserver.keepalive = keepalive
+    starttime = time.time()
+    healthcheck.start()
+    healthcheck.wait_to_finish()
+    exectime = time.time() - starttime
+    return (healthcheck.tasks,stub.requests,stub.connections,exectime)
+
+if __name__ == '__main__':
+    catalog = StubCatalog(
+        workspaces=int(os.environ.get("BENCHMARK_WORKSPACES",5)),
+        datastores=int(os.environ.get("BENCHMARK_DATASTORES",2)),
+        featuretypes=int(os.environ.get("BENCHMARK_FEATURETYPES",10))
+    )
+    handshake_delay = int(os.environ.get("BENCHMARK_HANDSHAKE_DELAY",20)) / 1000
+
+    with StubGeoserver(catalog,handshake_delay=handshake_delay) as stub:
+        results = []
+        for keepalive in (False,True):
+            results.append((keepalive,*run_healthcheck(stub,keepalive)))
+
+    print("Degree of parallelism : {} , Simulated handshake : {} ms".format(settings.HEALTHCHECK_DOP,int(handshake_delay * 1000)))
+    print("{:<12}{:>10}{:>12}{:>14}{:>12}{:>16}".format("Session","Tasks","Requests","Connections","Seconds","Requests/Sec"))
+    for keepalive,tasks,requests,connections,exectime in results:
+        print("{:<12}{:>10}{:>12}{:>14}{:>12.2f}{:>16.1f}".format("pooled" if keepalive else "per-request",tasks,requests,connections,exectime,requests / exectime if exectime else 0))
+    if results[0][4] and results[1][4]:
+        print("Speedup : {:.2f}x".format((results[1][2] / results[1][4]) / (results[0][2] / results[0][4])))
@@ -0,0 +1,79 @@
+"""
+Benchmark the tile calculations of many layer bboxes in all the zoom levels of a gridset.
+    loop: call the scalar apis(get_tile_count,tile_bbox,get_bbox_tile) of GridsetUtil one by one in python loops
+    batch: call the numpy backed batch apis(tile_counts,tile_bboxes,bbox_tiles) of GridsetUtil once
+The throughput is the number of the calculations per second, a calculation is one bbox in one zoom level for the tile counts,
+one tile for the tile bboxes and one bbox for the best zoom.
+
+Environment variables:
+    BENCHMARK_BBOXES: the number of the random layer bboxes, default 10000
+    BENCHMARK_GRIDSET: the gridset defined in the stub server, 'gda94' or 'mercator', default gda94
+
+Run: python -m geoserver_rest.benchmark.bench_tilemath
+"""
+import os
+import math
+import time
+import random
+
+from .stubserver import GRIDSETS
+from ..mixins.gwc import GridsetUtil
+
+def random_bboxes(gridsetutil,size):
+    random.seed(0)
+    minx,miny,maxx,maxy = gridsetutil.extent
+    bboxes = []
+    for i in range(size):
+        #the layer size is from the whole gridset to 1/10^8 of the gridset
+        width = (maxx - minx) * math.pow(10,random.uniform(-8,0))
+        height = (maxy - miny) * math.pow(10,random.uniform(-8,0))
+        x = random.uniform(minx,maxx - width)
+        y = random.uniform(miny,maxy - height)
+        bboxes.append((x,y,x + width,y + height))
+    return bboxes
+
+def loop(gridsetutil,bboxes,tiles):
+    zooms = range(gridsetutil.maxzoom + 1)
+    starttime = time.time()
+    counts = [[gridsetutil.get_tile_count(bbox,zoom) for zoom in zooms] for bbox in bboxes]
+    counttime = time.time() - starttime
+
+    starttime = time.time()
+    tilebboxes = [gridsetutil.tile_bbox(zoom,x,y) for zoom,x,y in tiles]
+    bboxtime = time.time() - starttime
+
+    starttime = time.time()
+    besttiles = [gridsetutil.get_bbox_tile(bbox) for bbox in bboxes]
+    besttime = time.time() - starttime
+    return (counttime,bboxtime,besttime)
+
+def batch(gridsetutil,bboxes,tiles):
+    starttime = time.time()
+    counts = gridsetutil.tile_counts(bboxes)
+    counttime = time.time() - starttime
+
+    starttime = time.time()
+    zooms,xs,ys = zip(*tiles)
+    tilebboxes = gridsetutil.tile_bboxes(zooms,xs,ys)
+    bboxtime = time.time() - starttime
+
+    starttime = time.time()
+    besttiles = gridsetutil.bbox_tiles(bboxes)
+    besttime = time.time() - starttime
+    return (counttime,bboxtime,besttime)
+
+if __name__ == '__main__':
+    size = int(os.environ.get("BENCHMARK_BBOXES",10000))
+    gridset = os.environ.get("BENCHMARK_GRIDSET","gda94")
+    gridsetutil = GridsetUtil(GRIDSETS[gridset])
+    bboxes = random_bboxes(gridsetutil,size)
+    #the best tiles of the bboxes are used to benchmark the tile bboxes
+    tiles = [gridsetutil.get_bbox_tile(bbox) for bbox in bboxes]
+    calculations = (size * (gridsetutil.maxzoom + 1),len(tiles),size)
+
+    results = [(method.__name__,*method(gridsetutil,bboxes,tiles)) for method in (loop,batch)]
+
+    print("Gridset: {} , BBoxes: {} , Zoom Levels: {}".format(gridset,size,gridsetutil.maxzoom + 1))
+    print("{:<10}{:>24}{:>24}{:>24}".format("Method","Tile Counts(/s)","Tile BBoxes(/s)","Best Zooms(/s)"))
+    for method,*exectimes in results:
+        print("{:<10}{}".format(method,"".join("{:>24.0f}".format(n / t if t else 0) for n,t in zip(calculations,exectimes))))
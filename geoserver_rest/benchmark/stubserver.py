@@ -0,0 +1,401 @@
+import json
+import re
+import struct
+import zlib
+import threading
+import time
+import logging
+import urllib.parse
+import xml.etree.ElementTree as ET
+from http.server import ThreadingHTTPServer,BaseHTTPRequestHandler
+
+from ..mixins.gwc import GridsetUtil
+
+logger = logging.getLogger(__name__)
+
+#a 1 x 1 png image
+PNG_IMAGE = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6300010000050001"
+    "0d0a2db40000000049454e44ae426082"
+)
+#a 1 x 1 jpeg image(SOI,APP0,SOF0 and EOI)
+JPEG_IMAGE = bytes.fromhex(
+    "ffd8ffe000104a46494600010100000100010000"
+    "ffc0000b080001000101011100"
+    "ffd9"
+)
+
+def image(format,width=1,height=1):
+    """
+    Return the 1 x 1 image whose header is patched to width x height, enough to pass the image validator
+    """
+    if "jpeg" in format:
+        return JPEG_IMAGE[:25] + struct.pack(">HH",height,width) + JPEG_IMAGE[29:]
+    ihdr = b"IHDR" + struct.pack(">II",width,height) + PNG_IMAGE[24:29]
+    return PNG_IMAGE[:12] + ihdr + struct.pack(">I",zlib.crc32(ihdr)) + PNG_IMAGE[33:]
+
+GRIDSETS = {
+    "gda94": {
+        "name": "gda94",
+        "srs": {"number": 4283},
+        "extent": {"coords": [-180.0,-90.0,180.0,90.0]},
+        "alignTopLeft": False,
+        "resolutions": [0.703125 / (2 ** z) for z in range(22)],
+        "metersPerUnit": 111319.49079327358,
+        "pixelSize": 2.8E-4,
+        "scaleNames": ["gda94:{}".format(z) for z in range(22)],
+        "tileHeight": 256,
+        "tileWidth": 256,
+        "yCoordinateFirst": False
+    },
+    "mercator": {
+        "name": "mercator",
+        "srs": {"number": 3857},
+        "extent": {"coords": [-20037508.34,-20037508.34,20037508.34,20037508.34]},
+        "alignTopLeft": False,
+        "resolutions": [156543.03390625 / (2 ** z) for z in range(22)],
+        "metersPerUnit": 1.0,
+        "pixelSize": 2.8E-4,
+        "scaleNames": ["mercator:{}".format(z) for z in range(22)],
+        "tileHeight": 256,
+        "tileWidth": 256,
+        "yCoordinateFirst": False
+    }
+}
+
+class StubCatalog(object):
+    """
+    A synthetic geoserver catalog with 'workspaces' workspaces, each workspace has 'datastores' datastores, and each datastore has 'featuretypes' featuretypes
+    """
+    def __init__(self,workspaces=5,datastores=2,featuretypes=10,gwc=True):
+        self.workspaces = ["ws{}".format(w) for w in range(workspaces)]
+        self.datastores = dict((w,["{}_ds{}".format(w,d) for d in range(datastores)]) for w in self.workspaces)
+        self.featuretypes = dict(((w,d),["{}_ft{}".format(d,f) for f in range(featuretypes)]) for w in self.workspaces for d in self.datastores[w])
+        self.gwc = gwc
+
+    @property
+    def layers(self):
+        for w in self.workspaces:
+            for d in self.datastores[w]:
+                for f in self.featuretypes[(w,d)]:
+                    yield (w,d,f)
+
+    def bbox(self,layername):
+        index = sum(ord(c) for c in layername) % 20
+        return {"minx":115.0 + index * 0.1,"miny":-32.0 - index * 0.1,"maxx":116.0 + index * 0.1,"maxy":-31.0 - index * 0.1,"crs":"EPSG:4326"}
+
+    def featuretype(self,workspace,layername):
+        store = next((d for d in self.datastores.get(workspace,[]) if layername in self.featuretypes[(workspace,d)]),None)
+        if not store:
+            return None
+        return {
+            "name":layername,
+            "nativeName":layername,
+            "title":layername,
+            "srs":"EPSG:4326",
+            "enabled":True,
+            "namespace":{"name":workspace},
+            "store":{"name":"{}:{}".format(workspace,store)},
+            "nativeBoundingBox":self.bbox(layername),
+            "latLonBoundingBox":self.bbox(layername),
+            "attributes":{"attribute":[
+                {"name":"id","nillable":False,"binding":"java.lang.Integer"},
+                {"name":"wkb_geometry","nillable":True,"binding":"org.locationtech.jts.geom.MultiPolygon"}
+            ]}
+        }
+
+    def gwclayer(self,workspace,layername):
+        return {
+            "name":"{}:{}".format(workspace,layername),
+            "enabled":True,
+            "expireCache":0,
+            "expireClients":0,
+            "mimeFormats":["image/png","image/jpeg"],
+            "gridSubsets":[{"gridSetName":"gda94"},{"gridSetName":"mercator"}],
+            "metaWidthHeight":[1,1],
+            "gutter":100
+        }
+
+    def wms_capabilities(self):
+        layers = "".join(
+            """<Layer queryable="1"><Name>{0}:{2}</Name><Title>{2}</Title><CRS>EPSG:4326</CRS><EX_GeographicBoundingBox><westBoundLongitude>{3[minx]}</westBoundLongitude><eastBoundLongitude>{3[maxx]}</eastBoundLongitude><southBoundLatitude>{3[miny]}</southBoundLatitude><northBoundLatitude>{3[maxy]}</northBoundLatitude></EX_GeographicBoundingBox><BoundingBox CRS="EPSG:4326" minx="{3[miny]}" miny="{3[minx]}" maxx="{3[maxy]}" maxy="{3[maxx]}"/><Style><Name>{2}</Name><Title>{2}</Title></Style></Layer>""".format(w,d,f,self.bbox(f))
+            for w,d,f in self.layers
+        )
+        return """<?xml version="1.0" encoding="UTF-8"?><WMS_Capabilities version="1.3.0" xmlns="http://www.opengis.net/wms"><Service><Name>WMS</Name></Service><Capability><Request><GetMap><Format>image/png</Format><Format>image/jpeg</Format></GetMap></Request><Layer><Title>Stub</Title>{}</Layer></Capability></WMS_Capabilities>""".format(layers)
+
+    def wfs_capabilities(self):
+        layers = "".join(
+            """<FeatureType><Name>{0}:{2}</Name><Title>{2}</Title><DefaultCRS>urn:ogc:def:crs:EPSG::4326</DefaultCRS><ows:WGS84BoundingBox><ows:LowerCorner>{3[minx]} {3[miny]}</ows:LowerCorner><ows:UpperCorner>{3[maxx]} {3[maxy]}</ows:UpperCorner></ows:WGS84BoundingBox></FeatureType>""".format(w,d,f,self.bbox(f))
+            for w,d,f in self.layers
+        )
+        return """<?xml version="1.0" encoding="UTF-8"?><wfs:WFS_Capabilities version="2.0.0" xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:ows="http://www.opengis.net/ows/1.1"><FeatureTypeList>{}</FeatureTypeList></wfs:WFS_Capabilities>""".format(layers)
+
+    def wmts_capabilities(self):
+        layers = "".join(
+            """<Layer><ows:Title>{2}</ows:Title><ows:WGS84BoundingBox><ows:LowerCorner>{3[minx]} {3[miny]}</ows:LowerCorner><ows:UpperCorner>{3[maxx]} {3[maxy]}</ows:UpperCorner></ows:WGS84BoundingBox><ows:Identifier>{0}:{2}</ows:Identifier><Style isDefault="true"><ows:Identifier>{2}</ows:Identifier></Style><Format>image/png</Format><Format>image/jpeg</Format><TileMatrixSetLink><TileMatrixSet>gda94</TileMatrixSet></TileMatrixSetLink><TileMatrixSetLink><TileMatrixSet>mercator</TileMatrixSet></TileMatrixSetLink></Layer>""".format(w,d,f,self.bbox(f))
+            for w,d,f in self.layers
+        )
+        return """<?xml version="1.0" encoding="UTF-8"?><Capabilities version="1.0.0" xmlns="http://www.opengis.net/wmts/1.0" xmlns:ows="http://www.opengis.net/ows/1.1"><Contents>{}<TileMatrixSet><ows:Identifier>gda94</ows:Identifier><ows:SupportedCRS>urn:ogc:def:crs:EPSG::4283</ows:SupportedCRS></TileMatrixSet><TileMatrixSet><ows:Identifier>mercator</ows:Identifier><ows:SupportedCRS>urn:ogc:def:crs:EPSG::3857</ows:SupportedCRS></TileMatrixSet></Contents></Capabilities>""".format(layers)
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    #the headers and the body are sent separately, avoid the delayed ack stall on the kept-alive connections
+    disable_nagle_algorithm = True
+
+    def log_message(self,format,*args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        if self.server.handshake_delay:
+            #simulate the cost of the tcp and tls handshake
+            time.sleep(self.server.handshake_delay)
+
+    def send_data(self,status,data,contenttype="application/json"):
+        if isinstance(data,(dict,list)):
+            data = json.dumps(data)
+        if isinstance(data,str):
+            data = data.encode()
+        etag = None
+        if self.server.etag and self.command == "GET" and status == 200 and "/rest/" in self.path:
+            etag = "\"{}\"".format(zlib.crc32(data))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag",etag)
+                self.send_header("Content-Length","0")
+                self.end_headers()
+                return
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag",etag)
+        self.send_header("Content-Type",contenttype)
+        self.send_header("Content-Length",str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def not_found(self,msg="Not Found"):
+        self.send_data(404,msg,"text/plain")
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def do_POST(self):
+        body = self._read_body()
+        self.count_request()
+        m = re.match("^/geoserver/gwc/rest/seed(/(?P<layer>[^/]+?))?(\\.(json|xml))?$",urllib.parse.urlparse(self.path).path)
+        if m:
+            return self.seed(m.group("layer"),body)
+        self.send_data(201,"","text/plain")
+
+    def seed(self,layer,body):
+        """
+        Simulate the gwc seeding, each seed task seeds 'seed_rate' tiles per second
+        """
+        server = self.server
+        if body.startswith(b"kill_all"):
+            with server.lock:
+                for taskid in [i for i,t in server.seedtasks.items() if not layer or t["layer"] == layer]:
+                    del server.seedtasks[taskid]
+            return self.send_data(200,"","text/plain")
+
+        root = ET.fromstring(body)
+        gridsetutil = GridsetUtil(GRIDSETS[root.findtext("gridSetId")])
+        bbox = [float(e.text) for e in root.findall("bounds/coords/double")] or gridsetutil.extent
+        tiles = sum(gridsetutil.get_tile_count(bbox,zoom) for zoom in range(int(root.findtext("zoomStart")),int(root.findtext("zoomStop")) + 1))
+        threadcount = int(root.findtext("threadCount") or 1)
+        with server.lock:
+            server.seedrequests.append({"layer":layer,"type":root.findtext("type"),"gridset":root.findtext("gridSetId"),"zoomstart":int(root.findtext("zoomStart")),"zoomstop":int(root.findtext("zoomStop")),"bbox":bbox,"tiles":tiles})
+            for i in range(threadcount):
+                server.seedtaskid += 1
+                server.seedtasks[server.seedtaskid] = {"layer":layer,"tiles":tiles // threadcount + (1 if i < tiles % threadcount else 0),"starttime":time.time()}
+        self.send_data(200,"","text/plain")
+
+    def seed_status(self,layer):
+        server = self.server
+        now = time.time()
+        tasks = []
+        with server.lock:
+            for taskid,task in list(server.seedtasks.items()):
+                done = int((now - task["starttime"]) * server.seed_rate)
+                if done >= task["tiles"]:
+                    del server.seedtasks[taskid]
+                elif not layer or task["layer"] == layer:
+                    tasks.append([done,task["tiles"],int((task["tiles"] - done) / server.seed_rate),taskid,1])
+        return self.send_data(200,{"long-array-array":tasks})
+
+    do_PUT = do_POST
+
+    def do_DELETE(self):
+        self.count_request()
+        self.send_data(200,"","text/plain")
+
+    def count_request(self):
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def do_GET(self):
+        self.count_request()
+        catalog = self.server.catalog
+        url = urllib.parse.urlparse(self.path)
+        path = url.path
+        params = dict((k.lower(),v) for k,v in urllib.parse.parse_qsl(url.query))
+        #remove the format suffix
+        m = re.search("\\.(json|xml)$",path)
+        if m:
+            path = path[:m.start()]
+
+        if path == "/geoserver/rest/about/version":
+            return self.send_data(200,{"about":{"resource":[{"@name":"GeoServer","Version":"2.27.1"},{"@name":"GeoTools","Version":"33.1"},{"@name":"GeoWebCache","Version":"1.27.1"}]}})
+        elif path == "/geoserver/rest/workspaces":
+            return self.send_data(200,{"workspaces":{"workspace":[{"name":w} for w in catalog.workspaces]}})
+
+        m = re.match("^/geoserver/rest/workspaces/(?P<workspace>[^/]+)/(?P<resource>[a-z]+)(/(?P<store>[^/]+)(/(?P<subresource>[a-z]+)(/(?P<layer>[^/]+))?)?)?$",path)
+        if m:
+            workspace = m.group("workspace")
+            if workspace not in catalog.workspaces:
+                return self.not_found()
+            resource = m.group("resource")
+            store = m.group("store")
+            subresource = m.group("subresource")
+            if resource == "datastores":
+                if not store:
+                    return self.send_data(200,{"dataStores":{"dataStore":[{"name":d} for d in catalog.datastores[workspace]]}})
+                elif store not in catalog.datastores[workspace]:
+                    return self.not_found()
+                elif not subresource:
+                    return self.send_data(200,{"dataStore":{"name":store,"enabled":True,"workspace":{"name":workspace},"connectionParameters":{"entry":[{"@key":"dbtype","$":"postgis"}]}}})
+                elif subresource == "featuretypes" and not m.group("layer"):
+                    return self.send_data(200,{"featureTypes":{"featureType":[{"name":f} for f in catalog.featuretypes[(workspace,store)]]}})
+                elif subresource == "featuretypes":
+                    data = catalog.featuretype(workspace,m.group("layer"))
+                    return self.send_data(200,{"featureType":data}) if data else self.not_found()
+            elif resource == "featuretypes" and store:
+                data = catalog.featuretype(workspace,store)
+                return self.send_data(200,{"featureType":data}) if data else self.not_found()
+            elif resource == "featuretypes":
+                return self.send_data(200,{"featureTypes":{"featureType":[{"name":f} for d in catalog.datastores[workspace] for f in catalog.featuretypes[(workspace,d)]]}})
+            elif resource == "wmsstores" and not store:
+                return self.send_data(200,{"wmsStores":""})
+            elif resource == "coveragestores" and not store:
+                return self.send_data(200,{"coverageStores":""})
+            elif resource == "layergroups" and not store:
+                return self.send_data(200,{"layerGroups":""})
+            elif resource == "wmslayers" and not store:
+                return self.send_data(200,{"wmsLayers":""})
+            return self.not_found()
+
+        m = re.match("^/geoserver/rest/layers/(?P<workspace>[^/:]+):(?P<layer>[^/]+)$",path)
+        if m:
+            if not catalog.featuretype(m.group("workspace"),m.group("layer")):
+                return self.not_found()
+            return self.send_data(200,{"layer":{"name":m.group("layer"),"defaultStyle":{"name":"{}:{}".format(m.group("workspace"),m.group("layer"))}}})
+
+        m = re.match("^/geoserver/gwc/rest/seed(/(?P<layer>[^/]+))?$",path)
+        if m:
+            return self.seed_status(m.group("layer"))
+
+        if path == "/geoserver/gwc/rest/layers":
+            return self.send_data(200,["{}:{}".format(w,f) for w,d,f in catalog.layers] if catalog.gwc else [])
+
+        m = re.match("^/geoserver/gwc/rest/layers/(?P<workspace>[^/:]+):(?P<layer>[^/]+)$",path)
+        if m:
+            if not catalog.gwc or not catalog.featuretype(m.group("workspace"),m.group("layer")):
+                return self.send_data(404,"Unknown layer: {}:{}".format(m.group("workspace"),m.group("layer")),"text/plain")
+            return self.send_data(200,{"GeoServerLayer":catalog.gwclayer(m.group("workspace"),m.group("layer"))})
+
+        m = re.match("^/geoserver/gwc/rest/gridsets/(?P<gridset>[^/]+)$",path)
+        if m:
+            data = GRIDSETS.get(m.group("gridset"))
+            return self.send_data(200,{"gridSet":data}) if data else self.not_found()
+
+        if path in ("/geoserver/ows","/geoserver/wfs","/geoserver/gwc/service/wmts") or path.endswith("/wms"):
+            request = params.get("request","").lower()
+            service = params.get("service","").lower()
+            if request == "getcapabilities":
+                if service == "wms":
+                    return self.send_data(200,catalog.wms_capabilities(),"application/xml")
+                elif service == "wfs":
+                    return self.send_data(200,catalog.wfs_capabilities(),"application/xml")
+                elif service == "wmts":
+                    return self.send_data(200,catalog.wmts_capabilities(),"application/xml")
+                else:
+                    return self.send_data(200,"""<?xml version="1.0" encoding="UTF-8"?><Capabilities/>""","application/xml")
+            elif request in ("getmap","gettile"):
+                f = params.get("format","image/png")
+                if request == "getmap":
+                    return self.send_data(200,image(f,int(params.get("width",1)),int(params.get("height",1))),f)
+                gridset = GRIDSETS.get(params.get("tilematrixset"))
+                return self.send_data(200,image(f,gridset["tileWidth"],gridset["tileHeight"]) if gridset else image(f),f)
+            elif request == "getfeature":
+                return self.send_data(200,{"type":"FeatureCollection","features":[],"totalFeatures":0,"numberMatched":0,"numberReturned":0})
+
+        return self.not_found()
+
+class StubGeoserver(object):
+    """
+    A local stub geoserver listening on 127.0.0.1 with a random port, used by the benchmarks.
+    handshake_delay: the seconds to delay when a new connection is accepted, used to simulate the tcp and tls handshake
+    latency: the seconds to delay when a request is received.
+    seed_rate: the tiles seeded by a simulated gwc seed task per second
+    etag: send the ETag of the rest responses and support the conditional GETs if True
+    """
+    def __init__(self,catalog=None,handshake_delay=0,latency=0,seed_rate=100000,etag=False):
+        self.server = ThreadingHTTPServer(("127.0.0.1",0),StubRequestHandler)
+        self.server.daemon_threads = True
+        self.server.catalog = catalog or StubCatalog()
+        self.server.handshake_delay = handshake_delay
+        self.server.latency = latency
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.seed_rate = seed_rate
+        self.server.etag = etag
+        self.server.seedtasks = {}
+        self.server.seedtaskid = 0
+        self.server.seedrequests = []
+        self._thread = None
+
+    @property
+    def geoserver_url(self):
+        return "http://127.0.0.1:{}/geoserver".format(self.server.server_address[1])
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    @property
+    def seedrequests(self):
+        return self.server.seedrequests
+
+    @property
+    def connections(self):
+        return self.server.connections
+
+    def reset(self):
+        with self.server.lock:
+            self.server.requests = 0
+            self.server.connections = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever,name="StubGeoserver",daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self,t,value,tb):
+        self.stop()
+        return False
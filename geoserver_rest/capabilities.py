@@ -0,0 +1,182 @@
+import logging
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+
+#the element of an advertised layer per service
+LAYER_ELEMENTS = {
+    "WMS": "Layer",
+    "WFS": "FeatureType",
+    "WMTS": "Layer",
+    "WCS": "CoverageSummary"
+}
+
+#the elements containing the name of an advertised layer per service
+NAME_ELEMENTS = {
+    "WMS": ("Name",),
+    "WFS": ("Name",),
+    "WMTS": ("Identifier",),
+    "WCS": ("CoverageId","Identifier")
+}
+
+CRS_ELEMENTS = ("CRS","SRS","DefaultCRS","DefaultSRS","OtherCRS","OtherSRS")
+
+def _localname(tag):
+    return tag.rsplit("}",1)[-1]
+
+class CapabilitiesLayer(object):
+    """
+    The metadata of an advertised layer
+    bbox: the wgs84 bounding box (minx,miny,maxx,maxy)
+    group: True if the layer contains nested layers, for example a wms layer group
+    """
+    __slots__ = ("name","title","bbox","crs","styles","formats","tilematrixsets","group")
+
+    def __init__(self):
+        self.name = None
+        self.title = None
+        self.bbox = None
+        self.crs = ()
+        self.styles = ()
+        self.formats = ()
+        self.tilematrixsets = ()
+        self.group = False
+
+    @property
+    def workspace(self):
+        return self.name.split(":",1)[0] if self.name and ":" in self.name else None
+
+    def to_dict(self):
+        return dict((k,getattr(self,k)) for k in self.__slots__)
+
+    def __repr__(self):
+        return "CapabilitiesLayer({})".format(self.name)
+
+class CapabilitiesIndex(object):
+    """
+    A compact index of the layers advertised by a GetCapabilities document.
+    The document is parsed incrementally from the chunks of the response, and the parsed layer elements are cleared immediately,
+    so the memory holds the compact index instead of the document or its DOM.
+    service: 'WMS','WFS','WMTS' or 'WCS'
+    size: the size of the document in bytes
+    formats: the service level output formats(WMS GetMap formats, WFS GetFeature output formats, WCS supported formats)
+    tilematrixsets: the tile matrix sets of the WMTS service
+    layers: dict(layer name,CapabilitiesLayer)
+    """
+    def __init__(self,service):
+        self.service = service.upper()
+        self.version = None
+        self.size = 0
+        self.formats = ()
+        self.tilematrixsets = ()
+        self.layers = {}
+
+    def __len__(self):
+        return len(self.layers)
+
+    def __contains__(self,name):
+        return name in self.layers
+
+    def __iter__(self):
+        return iter(self.layers.values())
+
+    def get_layer(self,workspace,layername=None):
+        """
+        Return the advertised layer, or None if not advertised.
+        workspace: the workspace, or the full layer name if layername is None
+        """
+        if layername is None:
+            return self.layers.get(workspace)
+        return self.layers.get("{}:{}".format(workspace,layername)) or self.layers.get("{}__{}".format(workspace,layername))
+
+    @staticmethod
+    def _read_layer(element,name_elements,localnames):
+        """
+        Read the layer from the direct children of the layer element
+        """
+        layer = CapabilitiesLayer()
+        for child in element:
+            name = localnames.get(child.tag) or localnames.setdefault(child.tag,_localname(child.tag))
+            text = child.text.strip() if child.text else None
+            if name in name_elements:
+                layer.name = text
+            elif name == "Title":
+                layer.title = text
+            elif name in CRS_ELEMENTS:
+                if text:
+                    layer.crs += (text,)
+            elif name == "Style":
+                for e in child:
+                    if _localname(e.tag) in ("Name","Identifier"):
+                        if e.text and e.text.strip():
+                            layer.styles += (e.text.strip(),)
+                        break
+            elif name == "Format":
+                if text:
+                    layer.formats += (text,)
+            elif name == "TileMatrixSetLink":
+                for e in child:
+                    if _localname(e.tag) == "TileMatrixSet" and e.text and e.text.strip():
+                        layer.tilematrixsets += (e.text.strip(),)
+            elif name == "Layer":
+                #the nested layer was already read and cleared
+                layer.group = True
+            elif layer.bbox:
+                continue
+            elif name in ("LatLonBoundingBox","LatLongBoundingBox"):
+                layer.bbox = tuple(float(child.get(k)) for k in ("minx","miny","maxx","maxy"))
+            elif name == "EX_GeographicBoundingBox":
+                values = dict((_localname(e.tag),float(e.text)) for e in child)
+                layer.bbox = (values["westBoundLongitude"],values["southBoundLatitude"],values["eastBoundLongitude"],values["northBoundLatitude"])
+            elif name == "WGS84BoundingBox":
+                values = dict((_localname(e.tag),[float(v) for v in e.text.split()]) for e in child)
+                layer.bbox = (*values["LowerCorner"],*values["UpperCorner"])
+        return layer
+
+    @classmethod
+    def parse(cls,service,chunks):
+        """
+        Parse the document from an iterable of bytes chunks.
+        A layer is read from its element when the element ends, and then the element is cleared;
+        only an empty element per layer is left in the tree.
+        """
+        index = cls(service)
+        parser = ET.XMLPullParser(events=("end",))
+        layer_element = LAYER_ELEMENTS[index.service]
+        name_elements = NAME_ELEMENTS[index.service]
+        #the cache of the local names of the tags
+        localnames = {}
+        formats = []
+        tilematrixsets = []
+        element = None
+        for chunk in chunks:
+            index.size += len(chunk)
+            parser.feed(chunk)
+            for event,element in parser.read_events():
+                name = localnames.get(element.tag) or localnames.setdefault(element.tag,_localname(element.tag))
+                if name == layer_element:
+                    layer = cls._read_layer(element,name_elements,localnames)
+                    if layer.name:
+                        index.layers[layer.name] = layer
+                elif name == "GetMap":
+                    formats.extend(e.text.strip() for e in element if _localname(e.tag) == "Format")
+                elif name == "Operation":
+                    if element.get("name") == "GetFeature":
+                        formats.extend(e.text.strip() for e in element.iter() if _localname(e.tag) == "Value" and e.text)
+                elif name == "formatSupported":
+                    formats.append(element.text.strip())
+                elif name == "TileMatrixSet" and len(element):
+                    #the tile matrix set in 'Contents', not the one in 'TileMatrixSetLink'
+                    tilematrixsets.extend(e.text.strip() for e in element if _localname(e.tag) == "Identifier")
+                else:
+                    #read with the parent element
+                    continue
+                element.clear()
+
+        parser.close()
+        if element is not None:
+            index.version = element.get("version")
+        index.formats = tuple(formats)
+        index.tilematrixsets = tuple(tilematrixsets)
+        logger.debug("{} capabilities : {} layers, {} bytes".format(index.service,len(index.layers),index.size))
+        return index
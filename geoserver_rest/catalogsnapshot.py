@@ -0,0 +1,442 @@
+import os
+import json
+import time
+import logging
+import threading
+import concurrent.futures
+
+from .exceptions import *
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class CatalogSnapshot(object):
+    """
+    An in-memory snapshot of the geoserver catalog, loaded in parallel and indexed by workspace, store, layer and gwc layer.
+    It provides the same read methods as Geoserver(list_xxx, get_xxx, has_xxx), and delegates all the other attributes to the geoserver,
+    so it can be passed to any consumer in place of the geoserver.
+    A read which can't be served from the snapshot falls back to the geoserver.
+
+    Refresh fails if a listing fails; a detail which failed to fetch is recorded in 'errors' and its reads fall back to the geoserver.
+
+    Refresh re-lists the catalog(cheap) and fetches the details of the new resources;
+    a fetched detail with an ETag or Last-Modified is revalidated by a conditional GET, and only fetched again if it was changed;
+    a fetched detail without validators is fetched again once it is older than max_age.
+
+    workspaces: {workspace: {"datastores":[],"wmsstores":[],"coveragestores":[],"layergroups":[]}}
+    stores: {(workspace,store): {"type":storetype,"data":detail,"validators":validators,"layers":[layer],"fetched":time}}
+    layers: {(workspace,layer): {"type":layertype,"store":store,"data":detail,"validators":validators,"styles":(defaultstyle,[styles]),"styles_validators":validators,"fetched":time}}
+    gwclayers: {(workspace,layer): {"data":detail,"validators":validators,"fetched":time}}
+    validators: {"etag":etag,"last_modified":last_modified} or None
+    """
+    FILE_VERSION = 1
+
+    #storetype: (listing key in workspace, list stores, get store, layertype, list layers, get layer)
+    STORETYPES = {
+        "datastore": ("datastores","list_datastores","get_datastore","featuretype","list_featuretypes","get_featuretype"),
+        "wmsstore": ("wmsstores","list_wmsstores","get_wmsstore","wmslayer","list_wmslayers","get_wmslayer"),
+        "coveragestore": ("coveragestores","list_coveragestores","get_coveragestore","coverage","list_coverages","get_coverage"),
+    }
+
+    def __init__(self,geoserver,dop=None,catalog=True,gwc=True):
+        """
+        catalog: include the workspaces, stores, layers and layergroups if True
+        gwc: include the gwc layers if True
+        """
+        self.geoserver = geoserver
+        self.dop = dop or settings.CATALOG_CRAWL_DOP
+        self.catalog = catalog
+        self.gwc = gwc
+        self.loadtime = None
+        self.workspaces = {}
+        self.stores = {}
+        self.layers = {}
+        self.gwclayers = {}
+        self.gwclayers_loaded = False
+        #the details failed to fetch in the last refresh: [(kind,workspace,name,message)]
+        self.errors = []
+        self._refreshlock = threading.Lock()
+
+    def __str__(self):
+        return str(self.geoserver)
+
+    def __getattr__(self,name):
+        #only called if the attribute is not found in the snapshot
+        if name == "geoserver":
+            raise AttributeError(name)
+        return getattr(self.geoserver,name)
+
+    @property
+    def loaded(self):
+        return self.loadtime is not None
+
+    def reset(self):
+        """
+        Clear the snapshot, all the reads fall back to the geoserver until the snapshot is refreshed again
+        """
+        with self._refreshlock:
+            self.workspaces = {}
+            self.stores = {}
+            self.layers = {}
+            self.gwclayers = {}
+            self.gwclayers_loaded = False
+            self.errors = []
+            self.loadtime = None
+
+    def refresh(self,max_age=None):
+        """
+        Load the snapshot if not loaded; otherwise refresh the snapshot incrementally.
+        max_age: the maximum age(seconds) of a fetched detail without validators before it is fetched again, default is settings.CATALOG_SNAPSHOT_MAX_AGE;
+            0 means fetching all details again
+        Return the number of the rest requests
+        """
+        max_age = settings.CATALOG_SNAPSHOT_MAX_AGE if max_age is None else max_age
+        with self._refreshlock:
+            return self._refresh(max_age)
+
+    def _fetch(self,validators,f,*args):
+        """
+        Fetch the detail with the conditional GET if validators is not None
+        Return (modified,detail,validators)
+        """
+        with self.geoserver.conditional(**(validators or {})) as result:
+            try:
+                return (True,f(*args),dict(result) if any(result.values()) else None)
+            except ResourceNotModified:
+                return (False,None,validators)
+
+    def _refresh(self,max_age):
+        now = time.time()
+        def _reusable(entry):
+            #the detail without validators which is not older than max_age
+            return entry is not None and entry["data"] is not None and not entry.get("validators") and max_age > 0 and now - entry["fetched"] < max_age
+
+        def _validators(entry):
+            return entry.get("validators") if entry is not None and entry["data"] is not None and max_age > 0 else None
+
+        workspaces = {}
+        stores = {}
+        layers = {}
+        gwclayers = {}
+        requests = 0
+        notmodified = 0
+        errors = []
+
+        self.geoserver.set_poolsize(self.dop)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.dop,thread_name_prefix="CatalogSnapshot")
+        pending = {}
+        def _submit(key,f,*args):
+            pending[executor.submit(f,*args)] = key
+
+        if self.catalog:
+            _submit(("workspaces",),self.geoserver.list_workspaces)
+        if self.gwc:
+            _submit(("gwclayers",),self.geoserver.list_gwclayers)
+        try:
+            while pending:
+                done,_ = concurrent.futures.wait(pending,return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    key = pending.pop(future)
+                    kind = key[0]
+                    requests += 1
+                    try:
+                        result = future.result()
+                    except Exception as ex:
+                        if kind in ("store","layer","styles","gwclayer"):
+                            if isinstance(ex,ResourceNotFound):
+                                #removed after listed
+                                logger.debug("{} : {}".format(self.geoserver,str(ex)))
+                            else:
+                                logger.warning("{} : Failed to fetch the {}({}:{}).{}".format(self.geoserver,kind,key[1],key[2],str(ex)))
+                                errors.append((kind,key[1],key[2],str(ex)))
+                            #the reader will fall back to the geoserver
+                            target = {"store":stores,"gwclayer":gwclayers}.get(kind,layers)[key[1:]]
+                            target["styles" if kind == "styles" else "data"] = None
+                            continue
+                        raise
+                    if kind in ("store","layer","styles","gwclayer"):
+                        modified,result,validators = result
+                        target = {"store":stores,"gwclayer":gwclayers}.get(kind,layers)[key[1:]]
+                        if not modified:
+                            notmodified += 1
+                        elif kind == "styles":
+                            target["styles"] = result
+                            target["styles_validators"] = validators
+                        else:
+                            target["data"] = result
+                            target["validators"] = validators
+                            target["fetched"] = now
+                    elif kind == "workspaces":
+                        for w in result:
+                            workspaces[w] = {}
+                            for storetype,(listing,f_liststores,_,_,_,_) in self.STORETYPES.items():
+                                _submit(("stores",w,storetype),getattr(self.geoserver,f_liststores),w)
+                            _submit(("layergroups",w),self.geoserver.list_layergroups,w)
+                    elif kind == "stores":
+                        w,storetype = key[1:]
+                        listing,_,f_getstore,layertype,f_listlayers,_ = self.STORETYPES[storetype]
+                        workspaces[w][listing] = result
+                        for s in result:
+                            entry = self.stores.get((w,s))
+                            if entry is not None and entry["type"] != storetype:
+                                entry = None
+                            if _reusable(entry):
+                                stores[(w,s)] = dict(entry,layers=[])
+                            else:
+                                validators = _validators(entry)
+                                stores[(w,s)] = dict(entry,layers=[]) if validators else {"type":storetype,"data":None,"layers":[],"fetched":now}
+                                _submit(("store",w,s),self._fetch,validators,getattr(self.geoserver,f_getstore),w,s)
+                            _submit(("storelayers",w,s),getattr(self.geoserver,f_listlayers),w,s)
+                    elif kind == "storelayers":
+                        w,s = key[1:]
+                        store = stores[(w,s)]
+                        store["layers"] = result
+                        layertype = self.STORETYPES[store["type"]][3]
+                        f_getlayer = getattr(self.geoserver,self.STORETYPES[store["type"]][5])
+                        for l in result:
+                            entry = self.layers.get((w,l))
+                            if entry is not None and (entry["type"] != layertype or entry["store"] != s):
+                                entry = None
+                            if _reusable(entry):
+                                layers[(w,l)] = dict(entry)
+                            else:
+                                validators = _validators(entry)
+                                layers[(w,l)] = dict(entry) if validators else {"type":layertype,"store":s,"data":None,"fetched":now}
+                                _submit(("layer",w,l),self._fetch,validators,f_getlayer,w,l,s)
+                                if layertype == "featuretype":
+                                    _submit(("styles",w,l),self._fetch,entry.get("styles_validators") if validators and entry.get("styles") is not None else None,self.geoserver.get_featuretype_styles,w,l)
+                    elif kind == "layergroups":
+                        w = key[1]
+                        workspaces[w]["layergroups"] = result
+                        for g in result:
+                            entry = self.layers.get((w,g))
+                            if entry is not None and entry["type"] != "layergroup":
+                                entry = None
+                            if _reusable(entry):
+                                layers[(w,g)] = dict(entry)
+                            else:
+                                validators = _validators(entry)
+                                layers[(w,g)] = dict(entry) if validators else {"type":"layergroup","store":None,"data":None,"fetched":now}
+                                _submit(("layer",w,g),self._fetch,validators,self.geoserver.get_layergroup,w,g)
+                    elif kind == "gwclayers":
+                        for w,l in result:
+                            entry = self.gwclayers.get((w,l))
+                            if _reusable(entry):
+                                gwclayers[(w,l)] = dict(entry)
+                            else:
+                                validators = _validators(entry)
+                                gwclayers[(w,l)] = dict(entry) if validators else {"data":None,"fetched":now}
+                                _submit(("gwclayer",w,l),self._fetch,validators,self.geoserver.get_gwclayer,w,l)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        if self.catalog:
+            self.workspaces = workspaces
+            self.stores = stores
+            self.layers = layers
+        if self.gwc:
+            self.gwclayers = gwclayers
+            self.gwclayers_loaded = True
+        self.errors = errors
+        self.loadtime = now
+        logger.debug("{} : The catalog snapshot is refreshed with {} requests({} not modified, {} failed), workspaces={}, stores={}, layers={}, gwclayers={}".format(
+            self.geoserver,requests,notmodified,len(errors),len(self.workspaces),len(self.stores),len(self.layers),len(self.gwclayers)
+        ))
+        return requests
+
+    def save(self,path):
+        """
+        Save the snapshot to a json file
+        """
+        data = {
+            "version": self.FILE_VERSION,
+            "geoserver_url": self.geoserver.geoserver_url,
+            "loadtime": self.loadtime,
+            "catalog": self.catalog,
+            "gwc": self.gwc,
+            "workspaces": self.workspaces,
+            "stores": [[k[0],k[1],v] for k,v in self.stores.items()],
+            "layers": [[k[0],k[1],v] for k,v in self.layers.items()],
+            "gwclayers": [[k[0],k[1],v] for k,v in self.gwclayers.items()] if self.gwclayers_loaded else None
+        }
+        tmpfile = "{}.tmp".format(path)
+        with open(tmpfile,'w') as f:
+            f.write(json.dumps(data))
+        os.replace(tmpfile,path)
+
+    def load(self,path):
+        """
+        Load the snapshot saved by 'save', the snapshot is not changed if the file doesn't exist or can't be used.
+        Return True if loaded
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path,'r') as f:
+                data = json.loads(f.read())
+            if data.get("version") != self.FILE_VERSION:
+                logger.info("The version of the catalog snapshot file({}) is not supported, ignore it.".format(path))
+                return False
+            elif data.get("geoserver_url") != self.geoserver.geoserver_url:
+                logger.info("The catalog snapshot file({}) belongs to another geoserver({}), ignore it.".format(path,data.get("geoserver_url")))
+                return False
+            for w,l,v in data["layers"]:
+                if v.get("styles"):
+                    v["styles"] = tuple(v["styles"])
+            with self._refreshlock:
+                if self.catalog and data["catalog"]:
+                    self.workspaces = data["workspaces"]
+                    self.stores = dict(((w,s),v) for w,s,v in data["stores"])
+                    self.layers = dict(((w,l),v) for w,l,v in data["layers"])
+                if self.gwc and data["gwclayers"] is not None:
+                    self.gwclayers = dict(((w,l),v) for w,l,v in data["gwclayers"])
+                    self.gwclayers_loaded = True
+                self.loadtime = data["loadtime"]
+            return True
+        except Exception as ex:
+            logger.error("Failed to load the catalog snapshot file({}).{}".format(path,str(ex)))
+            return False
+
+    def _get_store(self,workspace,storename,storetype):
+        store = self.stores.get((workspace,storename))
+        if store and store["type"] == storetype and store["data"] is not None:
+            return store
+        return None
+
+    def _get_layer(self,workspace,layername,layertype,storename=None):
+        layer = self.layers.get((workspace,layername))
+        if layer and layer["type"] == layertype and layer["data"] is not None and (not storename or layer["store"] == storename):
+            return layer
+        return None
+
+    def _list_layers(self,workspace,storename,storetype,f_list):
+        if workspace not in self.workspaces:
+            return f_list(workspace,storename)
+        if storename:
+            store = self.stores.get((workspace,storename))
+            if not store or store["type"] != storetype:
+                return f_list(workspace,storename)
+            return list(store["layers"])
+        else:
+            return [l for s in self.workspaces[workspace].get(self.STORETYPES[storetype][0]) or [] for l in self.stores[(workspace,s)]["layers"]]
+
+    #workspace
+    def list_workspaces(self):
+        if not self.loaded or not self.catalog:
+            return self.geoserver.list_workspaces()
+        return list(self.workspaces.keys())
+
+    def has_workspace(self,workspace):
+        if workspace in self.workspaces:
+            return True
+        return self.geoserver.has_workspace(workspace)
+
+    #datastore
+    def list_datastores(self,workspace):
+        if workspace not in self.workspaces:
+            return self.geoserver.list_datastores(workspace)
+        return list(self.workspaces[workspace].get("datastores") or [])
+
+    def get_datastore(self,workspace,storename):
+        store = self._get_store(workspace,storename,"datastore")
+        return store["data"] if store else self.geoserver.get_datastore(workspace,storename)
+
+    def has_datastore(self,workspace,storename):
+        return True if self._get_store(workspace,storename,"datastore") else self.geoserver.has_datastore(workspace,storename)
+
+    #wmsstore
+    def list_wmsstores(self,workspace):
+        if workspace not in self.workspaces:
+            return self.geoserver.list_wmsstores(workspace)
+        return list(self.workspaces[workspace].get("wmsstores") or [])
+
+    def get_wmsstore(self,workspace,storename):
+        store = self._get_store(workspace,storename,"wmsstore")
+        return store["data"] if store else self.geoserver.get_wmsstore(workspace,storename)
+
+    def has_wmsstore(self,workspace,storename):
+        return True if self._get_store(workspace,storename,"wmsstore") else self.geoserver.has_wmsstore(workspace,storename)
+
+    #coveragestore
+    def list_coveragestores(self,workspace):
+        if workspace not in self.workspaces:
+            return self.geoserver.list_coveragestores(workspace)
+        return list(self.workspaces[workspace].get("coveragestores") or [])
+
+    def get_coveragestore(self,workspace,storename):
+        store = self._get_store(workspace,storename,"coveragestore")
+        return store["data"] if store else self.geoserver.get_coveragestore(workspace,storename)
+
+    def has_coveragestore(self,workspace,storename):
+        return True if self._get_store(workspace,storename,"coveragestore") else self.geoserver.has_coveragestore(workspace,storename)
+
+    #featuretype
+    def list_featuretypes(self,workspace,storename=None):
+        return self._list_layers(workspace,storename,"datastore",self.geoserver.list_featuretypes)
+
+    def get_featuretype(self,workspace,layername,storename=None):
+        layer = self._get_layer(workspace,layername,"featuretype",storename)
+        return layer["data"] if layer else self.geoserver.get_featuretype(workspace,layername,storename=storename)
+
+    def has_featuretype(self,workspace,layername,storename=None):
+        return True if self._get_layer(workspace,layername,"featuretype",storename) else self.geoserver.has_featuretype(workspace,layername,storename=storename)
+
+    def get_featuretype_styles(self,workspace,layername):
+        layer = self._get_layer(workspace,layername,"featuretype")
+        if layer and layer.get("styles") is not None:
+            return layer["styles"]
+        return self.geoserver.get_featuretype_styles(workspace,layername)
+
+    #wmslayer
+    def list_wmslayers(self,workspace,storename):
+        return self._list_layers(workspace,storename,"wmsstore",self.geoserver.list_wmslayers)
+
+    def get_wmslayer(self,workspace,layername,storename=None):
+        layer = self._get_layer(workspace,layername,"wmslayer",storename)
+        return layer["data"] if layer else self.geoserver.get_wmslayer(workspace,layername,storename=storename)
+
+    def has_wmslayer(self,workspace,layername,storename=None):
+        return True if self._get_layer(workspace,layername,"wmslayer",storename) else self.geoserver.has_wmslayer(workspace,layername,storename=storename)
+
+    #coverage
+    def list_coverages(self,workspace,storename):
+        return self._list_layers(workspace,storename,"coveragestore",self.geoserver.list_coverages)
+
+    def get_coverage(self,workspace,layername,storename=None):
+        layer = self._get_layer(workspace,layername,"coverage",storename)
+        return layer["data"] if layer else self.geoserver.get_coverage(workspace,layername,storename=storename)
+
+    def has_coverage(self,workspace,layername,storename=None):
+        return True if self._get_layer(workspace,layername,"coverage",storename) else self.geoserver.has_coverage(workspace,layername,storename=storename)
+
+    #layergroup
+    def list_layergroups(self,workspace):
+        if workspace not in self.workspaces:
+            return self.geoserver.list_layergroups(workspace)
+        return list(self.workspaces[workspace].get("layergroups") or [])
+
+    def get_layergroup(self,workspace,groupname):
+        layer = self._get_layer(workspace,groupname,"layergroup")
+        return layer["data"] if layer else self.geoserver.get_layergroup(workspace,groupname)
+
+    def has_layergroup(self,workspace,groupname):
+        return True if self._get_layer(workspace,groupname,"layergroup") else self.geoserver.has_layergroup(workspace,groupname)
+
+    #gwc
+    def list_gwclayers(self,workspace=None):
+        if not self.gwclayers_loaded:
+            return self.geoserver.list_gwclayers(workspace=workspace)
+        return [[w,l] for w,l in self.gwclayers.keys() if not workspace or w == workspace]
+
+    def get_gwclayer(self,workspace,layername):
+        layer = self.gwclayers.get((workspace,layername))
+        if layer and layer["data"] is not None:
+            return layer["data"]
+        return self.geoserver.get_gwclayer(workspace,layername)
+
+    def has_gwclayer(self,workspace,layername):
+        if self.gwclayers_loaded:
+            return (workspace,layername) in self.gwclayers
+        return self.geoserver.has_gwclayer(workspace,layername)
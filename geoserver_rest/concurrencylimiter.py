@@ -0,0 +1,142 @@
+import threading
+import logging
+import urllib.parse
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT_CLASSES = ("rest","wms","wmts","wfs")
+
+def endpoint_class(url):
+    """
+    Return the endpoint class of the url: 'rest','wms','wmts' or 'wfs'
+    """
+    parsed = urllib.parse.urlparse(url)
+    path = parsed.path.lower()
+    query = parsed.query.lower()
+    if "/gwc/service/wmts" in path or "service=wmts" in query:
+        return "wmts"
+    elif "service=wfs" in query or path.endswith("/wfs"):
+        return "wfs"
+    elif "service=wms" in query or path.endswith("/wms"):
+        return "wms"
+    else:
+        return "rest"
+
+class AIMDLimiter(object):
+    """
+    Limit the in-flight requests with additive increase and multiplicative decrease.
+    The limit grows by 1 after a window of requests whose p95 latency and error rate are healthy and which actually used the whole limit;
+    the limit is multiplied by 'backoff' when a request timed out or failed with 5xx.
+    Only the overloads of the requests sent after the last decrease can decrease the limit again,
+    so a burst of failures from the same batch of in-flight requests decreases the limit only once.
+    """
+    def __init__(self,name,initial=None,maximum=None,target_latency=None,max_error_rate=None,backoff=None,window=None):
+        """
+        target_latency: the healthy p95 latency in seconds
+        max_error_rate: the healthy error rate
+        window: the number of the requests to evaluate before increasing the limit
+        """
+        self.name = name
+        self.maximum = maximum or settings.HTTP_CONCURRENCY_MAX.get(name) or 8
+        self.limit = float(min(self.maximum,initial or settings.HTTP_CONCURRENCY_INITIAL.get(name) or 1))
+        self.target_latency = target_latency or settings.HTTP_CONCURRENCY_TARGET_LATENCY.get(name) or 5
+        self.max_error_rate = settings.HTTP_CONCURRENCY_MAX_ERROR_RATE if max_error_rate is None else max_error_rate
+        self.backoff = backoff or settings.HTTP_CONCURRENCY_BACKOFF
+        self.window = window or settings.HTTP_CONCURRENCY_WINDOW
+        self.inflight = 0
+        self._cond = threading.Condition()
+        #increased by each decrease
+        self._epoch = 0
+        self._latencies = []
+        self._errors = 0
+        self._saturated = False
+        self.increases = 0
+        self.decreases = 0
+        self.peak_limit = int(self.limit)
+
+    def acquire(self):
+        """
+        Wait until an in-flight slot is available, return a token which should be passed to release
+        """
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+            if self.inflight >= int(self.limit):
+                self._saturated = True
+            return self._epoch
+
+    def release(self,token,latency,overload=False,error=False):
+        """
+        token: the token returned by acquire
+        latency: the latency of the request in seconds
+        overload: True if the request timed out or failed with 5xx
+        error: True if the request failed for other reasons, counted in the error rate only
+        """
+        with self._cond:
+            self.inflight -= 1
+            if overload:
+                self._errors += 1
+                if token == self._epoch:
+                    self._epoch += 1
+                    self.limit = max(1.0,self.limit * self.backoff)
+                    self.decreases += 1
+                    self._reset_window()
+                    logger.info("{} : Decrease the concurrency limit to {}".format(self.name,int(self.limit)))
+            else:
+                if error:
+                    self._errors += 1
+                self._latencies.append(latency)
+                if len(self._latencies) >= self.window:
+                    self._evaluate()
+            self._cond.notify_all()
+
+    def _evaluate(self):
+        latencies = sorted(self._latencies)
+        p95 = latencies[min(len(latencies) - 1,int(len(latencies) * 0.95))]
+        error_rate = self._errors / (len(latencies) + self._errors)
+        if self._saturated and p95 <= self.target_latency and error_rate <= self.max_error_rate and self.limit < self.maximum:
+            self.limit = min(self.maximum,self.limit + 1)
+            self.peak_limit = max(self.peak_limit,int(self.limit))
+            self.increases += 1
+            logger.debug("{} : Increase the concurrency limit to {}, p95 latency={:.3f}".format(self.name,int(self.limit),p95))
+        self._reset_window()
+
+    def _reset_window(self):
+        self._latencies.clear()
+        self._errors = 0
+        self._saturated = self.inflight >= int(self.limit)
+
+    def stats(self):
+        return {
+            "limit": int(self.limit),
+            "peak_limit": self.peak_limit,
+            "inflight": self.inflight,
+            "increases": self.increases,
+            "decreases": self.decreases
+        }
+
+class AdaptiveConcurrency(object):
+    """
+    The AIMD limiters of the endpoint classes('rest','wms','wmts','wfs') of one geoserver
+    """
+    def __init__(self,**kwargs):
+        """
+        kwargs: the keyword arguments passed to all the AIMDLimiters
+        """
+        self.limiters = dict((c,AIMDLimiter(c,**kwargs)) for c in ENDPOINT_CLASSES)
+
+    @property
+    def max_concurrency(self):
+        """
+        The maximum in-flight requests of one endpoint class
+        """
+        return max(l.maximum for l in self.limiters.values())
+
+    def limiter(self,url):
+        return self.limiters[endpoint_class(url)]
+
+    def stats(self):
+        return dict((c,l.stats()) for c,l in self.limiters.items())
@@ -0,0 +1,77 @@
+import math
+import logging
+
+from pyproj import Transformer
+
+from .singleflight import LoadingCache
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+#shared by all the threads, keyed by (source crs,target crs); a pyproj transformer can be used by multiple threads
+_transformers = LoadingCache(maxsize=settings.TRANSFORMER_CACHE_SIZE)
+
+def _normalize(crs):
+    return crs.upper() if isinstance(crs,str) else crs
+
+def _create_transformer(src,dst):
+    logger.debug("Create the transformer from {} to {}".format(src,dst))
+    return Transformer.from_crs(src,dst,always_xy=True)
+
+def get_transformer(src,dst):
+    """
+    Return the cached transformer from the src crs to the dst crs, the coordinates are always in x/y(lon/lat) order
+    """
+    src = _normalize(src)
+    dst = _normalize(dst)
+    return _transformers.get((src,dst),_create_transformer,src,dst)
+
+def _edge_points(bbox,densify):
+    """
+    Return the points along the edges of the bbox, including the corners; 4 * (densify + 1) points
+    """
+    minx,miny,maxx,maxy = [float(c) for c in bbox]
+    steps = densify + 1
+    for i in range(steps):
+        yield (minx + (maxx - minx) * i / steps,miny)
+        yield (maxx,miny + (maxy - miny) * i / steps)
+        yield (maxx - (maxx - minx) * i / steps,maxy)
+        yield (minx,maxy - (maxy - miny) * i / steps)
+
+def transform_bboxes(src,dst,bboxes,densify=None):
+    """
+    Transform the bboxes(minx,miny,maxx,maxy) from the src crs to the dst crs.
+    The edges of each bbox are densified, and the points of all the bboxes are transformed in one call,
+    so the curved edges in the dst crs are covered; the points which can't be transformed are ignored.
+    Return the list of the transformed bboxes
+    """
+    bboxes = list(bboxes)
+    if _normalize(src) == _normalize(dst):
+        return [[float(c) for c in bbox] for bbox in bboxes]
+    densify = settings.BBOX_DENSIFY_POINTS if densify is None else densify
+    points = 4 * (densify + 1)
+    xs = []
+    ys = []
+    for bbox in bboxes:
+        for x,y in _edge_points(bbox,densify):
+            xs.append(x)
+            ys.append(y)
+    if not xs:
+        return []
+
+    xs,ys = get_transformer(src,dst).transform(xs,ys,errcheck=False)
+    result = []
+    for i in range(0,len(xs),points):
+        bbox_points = [(x,y) for x,y in zip(xs[i:i + points],ys[i:i + points]) if math.isfinite(x) and math.isfinite(y)]
+        if not bbox_points:
+            raise Exception("Failed to transform the bbox({}) from {} to {}".format(bboxes[i // points],src,dst))
+        bbox_xs = [p[0] for p in bbox_points]
+        bbox_ys = [p[1] for p in bbox_points]
+        result.append([min(bbox_xs),min(bbox_ys),max(bbox_xs),max(bbox_ys)])
+    return result
+
+def transform_bbox(src,dst,bbox,densify=None):
+    """
+    Transform the bbox(minx,miny,maxx,maxy) from the src crs to the dst crs, see transform_bboxes
+    """
+    return transform_bboxes(src,dst,[bbox],densify=densify)[0]
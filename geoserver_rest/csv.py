@@ -1,4 +1,12 @@
 import csv 
+import time
+import queue
+import logging
+import threading
+
+from . import settings
+
+logger = logging.getLogger(__name__)
 
 class CSVWriter(object):
     def __init__(self,file,header=None):
@@ -26,6 +34,10 @@ class CSVWriter(object):
         self.records += 1
         self.writer.writerow(row)
 
+    def flush(self):
+        if self.file_output:
+            self.file_output.flush()
+
     def close(self):
         try:
             if self.file_output:
@@ -41,3 +53,141 @@ class CSVWriter(object):
     def __exit__(self,t,value,tb):
         self.close()
         return False if value else True
+
+class QueuedCSVWriter(object):
+    """
+    A writer whose rows are written by a CSVWriterThread
+    writer: the underlying writer, a CSVWriter or any writer with the methods 'writerows','flush' and 'close'
+    callback: called with the rows by the writer thread after the rows are written
+    """
+    def __init__(self,writerthread,writer,callback=None):
+        self.writerthread = writerthread
+        self.writer = writer
+        self.callback = callback
+
+    @property
+    def file(self):
+        return self.writer.file
+
+    @property
+    def records(self):
+        return self.writer.records
+
+    def writerows(self,rows):
+        """
+        Push the rows to the queue of the writer thread, block if the queue is full
+        """
+        self.writerthread.put(self,list(rows) if rows else [])
+
+    def writerow(self,row):
+        self.writerows([row] if row is not None else [])
+
+    def close(self):
+        self.writerthread.flush()
+        self.writer.close()
+
+class CSVWriterThread(threading.Thread):
+    """
+    A dedicated thread to write the rows of the csv files, so the producers never wait for each other on the csv formatting and the file io.
+    The rows are pushed into a bounded queue, and the producers are blocked if the queue is full.
+    The files are flushed when 'batchsize' rows are written or every 'flush_interval' seconds.
+    """
+    def __init__(self,name="CSVWriterThread",queuesize=None,batchsize=None,flush_interval=None):
+        super().__init__(name=name,daemon=True)
+        self.queue = queue.Queue(maxsize=queuesize or settings.REPORT_WRITER_QUEUESIZE)
+        self.batchsize = batchsize or settings.REPORT_WRITER_BATCHSIZE
+        self.flush_interval = flush_interval or settings.REPORT_WRITER_FLUSH_INTERVAL
+        self.writers = []
+        self.exception = None
+
+    def open(self,file,header=None,callback=None):
+        """
+        Return a QueuedCSVWriter whose rows are written to the csv file by this thread
+        """
+        return self.add(CSVWriter(file,header=header),callback=callback)
+
+    def add(self,writer,callback=None):
+        """
+        Return a QueuedCSVWriter whose rows are written by this thread with the writer
+        """
+        writer = QueuedCSVWriter(self,writer,callback=callback)
+        self.writers.append(writer)
+        return writer
+
+    def put(self,writer,rows):
+        if not self.is_alive():
+            raise Exception("The csv writer thread({}) is not running".format(self.name))
+        self.queue.put((writer,rows))
+
+    def flush(self):
+        """
+        Wait until all the pushed rows are written
+        """
+        if self.is_alive():
+            self.queue.join()
+
+    def _flush(self,writers):
+        for writer in writers:
+            try:
+                writer.writer.flush()
+            except Exception as ex:
+                logger.error("Failed to flush the file({}).{}".format(writer.file,str(ex)))
+        writers.clear()
+
+    def run(self):
+        #the writers which have unflushed rows
+        pending = set()
+        rows_unflushed = 0
+        lastflush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush(pending)
+                rows_unflushed = 0
+                lastflush = time.monotonic()
+                continue
+
+            try:
+                if item is None:
+                    #closed
+                    self._flush(pending)
+                    break
+                writer,rows = item
+                try:
+                    writer.writer.writerows(rows)
+                    if writer.callback:
+                        writer.callback(rows)
+                except Exception as ex:
+                    #keep draining the queue, otherwise the producers are blocked forever
+                    logger.error("Failed to write the rows to the file({}).{}".format(writer.file,str(ex)))
+                    self.exception = ex
+                pending.add(writer)
+                rows_unflushed += len(rows)
+                if rows_unflushed >= self.batchsize or time.monotonic() - lastflush >= self.flush_interval:
+                    self._flush(pending)
+                    rows_unflushed = 0
+                    lastflush = time.monotonic()
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        """
+        Write all the pushed rows, stop the thread and close the opened files
+        """
+        if self.is_alive():
+            self.queue.put(None)
+            self.join()
+        for writer in self.writers:
+            writer.writer.close()
+        self.writers.clear()
+        if self.exception:
+            raise self.exception
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self,t,value,tb):
+        self.close()
+        return False
@@ -17,9 +17,17 @@ class ResourceNotFound(requests.RequestException):
         msg = "Resource({0}) Not Found".format(response.request.url)
         super().__init__(msg,response=response)
 
+class ResourceNotModified(requests.RequestException):
+    def __init__(self,response):
+        msg = "Resource({0}) Not Modified".format(response.request.url)
+        super().__init__(msg,response=response)
+
 class GetMapFailed(requests.RequestException):
     def __init__(self,msg,response):
         super().__init__(msg,response=response)
 
 class ObjectNotFound(Exception):
     pass
+
+class InvalidImage(Exception):
+    pass
@@ -1,12 +1,23 @@
 import logging
 import collections
+import concurrent.futures
+import contextlib
 import os
 import string
+import threading
+import time
 import requests
+import requests.adapters
 import urllib.parse
 
 from .mixins import *
 from .exceptions import *
+from .responsecache import ResponseCache
+from .singleflight import SingleFlight
+from .retrypolicy import RetryPolicy
+from .concurrencylimiter import AdaptiveConcurrency
+from .metrics import RequestMetrics
+from .capabilities import CapabilitiesIndex
 from . import settings
 
 logger = logging.getLogger(__name__)
@@ -93,7 +104,17 @@ class GeoserverUtils(object):
                 raise ex.__class__(msg,response=res)
 
 class Geoserver(WMSServiceMixin,AboutMixin,DatastoreMixin,FeaturetypeMixin,GWCMixin,LayergroupMixin,ReloadMixin,SecurityMixin,StyleMixin,WMSLayerMixin,WMSStoreMixin,WorkspaceMixin,UsergroupMixin,CoverageStoreMixin,CoverageMixin,RolesMixin,GeoserverUtils):
-    def __init__(self,geoserver_url,username,password,headers=None,ssl_verify=True):
+    def __init__(self,geoserver_url,username,password,headers=None,ssl_verify=True,poolsize=None,keepalive=settings.HTTP_KEEPALIVE,cache=settings.HTTP_CACHE,singleflight=settings.HTTP_SINGLEFLIGHT,retrypolicy=None,concurrency=settings.HTTP_ADAPTIVE_CONCURRENCY,metrics=None):
+        """
+        poolsize: the maximum connections to the geoserver, default is settings.HTTP_POOL_MAXSIZE or settings.HTTP_POOL_DEFAULT_SIZE;
+            the requests block when all the connections are in use, so a caller sending more concurrent requests should enlarge the pool with 'set_poolsize'
+        keepalive: reuse the connections through a pooled session if True; otherwise create a new connection for each request
+        cache: cache the GET responses of the rest apis if True or a ResponseCache instance; the cached responses are invalidated by the writes through this client
+        singleflight: the concurrent identical GETs share one in-flight request if True
+        retrypolicy: the policy to retry the failed requests, a RetryPolicy with the default settings is used if None
+        concurrency: limit the in-flight requests per endpoint class adaptively if True or an AdaptiveConcurrency instance
+        metrics: the RequestMetrics to record the requests, a new RequestMetrics is used if None
+        """
         assert geoserver_url,"Geoserver URL is not configured"
         assert username,"Geoserver user is not configured"
         assert password,"Geoserver user password is not configured"
@@ -102,23 +123,283 @@ class Geoserver(WMSServiceMixin,AboutMixin,DatastoreMixin,FeaturetypeMixin,GWCMi
         self.password = password
         self.headers = headers
         self.ssl_verify = ssl_verify
-
+        self.keepalive = keepalive
+        self.poolsize = poolsize or settings.HTTP_POOL_MAXSIZE or settings.HTTP_POOL_DEFAULT_SIZE
+        self._session = None
+        self._sessionlock = threading.Lock()
+        #the validators of the conditional GETs sent by the current thread, see 'conditional'
+        self._conditional = threading.local()
+        if isinstance(cache,ResponseCache):
+            self.cache = cache
+        else:
+            self.cache = ResponseCache() if cache else None
+        self.singleflight = SingleFlight() if singleflight else None
+        self.retrypolicy = retrypolicy or RetryPolicy()
+        if isinstance(concurrency,AdaptiveConcurrency):
+            self.concurrency = concurrency
+        else:
+            self.concurrency = AdaptiveConcurrency() if concurrency else None
+        self.metrics = metrics or RequestMetrics()
 
     def __str__(self):
         return self.geoserver_url
 
+    def __enter__(self):
+        return self
 
-    def get(self,url,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
-        logger.debug("GET {}".format(url))
+    def __exit__(self,t,value,tb):
+        self.close()
+        return False
+
+    @property
+    def session(self):
+        """
+        Return the pooled session shared by all threads, create it if doesn't exist.
+        The connection pool blocks when all the connections to a host are in use, so the connections to a host never exceed the poolsize
+        """
+        session = self._session
+        if session is None:
+            with self._sessionlock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=settings.HTTP_POOL_CONNECTIONS,pool_maxsize=self.poolsize,pool_block=True)
+                    session.mount("http://",adapter)
+                    session.mount("https://",adapter)
+                    self._session = session
+                    logger.debug("{} : Create a pooled session, poolsize={}".format(self.geoserver_url,self.poolsize))
+                else:
+                    session = self._session
+        return session
+
+    def set_poolsize(self,poolsize):
+        """
+        Enlarge the connection pool to poolsize if the current pool is smaller.
+        The existing session is closed and a new one will be created on the next request
+        """
+        if settings.HTTP_POOL_MAXSIZE or not poolsize or poolsize <= self.poolsize:
+            return
+        with self._sessionlock:
+            self.poolsize = poolsize
+            session = self._session
+            self._session = None
+        if session:
+            session.close()
+
+    def close(self):
+        """
+        Close the pooled session and release all the connections.
+        A new session will be created if any request is sent after closing
+        """
+        with self._sessionlock:
+            session = self._session
+            self._session = None
+        if session:
+            session.close()
+            logger.debug("{} : The pooled session was closed".format(self.geoserver_url))
+
+    def _request(self,method,url,headers=None,timeout=settings.REQUEST_TIMEOUT,error_handler=None,**kwargs):
         if self.headers:
             if headers:
                 headers = collections.ChainMap(headers,self.headers)
             else:
                 headers = self.headers
-        res = requests.get(url , headers=headers, auth=(self.username,self.password),timeout=timeout,verify=self.ssl_verify)
-        (error_handler or self._handle_response_error)(res)
+        limiter = self.concurrency.limiter(url) if self.concurrency else None
+        data = kwargs.get("data")
+        bytes_out = len(data) if isinstance(data,(bytes,str)) else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            self.retrypolicy.requested()
+            if limiter:
+                token = limiter.acquire()
+            starttime = time.time()
+            try:
+                if self.keepalive:
+                    res = self.session.request(method,url,headers=headers,auth=(self.username,self.password),timeout=timeout,verify=self.ssl_verify,**kwargs)
+                else:
+                    res = requests.request(method,url,headers=headers,auth=(self.username,self.password),timeout=timeout,verify=self.ssl_verify,**kwargs)
+            except requests.RequestException as ex:
+                latency = time.time() - starttime
+                if limiter:
+                    limiter.release(token,latency,overload=isinstance(ex,(requests.Timeout,requests.ConnectionError)),error=True)
+                self.metrics.record(method,url,ex.__class__.__name__,latency,bytes_out=bytes_out)
+                delay = self.retrypolicy.retry(method,self.retrypolicy.classify(ex=ex),attempt)
+                if delay is None:
+                    raise
+                self.metrics.retried(url)
+                logger.info("{} {} failed, retry in {:.2f} seconds.{}".format(method,url,delay,str(ex)))
+                time.sleep(delay)
+                continue
+            except Exception as ex:
+                latency = time.time() - starttime
+                if limiter:
+                    limiter.release(token,latency,error=True)
+                self.metrics.record(method,url,ex.__class__.__name__,latency,bytes_out=bytes_out)
+                raise
+
+            latency = time.time() - starttime
+            delay = self.retrypolicy.retry(method,self.retrypolicy.classify(res=res),attempt)
+            if delay is None and kwargs.get("stream"):
+                #the body of the streamed response is not read yet, release the limiter and record the metrics when it is closed
+                self._finish_on_close(res,method,url,limiter,token if limiter else None,starttime,bytes_out)
+                break
+            if limiter:
+                limiter.release(token,latency,overload=res.status_code >= 500)
+            self.metrics.record(method,url,res.status_code,latency,bytes_in=int(res.headers.get("Content-Length") or 0) if kwargs.get("stream") else len(res.content),bytes_out=bytes_out)
+            if delay is None:
+                break
+            self.metrics.retried(url)
+            logger.info("{} {} failed with status code {}, retry in {:.2f} seconds.".format(method,url,res.status_code,delay))
+            res.close()
+            time.sleep(delay)
+
+        try:
+            (error_handler or self._handle_response_error)(res)
+        except:
+            if kwargs.get("stream"):
+                res.close()
+            raise
+        return res
+
+    def _finish_on_close(self,res,method,url,limiter,token,starttime,bytes_out):
+        """
+        Release the limiter and record the metrics of the streamed response when it is closed, after its body is consumed;
+        the latency includes the time to read the body, and the received bytes are the bytes actually read through iter_content.
+        Set 'readerror' of the response to the exception before closing it if the body failed to read
+        """
+        f_close = res.close
+        f_iter_content = res.iter_content
+        bytes_in = [0]
+        def _iter_content(*args,**kwargs):
+            for data in f_iter_content(*args,**kwargs):
+                bytes_in[0] += len(data)
+                yield data
+
+        def _close():
+            res.close = f_close
+            latency = time.time() - starttime
+            error = getattr(res,"readerror",None)
+            if limiter:
+                limiter.release(token,latency,overload=res.status_code >= 500 or isinstance(error,(requests.Timeout,requests.ConnectionError)),error=error is not None)
+            self.metrics.record(method,url,error.__class__.__name__ if error else res.status_code,latency,bytes_in=bytes_in[0],bytes_out=bytes_out)
+            f_close()
+
+        res.iter_content = _iter_content
+        res.close = _close
+
+    def get_streamed(self,url,f_read,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        """
+        Send a streamed GET and consume the body with f_read(response), the response is closed after f_read returns.
+        A broken body(for example 'InvalidChunkLength') is retried by the retry policy, the request is sent again and f_read reads the new body.
+        Return the result of f_read
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            logger.debug("GET {}".format(url))
+            res = self._request("GET",url,headers=headers,timeout=timeout,error_handler=error_handler,stream=True)
+            try:
+                return f_read(res)
+            except Exception as ex:
+                errorclass = self.retrypolicy.classify(ex=ex)
+                if errorclass:
+                    #failed to read the body
+                    res.readerror = ex
+                delay = self.retrypolicy.retry("GET",errorclass,attempt)
+                if delay is None:
+                    raise
+                error = ex
+            finally:
+                res.close()
+            self.metrics.retried(url)
+            logger.info("GET {} failed to read the body, retry in {:.2f} seconds.{}".format(url,delay,str(error)))
+            time.sleep(delay)
+
+    @contextlib.contextmanager
+    def conditional(self,etag=None,last_modified=None):
+        """
+        Send the GETs of the current thread in the context as conditional requests with the validators,
+        a GET raises ResourceNotModified if the resource is not modified; the response cache and the single flight are bypassed.
+        Yield a dict which holds the validators("etag","last_modified") of the last modified response
+        """
+        validators = {"etag":etag,"last_modified":last_modified}
+        self._conditional.validators = validators
+        try:
+            yield validators
+        finally:
+            self._conditional.validators = None
+
+    def _conditional_get(self,url,headers,timeout,error_handler,validators):
+        logger.debug("GET {} (conditional)".format(url))
+        conditions = {}
+        if validators.get("etag"):
+            conditions["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            conditions["If-Modified-Since"] = validators["last_modified"]
+        f_handler = error_handler or self._handle_response_error
+        def _handler(res):
+            if res.status_code != 304:
+                f_handler(res)
+        res = self._request("GET",url,headers=dict(headers or {},**conditions),timeout=timeout,error_handler=_handler)
+        if res.status_code == 304:
+            raise ResourceNotModified(res)
+        validators["etag"] = res.headers.get("ETag")
+        validators["last_modified"] = res.headers.get("Last-Modified")
+        return res
+
+    def get(self,url,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
+        validators = getattr(self._conditional,"validators",None)
+        if validators is not None:
+            return self._conditional_get(url,headers,timeout,error_handler,validators)
+
+        entry = None
+        cached = self.cache is not None and self.cache.cacheable(url)
+        if cached:
+            res,entry = self.cache.get(self.cache.key(url,headers))
+            if res:
+                logger.debug("GET {} (cached)".format(url))
+                return res
+
+        if self.singleflight is None:
+            return self._get(url,headers,timeout,error_handler,cached,entry)
+        else:
+            return self.singleflight.do((url,(headers or {}).get("Accept"),error_handler),self._get,url,headers,timeout,error_handler,cached,entry)
+
+    def _get(self,url,headers,timeout,error_handler,cached,entry):
+        """
+        Send the GET request, cache the response if cached is True and revalidate the expired cached response(entry) if have
+        """
+        logger.debug("GET {}".format(url))
+        if not cached:
+            return self._request("GET",url,headers=headers,timeout=timeout,error_handler=error_handler)
+
+        key = self.cache.key(url,headers)
+        #the response is not cached if a write invalidates the cache while it is in flight
+        generation = self.cache.generation
+        if entry:
+            #revalidate the expired response
+            f_handler = error_handler or self._handle_response_error
+            def _handler(res):
+                if res.status_code != 304:
+                    f_handler(res)
+            res = self._request("GET",url,headers=dict(headers or {},**entry.validators),timeout=timeout,error_handler=_handler)
+            if res.status_code == 304:
+                self.cache.revalidated(key,entry,generation)
+                return entry.response
+        else:
+            res = self._request("GET",url,headers=headers,timeout=timeout,error_handler=error_handler)
+
+        if res.status_code == 200:
+            self.cache.set(key,res,generation)
         return res
 
+    def _get_capabilities_index(self,service,url,chunk_size=65536):
+        """
+        Stream the GetCapabilities document and parse it into a CapabilitiesIndex, the document is never kept in memory or on disk.
+        The document is requested and parsed again if its body is broken, for example 'InvalidChunkLength'
+        """
+        return self.get_streamed(url,lambda res:CapabilitiesIndex.parse(service,res.iter_content(chunk_size=chunk_size)),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
+
     def has(self,url,headers=GeoserverUtils.accept_header("json"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
         try:
             r = self.get(url , headers=headers,timeout=timeout,error_handler=error_handler)
@@ -128,81 +409,104 @@ class Geoserver(WMSServiceMixin,AboutMixin,DatastoreMixin,FeaturetypeMixin,GWCMi
 
     def post(self,url,data,headers=GeoserverUtils.contenttype_header("xml"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
         logger.debug("POST {}".format(url))
-        if self.headers:
-            if headers:
-                headers = collections.ChainMap(headers,self.headers)
-            else:
-                headers = self.headers
-        res = requests.post(url , data=data , headers=headers, auth=(self.username,self.password),timeout=timeout,verify=self.ssl_verify)
-        (error_handler or self._handle_response_error)(res)
-        return res
+        try:
+            return self._request("POST",url,data=data,headers=headers,timeout=timeout,error_handler=error_handler)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(url)
 
     def put(self,url,data,headers=GeoserverUtils.contenttype_header("xml"),timeout=settings.REQUEST_TIMEOUT,error_handler=None):
         logger.debug("PUT {}".format(url))
-        if self.headers:
-            if headers:
-                headers = collections.ChainMap(headers,self.headers)
-            else:
-                headers = self.headers
-        res = requests.put(url , data=data , headers=headers, auth=(self.username,self.password),timeout=timeout,verify=self.ssl_verify)
-        (error_handler or self._handle_response_error)(res)
-        return res
+        try:
+            return self._request("PUT",url,data=data,headers=headers,timeout=timeout,error_handler=error_handler)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(url)
 
     def delete(self,url,headers=None,timeout=settings.REQUEST_TIMEOUT,error_handler=None):
         logger.debug("DELETE {}".format(url))
-        if self.headers:
-            if headers:
-                headers = collections.ChainMap(headers,self.headers)
-            else:
-                headers = self.headers
+        try:
+            return self._request("DELETE",url,headers=headers,timeout=timeout,error_handler=error_handler)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate(url)
 
+    def _crawl_catalog(self,dop=None):
+        """
+        A generator which lists the catalog in parallel with at most dop in-flight requests.
+        Yield (kind,workspace,store,names) as soon as a list request is finished;
+        kind is one of 'workspaces','datastores','wmsstores','featuretypes','wmslayers' and 'layergroups'
+        """
+        dop = dop or settings.CATALOG_CRAWL_DOP
+        self.set_poolsize(dop)
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=dop,thread_name_prefix="CatalogCrawler")
+        pending = {executor.submit(self.list_workspaces):("workspaces",None,None)}
+        try:
+            while pending:
+                done,_ = concurrent.futures.wait(pending,return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    kind,workspace,store = pending.pop(future)
+                    names = future.result()
+                    if kind == "workspaces":
+                        for w in names:
+                            pending[executor.submit(self.list_datastores,w)] = ("datastores",w,None)
+                            pending[executor.submit(self.list_wmsstores,w)] = ("wmsstores",w,None)
+                            pending[executor.submit(self.list_layergroups,w)] = ("layergroups",w,None)
+                    elif kind == "datastores":
+                        for s in names:
+                            pending[executor.submit(self.list_featuretypes,workspace,s)] = ("featuretypes",workspace,s)
+                    elif kind == "wmsstores":
+                        for s in names:
+                            pending[executor.submit(self.list_wmslayers,workspace,s)] = ("wmslayers",workspace,s)
+                    yield (kind,workspace,store,names)
+        finally:
+            #failed or closed by the consumer, cancel the requests which are not started yet
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
 
-        res = requests.delete(url , auth=(self.username,self.password),headers=headers,timeout=timeout,verify=self.ssl_verify)
-        (error_handler or self._handle_response_error)(res)
-        return res
+    def iter_layers(self,dop=None):
+        """
+        A generator which crawls the catalog in parallel and yields (layertype,workspace,store,layer) as soon as the layer is discovered.
+        layertype is one of 'featuretype','wmslayer' and 'layergroup'; store is None for layergroup.
+        The order of the layers is not deterministic
+        """
+        for kind,workspace,store,names in self._crawl_catalog(dop=dop):
+            if kind in ("featuretypes","wmslayers","layergroups"):
+                layertype = kind[:-1]
+                for l in names:
+                    yield (layertype,workspace,store,l)
 
-    def all_layers(self):
+    def all_layers(self,dop=None):
         """
         List a tuple([(workspace,[(datastore,[featuretypes])])],[(workspace,[(wmsstore,[wmslayers])])],[(workspace,[layergroup])])
+        The catalog is crawled in parallel with at most dop(default settings.CATALOG_CRAWL_DOP) in-flight requests,
+        the workspaces, stores and layers are in the same order as the list apis return.
         """
+        workspaces = []
+        listed = {}
+        for kind,workspace,store,names in self._crawl_catalog(dop=dop):
+            if kind == "workspaces":
+                workspaces = names
+            else:
+                listed[(kind,workspace,store)] = names
+
         featuretypes = []
         wmslayers = []
         layergroups = []
-        for w in self.list_workspaces():
-            data = (w,[])
-            for s in self.list_datastores(w):
-                data[1].append((s,[]))
-                for l in self.list_featuretypes(w,s):
-                    data[1][-1][1].append(l)
-    
-                if not data[1][-1][1]:
-                    #no layers in datastore,delete the datastore
-                    del data[1][-1]
-    
-            if data[1]:
-                featuretypes.append(data)
-                
-            data = (w,[])
-            for s in self.list_wmsstores(w):
-                data[1].append((s,[]))
-                for l in self.list_wmslayers(w,s):
-                    data[1][-1][1].append(l)
-                
-                if not data[1][-1][1]:
-                    #no layers in wmsstore,delete the wmsstore
-                    del data[1][-1]
-    
-            if data[1]:
-                wmslayers.append(data)
-    
-            data = (w,[])
-            for l in self.list_layergroups(w):
-                data[1].append(l)
-    
-            if data[1]:
-                #no layergroupss in workspace,delete the workspace
-                layergroups.append(data)
-             
+        for w in workspaces:
+            #no layers in store,ignore the store
+            data = [(s,listed[("featuretypes",w,s)]) for s in listed[("datastores",w,None)] if listed[("featuretypes",w,s)]]
+            if data:
+                featuretypes.append((w,data))
+
+            data = [(s,listed[("wmslayers",w,s)]) for s in listed[("wmsstores",w,None)] if listed[("wmslayers",w,s)]]
+            if data:
+                wmslayers.append((w,data))
+
+            if listed[("layergroups",w,None)]:
+                layergroups.append((w,listed[("layergroups",w,None)]))
+
         return (featuretypes,wmslayers,layergroups)
 
 
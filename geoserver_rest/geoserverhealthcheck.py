@@ -5,11 +5,18 @@ import logging
 import shutil
 import jinja2
 import traceback
+import multiprocessing
+import concurrent.futures
 
 from .taskrunner import GeoserverTaskRunner
 from .geoserver import Geoserver
+from .catalogsnapshot import CatalogSnapshot
+from .layerfingerprints import LayerFingerprints
+from .metrics import RequestMetrics,TaskMetrics
+from .reportindex import ReportIndex
+from . import resultsink
 from .tasks import *
-from .csv import CSVWriter
+from .csv import CSVWriterThread
 from . import settings
 from . import timezone
 from . import loggingconfig
@@ -27,15 +34,42 @@ jinja_env = jinja2.Environment(
 class GeoserverHealthCheck(object):
     report_file = None
     warnings_file = None
+    results_file = None
     reportwriter = None
     warningwriter = None
+    writerthread = None
+    resultwriter = None
+    taskmetrics = None
     _finished_tasks = None
     metadata = None
     
-    def __init__(self,geoserver_name,geoserver_url,geoserver_user,geoserver_password,ssl_verify,data_dir,host,port,dbname,user,passwd,sslmode,requestheaders=None,dop=1,keep_tasks=False):
+    def __init__(self,geoserver_name,geoserver_url,geoserver_user,geoserver_password,ssl_verify,data_dir,host,port,dbname,user,passwd,sslmode,requestheaders=None,dop=1,keep_tasks=False,catalog_snapshot=settings.HEALTHCHECK_CATALOG_SNAPSHOT,scheduling=settings.HEALTHCHECK_SCHEDULING,mode=settings.HEALTHCHECK_MODE,incremental=settings.HEALTHCHECK_INCREMENTAL,shard=None,shard_by=settings.HEALTHCHECK_SHARD_BY,result_format=settings.HEALTHCHECK_RESULT_FORMAT):
+        """
+        catalog_snapshot: the tasks read the catalog from a snapshot which is refreshed incrementally if True
+        scheduling: the scheduling of the tasks, 'depthfirst' or 'fifo'
+        mode: 'full' discovers the layers from the rest api; 'fast' creates the layer tests from the GetCapabilities documents,
+              and only falls back to the rest detail of the layers whose capabilities entries are incomplete
+        incremental: only re-test the layers whose fingerprints are changed and a rotating fraction of the unchanged layers if True,
+              the results of the other layers are carried forward from the last healthcheck
+        shard: (shard index,shards,run id) if only one shard of the healthcheck is run, the partial reports are written to the shard folder of the run
+        shard_by: partition the tasks by 'workspace' or 'layer'.
+              The tasks which can't be partitioned, for example the capabilities tasks, are run by all the shards to discover the partitioned tasks,
+              but only reported by the first shard.
+        result_format: also write the typed result records as 'jsonl' or 'parquet' if not empty
+        """
+        if mode not in ("full","fast"):
+            raise Exception("Healthcheck mode({}) is not supported".format(mode))
+        if shard_by not in ("workspace","layer"):
+            raise Exception("Healthcheck shard_by({}) is not supported".format(shard_by))
+        self.mode = mode
+        self.result_format = resultsink.result_format(result_format)
+        self.shard = shard
+        self.shard_by = shard_by
         self.keep_tasks = keep_tasks
         self.geoserver_name = geoserver_name
         self.geoserver = Geoserver(geoserver_url,geoserver_user,geoserver_password,headers=requestheaders,ssl_verify=ssl_verify)
+        self.snapshot = CatalogSnapshot(self.geoserver) if catalog_snapshot else None
+        self.fingerprints = LayerFingerprints(data_dir) if incremental else None
         self.data_dir = data_dir
         self.host = host
         self.port = port
@@ -43,9 +77,14 @@ class GeoserverHealthCheck(object):
         self.user = user
         self.passwd = passwd
         self.sslmode = sslmode
-        self.taskrunner = GeoserverTaskRunner(geoserver_name,self.geoserver,dop=dop,keep_tasks=keep_tasks)
+        if self.geoserver.concurrency:
+            #the concurrency is limited by the adaptive limiters, the workers are only the upper bound
+            dop = max(dop,self.geoserver.concurrency.max_concurrency)
+        self.taskrunner = GeoserverTaskRunner(geoserver_name,self.snapshot or self.geoserver,dop=dop,keep_tasks=keep_tasks,priority=scheduling)
         self._reportwriteaction = None
         self._warningwriteaction = None
+        self._capabilitiesaction = None
+        self._fingerprintaction = None
         self.warnings = 0
         self.errors = 0
         self.dop = dop
@@ -53,6 +92,9 @@ class GeoserverHealthCheck(object):
         self.endtime = None
         self._report_dir = None
         self._reports_home = None
+        self._tasks = None
+        #the number of the tasks reported by this shard
+        self.reported_tasks = 0
 
     @property
     def finished_tasks(self):
@@ -70,9 +112,17 @@ class GeoserverHealthCheck(object):
                 os.makedirs(self._reports_home,mode=0o755)
         return self._reports_home
 
+    def shard_dir(self,runid,index):
+        return os.path.join(self.reports_home,"shards",runid,"shard{}".format(index))
+
     @property
     def report_dir(self):
-        if not self._report_dir:
+        if not self._report_dir and self.shard:
+            self._report_dir = self.shard_dir(self.shard[2],self.shard[0])
+            if os.path.exists(self._report_dir):
+                shutil.rmtree(self._report_dir)
+            os.makedirs(self._report_dir,mode=0o755)
+        elif not self._report_dir:
             self._report_dir = os.path.join(self.reports_home,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S"))
             if os.path.exists(self._report_dir):
                 if os.path.isdir(self._report_dir):
@@ -86,49 +136,199 @@ class GeoserverHealthCheck(object):
 
     @property
     def tasks(self):
-        return self.taskrunner.total_tasks
+        return self.taskrunner.total_tasks if self._tasks is None else self._tasks
 
-    def synced_taskaction(self,taskaction):
-        lock = threading.Lock() if self.dop > 1 else None
-        def _func(task):
-            try:
-                lock.acquire(blocking=True, timeout=-1)
-                taskaction(task)
-            finally:
-                lock.release()
+    def shardkey(self,task):
+        """
+        Return the key to partition the task, or None if the task can't be partitioned
+        """
+        workspace = getattr(task,"workspace",None)
+        layername = getattr(task,"_layername",None) or next((getattr(task,k) for k in ("featuretype","coverage","layername","layergroup") if getattr(task,k,None)),None)
+        if self.shard_by == "workspace":
+            return workspace or ("" if layername else None)
+        elif layername:
+            return "{}:{}".format(workspace or "",layername)
+        else:
+            return None
+
+    def in_shard(self,task):
+        if not self.shard:
+            return True
+        key = self.shardkey(task)
+        return key is None or utils.shard_of(key,self.shard[1]) == self.shard[0]
+
+    def reported(self,task):
+        """
+        Return True if the task is reported by this shard
+        """
+        return not self.shard or self.shard[0] == 0 or isinstance(task,CarriedForwardTask) or self.shardkey(task) is not None
 
-        return _func if self.dop > 1 else taskaction
+    def _count_reportrows(self,rows):
+        #called by the writer thread only
+        self.reported_tasks += 1
+
+    def _count_warningrows(self,rows):
+        #called by the writer thread only
+        for warning in rows:
+            if warning[2] == "Warning":
+                self.warnings += 1
+            else:
+                self.errors += 1
 
     def write_report_action_factory(self,basetask):
+        """
+        The rows are formatted and written by the writer thread, the task workers only push the rows to its queue
+        """
         self.report_file = "{}_{}_report.csv".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S"))
-        self.reportwriter = CSVWriter(os.path.join(self.report_dir,self.report_file),header=basetask.reportheader)
+        self.reportwriter = self.writerthread.open(os.path.join(self.report_dir,self.report_file),header=basetask.reportheader,callback=self._count_reportrows)
+        self.taskmetrics = TaskMetrics()
+        taskmetricswriter = self.writerthread.add(self.taskmetrics)
         def _func(task):
-            self.reportwriter.writerows(task.reportrows())
+            if not self.reported(task):
+                return
+            rows = list(task.reportrows())
+            if task.layerkey and self.fingerprints:
+                self.fingerprints.add_reportrows(task.layerkey,rows)
+            self.reportwriter.writerows(rows)
+            if task.starttime and task.endtime:
+                taskmetricswriter.writerow((task.category,(task.endtime - task.starttime).total_seconds()))
 
-        return self.synced_taskaction(_func)
+        return _func
         
     def write_warning_action_factory(self,basetask):
         self.warnings_file = "{}_{}_warnings.csv".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S"))
-        self.warningwriter = CSVWriter(os.path.join(self.report_dir,self.warnings_file),header=basetask.warningheader)
+        self.warningwriter = self.writerthread.open(os.path.join(self.report_dir,self.warnings_file),header=basetask.warningheader,callback=self._count_warningrows)
+        if self.result_format:
+            self.results_file = resultsink.result_filename("{}_{}_results".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S")),self.result_format)
+            self.resultwriter = self.writerthread.add(resultsink.open_result_writer(os.path.join(self.report_dir,self.results_file)))
         def _func(task):
-            for warning in task.warnings():
-                if warning[2] == "Warning":
-                    self.warnings += 1
-                else:
-                    self.errors += 1
-                self.warningwriter.writerow(warning)
+            if not self.reported(task):
+                return
+            warnings = list(task.warnings())
+            if warnings:
+                self.warningwriter.writerows(warnings)
+            if self.resultwriter:
+                self.resultwriter.writerows(resultsink.task_records(task,warnings))
+            if task.layerkey and self.fingerprints:
+                self.fingerprints.add_warningrows(task.layerkey,warnings)
         
-        return self.synced_taskaction(_func)
+        return _func
 
     def create_tasks_from_previoustask_factory(self,f_createtasks,limit=None):
         if limit is None:
             limit = 0
         def _func(previoustask):
+            if previoustask.unchanged:
+                #the results of the last tests are carried forward
+                return
             for t in f_createtasks(previoustask,limit = limit):
-               self.taskrunner.add_task(t)
+               if not self.in_shard(t):
+                   continue
+               t.layerkey = previoustask.layerkey or previoustask.fingerprintkey
+               self.taskrunner.add_task(t,parent=previoustask)
+
+        return _func
+
+    def fingerprint_action_factory(self):
+        """
+        Check the fingerprint of the layer after its detail task is finished,
+        carry forward the results of the last tests if the layer can be skipped
+        """
+        def _func(detailtask):
+            if not detailtask.result:
+                return
+            layerkey = str(detailtask)
+            previous = self.fingerprints.check(layerkey,self.fingerprints.fingerprint(detailtask))
+            if previous:
+                detailtask.unchanged = True
+                task = CarriedForwardTask(previous["tested"],previous["reportrows"],previous["warningrows"])
+                self._reportwriteaction(task)
+                self._warningwriteaction(task)
+            else:
+                detailtask.fingerprintkey = layerkey
+
+        return _func
+
+    def incremental_post_actions_factory(self,f_post_actions_factory):
+        """
+        Check the fingerprint before the other post actions of the layer detail tasks
+        """
+        def _func(taskcls):
+            actions = f_post_actions_factory(taskcls)
+            if actions and taskcls in (GetFeatureTypeDetail,GetCoverageDetail,GetWMSLayerDetail,GetLayergroupDetail):
+                actions = [self._fingerprintaction,*actions]
+            return actions
+
+        return _func
+
+    def create_tasks_from_capabilities_factory(self,limit=None):
+        """
+        Create the layer tasks from the parsed capabilities after all the GetCapabilities tasks are finished
+        """
+        if limit is None:
+            limit = 0
+        lock = threading.Lock()
+        capabilities = {}
+        def _func(capabilitiestask):
+            with lock:
+                capabilities[capabilitiestask.service] = capabilitiestask.index
+                if len(capabilities) < len(CAPABILITIES_TASKS):
+                    return
+            layergroups = self.list_layergroups(unclassified_workspaces(capabilities))
+            for t in createtasks_FromCapabilities(capabilities,post_actions_factory=capabilitiestask.post_actions_factory,limit=limit,layergroups=layergroups):
+                if not self.in_shard(t):
+                    continue
+                self.taskrunner.add_task(t,parent=capabilitiestask)
 
         return _func
 
+    def list_layergroups(self,workspaces):
+        """
+        List the layergroups of the workspaces in parallel, a layergroup in 'single' or 'opaque' mode can't be told from a wms layer by the capabilities.
+        Return the set of (workspace,layergroup); the workspaces failed to list are logged and ignored
+        """
+        geoserver = self.snapshot or self.geoserver
+        layergroups = set()
+        if not workspaces:
+            return layergroups
+        workspaces = list(workspaces)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(workspaces),settings.CATALOG_CRAWL_DOP)) as executor:
+            futures = [executor.submit(geoserver.list_layergroups,w) for w in workspaces]
+            for w,future in zip(workspaces,futures):
+                try:
+                    layergroups.update((w,g) for g in future.result())
+                except Exception as ex:
+                    logger.error("{} : Failed to list the layergroups of the workspace({}).{}".format(self.geoserver_name,w,str(ex)))
+        return layergroups
+
+    def fast_post_actions_factory(self,taskcls):
+        """
+        The post actions of the fast mode.
+        The catalog is not listed, the layer tasks are created from the GetCapabilities documents,
+        and the wmts tests are created from the wmts capabilities instead of the wms tests.
+        """
+        if taskcls == CheckGeoserverAlive:
+            return [
+                self.create_tasks_from_previoustask_factory(createtasks_WFSGetCapabilities,0),
+                self.create_tasks_from_previoustask_factory(createtasks_WMSGetCapabilities,0),
+                self.create_tasks_from_previoustask_factory(createtasks_WMTSGetCapabilities,0),
+                self.create_tasks_from_previoustask_factory(createtasks_CoverageGetCapabilities,0),
+                self._reportwriteaction,
+                self._warningwriteaction
+            ]
+        elif taskcls in CAPABILITIES_TASKS:
+            return [
+                self._capabilitiesaction,
+                self._reportwriteaction,
+                self._warningwriteaction,
+            ]
+        elif taskcls in [TestWMSService4FeatureType,TestWMSService4WMSLayer,TestWMSService4Layergroup,TestWMSService4Coverage]:
+            return [
+                self._reportwriteaction,
+                self._warningwriteaction,
+            ]
+        return self.post_actions_factory(taskcls)
+
     def post_actions_factory(self,taskcls):
 
         if taskcls == GeoserverDataConsistencyCheckTask:
@@ -287,37 +487,81 @@ class GeoserverHealthCheck(object):
         return None
         
 
+    @property
+    def fingerprints_file(self):
+        if self.shard:
+            return os.path.join(self.reports_home,"layerfingerprints_shard{}of{}.json".format(self.shard[0],self.shard[1]))
+        else:
+            return os.path.join(self.reports_home,"layerfingerprints.json")
+
+    def refresh_snapshot(self):
+        """
+        Load the catalog snapshot saved by the previous healthcheck, refresh and save it again.
+        The snapshot is reset if failed, so the tasks read the catalog from the geoserver instead of the stale snapshot
+        Return True if refreshed
+        """
+        snapshotfile = os.path.join(self.reports_home,"catalogsnapshot.json")
+        try:
+            self.snapshot.load(snapshotfile)
+            requests = self.snapshot.refresh()
+            self.snapshot.save(snapshotfile)
+            logger.info("{} : The catalog snapshot was refreshed with {} requests, {} details failed to fetch".format(self.geoserver_name,requests,len(self.snapshot.errors)))
+            return True
+        except Exception as ex:
+            logger.error("{} : Failed to refresh the catalog snapshot, read the catalog from the geoserver.{}".format(self.geoserver_name,traceback.format_exc()))
+            self.snapshot.reset()
+            return False
+
     def start(self):
+        if self.snapshot:
+            self.refresh_snapshot()
         self.taskrunner.start()
         self.starttime = timezone.localtime()
-        if self.data_dir:
+        self.writerthread = CSVWriterThread(name="{}ReportWriter".format(self.geoserver_name))
+        self.writerthread.start()
+        if self.mode == "fast":
+            self._capabilitiesaction = self.create_tasks_from_capabilities_factory()
+            post_actions_factory = self.fast_post_actions_factory
+        else:
+            post_actions_factory = self.post_actions_factory
+        if self.fingerprints:
+            self.fingerprints.load(self.fingerprints_file)
+            self._fingerprintaction = self.fingerprint_action_factory()
+            post_actions_factory = self.incremental_post_actions_factory(post_actions_factory)
+        if self.data_dir and (not self.shard or self.shard[0] == 0):
 
             basetask = GeoserverDataConsistencyCheckTask(data_dir=self.data_dir,host=self.host,port=self.port,dbname=self.dbname,user=self.user,passwd=self.passwd,sslmode=self.sslmode)
             #basetask = GetWMSLayerDetail("kaartdijin-boodja-private","WA_firescan","linescanner_SWIR_3-6_2",self.geoserver.get_wmsstore("kaartdijin-boodja-private","WA_firescan"))
             self._reportwriteaction = self.write_report_action_factory(basetask)
             self._warningwriteaction = self.write_warning_action_factory(basetask)
 
-            task = GeoserverDataConsistencyCheckTask(data_dir=self.data_dir,host=self.host,port=self.port,dbname=self.dbname,user=self.user,passwd=self.passwd,sslmode=self.sslmode,post_actions_factory = self.post_actions_factory)
+            task = GeoserverDataConsistencyCheckTask(data_dir=self.data_dir,host=self.host,port=self.port,dbname=self.dbname,user=self.user,passwd=self.passwd,sslmode=self.sslmode,post_actions_factory = post_actions_factory)
         else:
             basetask = CheckGeoserverAlive()
             #basetask = GetWMSLayerDetail("kaartdijin-boodja-private","WA_firescan","linescanner_SWIR_3-6_2",self.geoserver.get_wmsstore("kaartdijin-boodja-private","WA_firescan"))
             self._reportwriteaction = self.write_report_action_factory(basetask)
             self._warningwriteaction = self.write_warning_action_factory(basetask)
 
-            task = CheckGeoserverAlive(post_actions_factory = self.post_actions_factory)
+            task = CheckGeoserverAlive(post_actions_factory = post_actions_factory)
 
         #task = GetFeatureTypeDetail("kaartdijin-boodja-private","CPT_DFES_BUSHFIRE_PRONE_AREAS","CPT_DFES_BUSHFIRE_PRONE_AREAS",self.geoserver.get_datastore("kaartdijin-boodja-private","CPT_DFES_BUSHFIRE_PRONE_AREAS"),post_actions_factory = self.post_actions_factory)
         self.taskrunner.add_task(task)
 
 
     def close_report_writers(self):
+        """
+        Write the queued rows and close the report files
+        """
+        if not self.writerthread:
+            return
         try:
-            self.reportwriter.close()
-            self.reportwriter = None
-            self.warningwriter.close()
-            self.warningwriter = None
+            self.writerthread.close()
         except Exception as ex:
-            exceptions.append(ex)
+            logger.error("Failed to write the report.{}".format(str(ex)))
+        self.writerthread = None
+        self.reportwriter = None
+        self.warningwriter = None
+        self.resultwriter = None
 
     def wait_to_finish(self,close_report_writer=True):
         """
@@ -328,9 +572,15 @@ class GeoserverHealthCheck(object):
             self.taskrunner.wait_to_shutdown()
             if close_report_writer:
                 self.close_report_writers()
+            elif self.writerthread:
+                #the counters are updated by the writer thread
+                self.writerthread.flush()
         except Exception as ex:
             logger.error(traceback.format_exc())
             exceptions.append(ex)
+        finally:
+            #all tasks are finished, release the pooled connections
+            self.geoserver.close()
 
         if self.taskrunner.finished_tasks:
             logger.debug("Begin to populate the finished task map.size={}".format(self.taskrunner.finished_tasks.qsize()))
@@ -344,8 +594,7 @@ class GeoserverHealthCheck(object):
                 index += 1
                 if not task:
                     break
-                key = (task.category,utils.toMapKey(task.keyparameters))
-                self._finished_tasks[key] = task
+                self._finished_tasks[task.key] = task
             logger.debug("End to populate the finished task map.size={}".format(len(self._finished_tasks)))
 
         self.endtime = timezone.localtime()
@@ -353,13 +602,34 @@ class GeoserverHealthCheck(object):
             "starttime": timezone.format(self.starttime,pattern="%Y-%m-%d %H:%M:%S.%f"),
             "endtime": timezone.format(self.endtime,pattern="%Y-%m-%d %H:%M:%S.%f"),
             "exectime": timezone.format_timedelta(self.endtime - self.starttime),
+            "exectime_seconds": round((self.endtime - self.starttime).total_seconds(),3),
+            "mode": self.mode,
+            "shard": {"index":self.shard[0],"shards":self.shard[1],"runid":self.shard[2],"by":self.shard_by} if self.shard else None,
             "total_tasks": self.tasks if self.tasks is not None else "-",
+            "reported_tasks": self.reported_tasks if self.shard else None,
             "warnings": self.warnings if self.warnings is not None else "-",
             "errors": self.errors if self.errors is not None else "-",
             "report_dir": os.path.basename(self.report_dir) if self.report_dir else "-",
             "report_file":self.report_file if self.report_file else "-",
             "warnings_file":self.warnings_file if self.warnings_file else "-",
+            "results_file":self.results_file,
         }
+        self.metadata["requests"] = self.geoserver.metrics.stats()
+        if self.taskmetrics:
+            self.metadata["categories"] = self.taskmetrics.stats()
+        if self.fingerprints:
+            self.metadata["incremental"] = self.fingerprints.stats()
+            try:
+                self.fingerprints.save(self.fingerprints_file)
+            except Exception as ex:
+                logger.error("Failed to save the layer fingerprints.{}".format(str(ex)))
+        if self.geoserver.concurrency:
+            self.metadata["concurrency"] = self.geoserver.concurrency.stats()
+        if settings.PROMETHEUS_TEXTFILE_DIR:
+            try:
+                self.geoserver.metrics.write_textfile(os.path.join(settings.PROMETHEUS_TEXTFILE_DIR,"geoserver_healthcheck_{}.prom".format(self.geoserver_name)),labels={"geoserver":self.geoserver_name,"job":"healthcheck"})
+            except Exception as ex:
+                logger.error("Failed to write the prometheus textfile.{}".format(str(ex)))
         if exceptions:
             self.metadata["exceptions"] = "\r\n----------------------------------------------------\r\n".join(
                 "\r\n".join(traceback.format_exception(type(ex),ex,ex.__traceback__)) for ex in exceptions
@@ -373,33 +643,9 @@ class GeoserverHealthCheck(object):
             with open(os.path.join(self.report_dir,"reportmeta.json"),'w') as f:
                 f.write(json.dumps(self.metadata,indent=4))
     
+            #add the report to the report index and remove the expired reports
+            reports = ReportIndex(self.reports_home).add(self.metadata)
             if os.path.exists(os.path.join(settings.BASE_DIR,"reports.html")):
-                #write the reports.html
-                reports = []
-                for f in os.listdir(self.reports_home):
-                    if not os.path.isdir(os.path.join(self.reports_home,f)):
-                        #not a report folder
-                        continue
-    
-                    if not os.path.exists(os.path.join(self.reports_home,f,"reportmeta.json")):
-                        #meta file doesn't exist
-                        continue
-                    with open(os.path.join(self.reports_home,f,"reportmeta.json"),'rt') as f:
-                        try:
-                            reports.append(json.loads(f.read()))
-                        except :
-                            logger.error("Failed to load report meta data.{}".format(traceback.format_exc()))
-    
-                #sort the reports
-                reports.sort(key=lambda d:d["starttime"],reverse=True)
-                #remove the expired reports
-                if len(reports) > settings.MAX_REPORTS:
-                    for i in range(len(reports) - settings.MAX_REPORTS):
-                        try:
-                            shutil.rmtree(os.path.join(self.reports_home,reports[-1]["report_dir"]))
-                        except:
-                            logger.error("Failed to delete expired report folder({}).{}".format(reports[-1]["report_dir"],traceback.format_exc()))
-                        del reports[-1]
                 #generate the reports.html
                 reports_template = jinja_env.get_template("reports.html")
                 with open(os.path.join(self.reports_home,"reports.html"),"w") as f:
@@ -421,7 +667,107 @@ class GeoserverHealthCheck(object):
 
         except Exception as ex:
             logger.error("Failed to write the report.{}".format(traceback.format_exc()))
-            
+
+    def write_shard_report(self):
+        """
+        Write the metadata of the shard to the shard folder, the partial reports of all the shards are merged by 'merge_shards'
+        """
+        if not self.metadata:
+            raise Exception("Please call this method after healcheck is finished.")
+        with open(os.path.join(self.report_dir,"shardmeta.json"),'w') as f:
+            f.write(json.dumps(self.metadata,indent=4))
+
+    def merge_shards(self,runid,shards):
+        """
+        Merge the partial reports of all the shards of the run into a new report folder and populate the metadata,
+        then the shard folders are removed.
+        Call 'write_report' to write the reportmeta.json and reports.html
+        """
+        shardmetas = []
+        for i in range(shards):
+            metafile = os.path.join(self.shard_dir(runid,i),"shardmeta.json")
+            if not os.path.exists(metafile):
+                raise Exception("The shard({}) of the healthcheck run({}) is not finished".format(i,runid))
+            with open(metafile,'r') as f:
+                shardmetas.append(json.loads(f.read()))
+
+        self.starttime = min(timezone.parse(m["starttime"],pattern="%Y-%m-%d %H:%M:%S.%f") for m in shardmetas)
+        self.endtime = max(timezone.parse(m["endtime"],pattern="%Y-%m-%d %H:%M:%S.%f") for m in shardmetas)
+        #the global tasks are run by all the shards but only reported by the first shard, count the reported tasks(including the carried forward tasks) of every shard
+        self._tasks = sum(m["reported_tasks"] for m in shardmetas)
+        self.warnings = sum(m["warnings"] for m in shardmetas if isinstance(m["warnings"],int))
+        self.errors = sum(m["errors"] for m in shardmetas if isinstance(m["errors"],int))
+        self.report_file = "{}_{}_report.csv".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S"))
+        self.warnings_file = "{}_{}_warnings.csv".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S"))
+
+        #concatenate the csv files of the shards, and keep the header of the first one
+        for filename,key in ((self.report_file,"report_file"),(self.warnings_file,"warnings_file")):
+            with open(os.path.join(self.report_dir,filename),'wb') as output:
+                for i,m in enumerate(shardmetas):
+                    shardfile = os.path.join(self.shard_dir(runid,i),m[key]) if m.get(key) not in (None,"-") else None
+                    if not shardfile or not os.path.exists(shardfile):
+                        continue
+                    with open(shardfile,'rb') as f:
+                        header = f.readline()
+                        if output.tell() == 0:
+                            output.write(header)
+                        shutil.copyfileobj(f,output)
+
+        resultfiles = [os.path.join(self.shard_dir(runid,i),m["results_file"]) for i,m in enumerate(shardmetas) if m.get("results_file")]
+        if resultfiles:
+            self.results_file = resultsink.result_filename("{}_{}_results".format(self.geoserver_name,timezone.format(self.starttime,pattern="%Y-%m-%dT%H-%M-%S")),"parquet" if shardmetas[0]["results_file"].endswith(".parquet") else "jsonl")
+            resultsink.merge_results(resultfiles,os.path.join(self.report_dir,self.results_file))
+
+        self.metadata = {
+            "starttime": timezone.format(self.starttime,pattern="%Y-%m-%d %H:%M:%S.%f"),
+            "endtime": timezone.format(self.endtime,pattern="%Y-%m-%d %H:%M:%S.%f"),
+            "exectime": timezone.format_timedelta(self.endtime - self.starttime),
+            "exectime_seconds": round((self.endtime - self.starttime).total_seconds(),3),
+            "mode": shardmetas[0].get("mode"),
+            "total_tasks": self._tasks,
+            "warnings": self.warnings,
+            "errors": self.errors,
+            "report_dir": os.path.basename(self.report_dir),
+            "report_file":self.report_file,
+            "warnings_file":self.warnings_file,
+            "results_file":self.results_file,
+            "shards": [dict((k,m.get(k)) for k in ("shard","starttime","endtime","exectime","total_tasks","reported_tasks","warnings","errors")) for m in shardmetas],
+            "requests": RequestMetrics.merge_stats(m.get("requests") for m in shardmetas),
+            "categories": TaskMetrics.merge_stats(m.get("categories") for m in shardmetas)
+        }
+        exceptions = [m["exceptions"] for m in shardmetas if m.get("exceptions")]
+        if exceptions:
+            self.metadata["exceptions"] = "\r\n----------------------------------------------------\r\n".join(exceptions)
+
+        shutil.rmtree(os.path.join(self.reports_home,"shards",runid))
+
+def run_shard(args,kwargs,shard):
+    """
+    Run one shard of the healthcheck and write its partial reports to the shard folder
+    args,kwargs: the arguments of GeoserverHealthCheck
+    shard: (shard index,shards,run id)
+    """
+    healthcheck = GeoserverHealthCheck(*args,shard=shard,**kwargs)
+    healthcheck.start()
+    healthcheck.wait_to_finish()
+    healthcheck.write_shard_report()
+    return healthcheck.metadata
+
+def run_shards(args,kwargs,shards,runid=None):
+    """
+    Run all the shards of the healthcheck in local processes, and merge their partial reports.
+    Return the healthcheck with the merged metadata, call 'write_report' to write the reportmeta.json and reports.html
+    """
+    runid = runid or timezone.format(pattern="%Y-%m-%dT%H-%M-%S")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=shards,mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(run_shard,args,kwargs,(i,shards,runid)) for i in range(shards)]
+        for future in futures:
+            future.result()
+
+    healthcheck = GeoserverHealthCheck(*args,**kwargs)
+    healthcheck.merge_shards(runid,shards)
+    return healthcheck
+
 if __name__ == '__main__':
     geoserver_name = os.environ["GEOSERVER_NAME"]
     geoserver_url = os.environ["GEOSERVER_URL"]
@@ -440,12 +786,29 @@ if __name__ == '__main__':
     if not geoserver_name:
         geoserver_name = utils.get_domain(geoserver_url)
 
-    healthcheck = GeoserverHealthCheck(geoserver_name,geoserver_url,geoserver_user,geoserver_password,geoserver_ssl_verify,geoserver_data_dir,geoserver_catalog_host,geoserver_catalog_port,geoserver_catalog_dbname,geoserver_catalog_user,geoserver_catalog_passwd,geoserver_catalog_sslmode,settings.GET_REQUEST_HEADERS("GEOSERVER_REQUEST_HEADERS"),settings.HEALTHCHECK_DOP)
-    healthcheck.start()
-    healthcheck.wait_to_finish()
-    healthcheck.write_report()
+    args = (geoserver_name,geoserver_url,geoserver_user,geoserver_password,geoserver_ssl_verify,geoserver_data_dir,geoserver_catalog_host,geoserver_catalog_port,geoserver_catalog_dbname,geoserver_catalog_user,geoserver_catalog_passwd,geoserver_catalog_sslmode)
+    kwargs = {"requestheaders":settings.GET_REQUEST_HEADERS("GEOSERVER_REQUEST_HEADERS"),"dop":settings.HEALTHCHECK_DOP}
+    if settings.HEALTHCHECK_SHARDS > 1:
+        runid = settings.HEALTHCHECK_SHARD_RUNID or timezone.format(pattern="%Y-%m-%d")
+        if settings.HEALTHCHECK_SHARD_MERGE:
+            #merge the partial reports of the shards run in other containers
+            healthcheck = GeoserverHealthCheck(*args,**kwargs)
+            healthcheck.merge_shards(runid,settings.HEALTHCHECK_SHARDS)
+        elif settings.HEALTHCHECK_SHARD_INDEX is not None:
+            #run one shard in this container, the partial reports are merged later
+            run_shard(args,kwargs,(settings.HEALTHCHECK_SHARD_INDEX,settings.HEALTHCHECK_SHARDS,runid))
+            healthcheck = None
+        else:
+            healthcheck = run_shards(args,kwargs,settings.HEALTHCHECK_SHARDS,settings.HEALTHCHECK_SHARD_RUNID)
+    else:
+        healthcheck = GeoserverHealthCheck(*args,**kwargs)
+        healthcheck.start()
+        healthcheck.wait_to_finish()
+
+    if healthcheck:
+        healthcheck.write_report()
 
-    if settings.EMAIL_ENABLED and (healthcheck.metadata.get("exceptions") or healthcheck.errors):
+    if healthcheck and settings.EMAIL_ENABLED and (healthcheck.metadata.get("exceptions") or healthcheck.errors):
         #send email
         subject = "Some errors found on geoserver({})".format(geoserver_name)
         context = {"healthchecks":[{"healthcheck":healthcheck,"processing_metadata":healthcheck.metadata}]}
@@ -45,6 +45,8 @@ if __name__ == '__main__':
         clean_threshold=clean_threshold,
         emergencyclean_threshold=emergencyclean_threshold
     )
+    if settings.PROMETHEUS_TEXTFILE_DIR:
+        gwcmanager.geoserver.metrics.write_textfile(os.path.join(settings.PROMETHEUS_TEXTFILE_DIR,"geoserver_gwcmanage_{}.prom".format(geoserver_name)),labels={"geoserver":geoserver_name,"job":"gwcmanage"})
     if clean_result[0]:
         if clean_result[1] < 0:
             print("Performed a tile cleaning task, but can't find how much disk space was released.")
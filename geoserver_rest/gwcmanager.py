@@ -9,6 +9,7 @@ import psutil
 from datetime import timedelta
 
 from .geoserver import Geoserver
+from .catalogsnapshot import CatalogSnapshot
 from . import timezone
 from . import settings
 from . import loggingconfig
@@ -27,7 +28,10 @@ class RunOutofTimeException(Exception):
 
 class GWCManager(object):
     KEY_MANAGEMENTSTATUS = "_managementstatus_"
-    def __init__(self,geoserver_name,geoserver_url,geoserver_user,geoserver_password,ssl_verify,gwc_tiles_dir,gwc_disk_size,requestheaders=None):
+    def __init__(self,geoserver_name,geoserver_url,geoserver_user,geoserver_password,ssl_verify,gwc_tiles_dir,gwc_disk_size,requestheaders=None,snapshot=None):
+        """
+        snapshot: the catalog snapshot shared with other tools, a snapshot including only the gwc layers is used if None
+        """
         self.geoserver_name = geoserver_name
         self.gwc_tiles_dir = gwc_tiles_dir
         self.gwc_disk_size = gwc_disk_size
@@ -46,6 +50,7 @@ class GWCManager(object):
         self.gwcmanagementstatusfile = os.path.join(self.gwc_tiles_dir,"gwcmanagementstatus.json")
         self.gwclayersfile = os.path.join(settings.REPORT_HOME,"gwclayers.html")
         self.geoserver = Geoserver(geoserver_url,geoserver_user,geoserver_password,headers=requestheaders,ssl_verify=ssl_verify)
+        self.snapshot = snapshot or CatalogSnapshot(self.geoserver,catalog=False)
         self._layers = None
         self._managementstatus = None
 
@@ -105,11 +110,13 @@ class GWCManager(object):
 
         self._managementstatus = gwcmanagementstatus.get(self.KEY_MANAGEMENTSTATUS,{})
 
-        #find all gwc layers
+        #find all gwc layers, the layer details are fetched in parallel by the snapshot
+        if not self.snapshot.gwclayers_loaded:
+            self.snapshot.refresh()
         self._layers = []
         layer = None
-        for workspace,name in self.geoserver.list_gwclayers():
-            metadata = self.geoserver.get_gwclayer(workspace,name)
+        for workspace,name in self.snapshot.list_gwclayers():
+            metadata = self.snapshot.get_gwclayer(workspace,name)
             layer = {
                 "name": [workspace,name],
                 "expireCache": int(self.geoserver.get_gwclayer_field(metadata,"expireCache") or 0)
@@ -0,0 +1,51 @@
+import os
+
+from . import settings
+from . import loggingconfig
+from .geoserver import Geoserver
+from .gwcseeder import GWCSeeder
+
+
+if __name__ == '__main__':
+    geoserver_url = os.environ["GEOSERVER_URL"]
+    geoserver_user = os.environ["GEOSERVER_USER"]
+    geoserver_password = os.environ["GEOSERVER_PASSWORD"]
+    geoserver_ssl_verify = os.environ.get("GEOSERVER_SSL_VERIFY","true").lower() == "true"
+    requestheaders = settings.GET_REQUEST_HEADERS("GEOSERVER_REQUEST_HEADERS")
+    #the urls of the other geoserver nodes sharing the gwc tile storage, separated by ','
+    geoserver_nodes = [url.strip() for url in os.environ.get("GEOSERVER_NODES","").split(",") if url.strip()]
+
+    #the layers to seed, separated by ','. for example: "ws1:layer1,ws2:layer2"
+    layers = [l.strip().split(":",1) for l in os.environ.get("SEED_LAYERS","").split(",") if l.strip()]
+    if not layers:
+        raise Exception("Missing the layers to seed")
+    gridsets = [g.strip() for g in os.environ.get("SEED_GRIDSETS","").split(",") if g.strip()] or settings.GWC_GRIDSETS
+    zoomstart = int(os.environ.get("SEED_ZOOMSTART",0))
+    zoomstop = int(os.environ["SEED_ZOOMSTOP"]) if os.environ.get("SEED_ZOOMSTOP") else None
+    #the bbox to seed, "minx,miny,maxx,maxy" in SEED_BBOX_CRS; seed the latlon bbox of the layer if empty
+    bbox = [float(c) for c in os.environ["SEED_BBOX"].split(",")] if os.environ.get("SEED_BBOX") else None
+    bbox_crs = os.environ.get("SEED_BBOX_CRS","EPSG:4326")
+    format = os.environ.get("SEED_FORMAT","image/png")
+    seedtype = os.environ.get("SEED_TYPE","seed")
+    style = os.environ.get("SEED_STYLE")
+
+    geoservers = [Geoserver(url,geoserver_user,geoserver_password,headers=requestheaders,ssl_verify=geoserver_ssl_verify) for url in [geoserver_url] + geoserver_nodes]
+    seeder = GWCSeeder(geoservers)
+    for workspace,layername in layers:
+        seeder.plan(
+            workspace,
+            layername,
+            gridsets=gridsets,
+            zoomstart=zoomstart,
+            zoomstop=zoomstop,
+            bbox=bbox,
+            srs=bbox_crs,
+            format=format,
+            type=seedtype,
+            parameters={"STYLES":style} if style else None
+        )
+    progress = seeder.seed()
+    print("Seeded {} tiles in {:.0f} seconds({:.1f} tiles/sec), {} seed requests, {} failed.".format(progress["tilesdone"],progress["seconds"],progress["rate"],progress["requests"],progress["failed"]))
+    for request in seeder.requests:
+        if request.message:
+            print("{} : {}".format(request,request.message))
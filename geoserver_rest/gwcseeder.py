@@ -0,0 +1,274 @@
+import time
+import logging
+import collections
+
+from .mixins.gwc import SEED_ABORTED,SEED_PENDING,SEED_RUNNING
+from . import crs
+from . import settings
+from . import utils
+
+logger = logging.getLogger(__name__)
+
+class SeedRequest(object):
+    """
+    A partition of a seeding job, submitted to GWC as one seed request
+    bbox: the bbox in the gridset crs
+    tiles: the planned tiles of the request
+    """
+    PENDING = "Pending"
+    RUNNING = "Running"
+    DONE = "Done"
+    ABORTED = "Aborted"
+    FAILED = "Failed"
+
+    def __init__(self,workspace,layername,gridset,zoomstart,zoomstop,bbox,tiles,format="image/png",type="seed",parameters=None):
+        self.workspace = workspace
+        self.layername = layername
+        self.gridset = gridset
+        self.zoomstart = zoomstart
+        self.zoomstop = zoomstop
+        self.bbox = bbox
+        self.tiles = tiles
+        self.format = format
+        self.type = type
+        self.parameters = parameters
+        self.status = self.PENDING
+        #the index of the geoserver node running the request
+        self.node = None
+        #the ids of the gwc seed tasks running the request
+        self.taskids = None
+        self.tilesdone = 0
+        self.starttime = None
+        self.endtime = None
+        self.message = None
+
+    def __str__(self):
+        return "{}:{}(gridset={},zoom={}-{},bbox={},tiles={})".format(self.workspace,self.layername,self.gridset,self.zoomstart,self.zoomstop,self.bbox,self.tiles)
+
+class GWCSeeder(object):
+    """
+    Plan the seeding jobs of the gwc layers and run them on the geoserver nodes.
+    A seeding job(layer,gridset,zoom range and bbox) is split into seed requests of at most 'max_tiles' tiles,
+    by zoom ranges first and then by the tile aligned bbox partitions of a zoom level.
+    The seed requests are submitted to the nodes with free seed task slots, each request takes 'threadcount' slots;
+    the gwc seed status of each node is polled to find the finished requests and the free slots,
+    the seed tasks not submitted by the seeder also take the slots.
+    geoservers: the geoserver nodes sharing the gwc tile storage, a Geoserver or a list of Geoservers
+    progress_callback: called with the progress(see 'progress') after each poll if not None
+    """
+    #the partitions of a zoom level are shrunk by this ratio of the tile size, otherwise gwc also seeds the tiles sharing the partition boundary
+    SHRINK_RATIO = 1e-6
+
+    def __init__(self,geoservers,max_tasks=None,threadcount=None,max_tiles=None,poll_interval=None,progress_callback=None):
+        self.geoservers = list(geoservers) if isinstance(geoservers,(list,tuple)) else [geoservers]
+        self.max_tasks = max_tasks or settings.SEED_MAX_TASKS_PER_NODE
+        self.threadcount = min(threadcount or settings.SEED_THREAD_COUNT,self.max_tasks)
+        self.max_tiles = max_tiles or settings.SEED_MAX_TILES
+        self.poll_interval = settings.SEED_POLL_INTERVAL if poll_interval is None else poll_interval
+        self.progress_callback = progress_callback
+        self.requests = []
+        self.starttime = None
+        #the gwc seed task ids already seen on each node, used to find the seed tasks created by a submitted request
+        self._seen_taskids = [set() for g in self.geoservers]
+
+    def plan(self,workspace,layername,gridsets=None,zoomstart=0,zoomstop=None,bbox=None,srs="EPSG:4326",format="image/png",type="seed",parameters=None):
+        """
+        Plan the seeding job of the layer, return the planned seed requests
+        gridsets: the gridsets to seed, settings.GWC_GRIDSETS if None
+        zoomstop: the max zoom level of the gridset if None
+        bbox: the bbox(minx,miny,maxx,maxy) in srs, the latlon bbox of the layer if None
+        type: seed or reseed
+        """
+        geoserver = self.geoservers[0]
+        if bbox is None:
+            bbox = geoserver.get_layer_latlonbbox(workspace,layername)
+            srs = "EPSG:4326"
+        requests = []
+        for gridset in gridsets or settings.GWC_GRIDSETS:
+            gridsetutil = geoserver.get_gridsetutil(gridset)
+            gridset_bbox = gridsetutil.clip_bbox(crs.transform_bbox(srs,gridsetutil.srs,bbox))
+            if not gridset_bbox:
+                logger.warning("The bbox({}) of the layer({}:{}) is outside of the gridset({}), ignored".format(bbox,workspace,layername,gridset))
+                continue
+            stop = gridsetutil.maxzoom if zoomstop is None else min(zoomstop,gridsetutil.maxzoom)
+            for start,end,partition,tiles in self._partition(gridsetutil,gridset_bbox,zoomstart,stop):
+                requests.append(SeedRequest(workspace,layername,gridset,start,end,partition,tiles,format=format,type=type,parameters=parameters))
+
+        self.requests.extend(requests)
+        logger.debug("Plan {} seed requests with {} tiles for the layer({}:{})".format(len(requests),sum(r.tiles for r in requests),workspace,layername))
+        return requests
+
+    def _partition(self,gridsetutil,bbox,zoomstart,zoomstop):
+        """
+        Split the seeding job into partitions of at most max_tiles tiles
+        Return a generator of (zoomstart,zoomstop,bbox,tiles)
+        """
+        start = zoomstart
+        tiles = 0
+        for zoom in range(zoomstart,zoomstop + 1):
+            count = gridsetutil.get_tile_count(bbox,zoom)
+            if tiles and tiles + count > self.max_tiles:
+                yield (start,zoom - 1,bbox,tiles)
+                start = zoom
+                tiles = 0
+            if count > self.max_tiles:
+                yield from self._split(gridsetutil,bbox,zoom)
+                start = zoom + 1
+            else:
+                tiles += count
+        if tiles:
+            yield (start,zoomstop,bbox,tiles)
+
+    def _split(self,gridsetutil,bbox,zoom):
+        """
+        Split the zoom level into the tile aligned bbox partitions, rows of tiles first and then columns if a row has too many tiles
+        Return a generator of (zoom,zoom,bbox,tiles)
+        """
+        minx,miny,maxx,maxy = gridsetutil.tile_range(bbox,zoom)
+        columns = maxx - minx + 1
+        if columns <= self.max_tiles:
+            xstep,ystep = columns,max(1,self.max_tiles // columns)
+        else:
+            xstep,ystep = self.max_tiles,1
+        width,height = gridsetutil.levels[zoom][:2]
+        for y in range(miny,maxy + 1,ystep):
+            lasty = min(y + ystep - 1,maxy)
+            for x in range(minx,maxx + 1,xstep):
+                lastx = min(x + xstep - 1,maxx)
+                left,bottom = gridsetutil.tile_bbox(zoom,x,lasty)[:2]
+                right,top = gridsetutil.tile_bbox(zoom,lastx,y)[2:]
+                partition = [
+                    max(bbox[0],left + width * self.SHRINK_RATIO),
+                    max(bbox[1],bottom + height * self.SHRINK_RATIO),
+                    min(bbox[2],right - width * self.SHRINK_RATIO),
+                    min(bbox[3],top - height * self.SHRINK_RATIO)
+                ]
+                yield (zoom,zoom,partition,(lastx - x + 1) * (lasty - y + 1))
+
+    def _submit(self,node,request):
+        geoserver = self.geoservers[node]
+        try:
+            geoserver.seed_gwclayer(
+                request.workspace,
+                request.layername,
+                gridset=request.gridset,
+                zoomstart=request.zoomstart,
+                zoomstop=request.zoomstop,
+                bbox=request.bbox,
+                format=request.format,
+                type=request.type,
+                threadcount=self.threadcount,
+                parameters=request.parameters
+            )
+            request.node = node
+            request.starttime = time.time()
+            #the seed tasks of the layer which were not seen before are created by the request
+            taskids = set(t["id"] for t in geoserver.list_seedtasks(request.workspace,request.layername)) - self._seen_taskids[node]
+        except Exception as ex:
+            request.status = SeedRequest.FAILED
+            request.message = str(ex)
+            logger.error("Failed to submit the seed request {} to the node({}).{}".format(request,geoserver.geoserver_url,str(ex)))
+            return
+
+        self._seen_taskids[node].update(taskids)
+        request.taskids = taskids
+        if taskids:
+            request.status = SeedRequest.RUNNING
+        else:
+            #the seed tasks were already finished
+            request.status = SeedRequest.DONE
+            request.tilesdone = request.tiles
+            request.endtime = time.time()
+        logger.debug("Submit the seed request {} to the node({}), seed tasks={}".format(request,geoserver.geoserver_url,taskids))
+
+    def _update(self,node,seedtasks,running):
+        """
+        Update the status of the running requests on the node with the gwc seed tasks of the node
+        """
+        seedtasks = dict((t["id"],t) for t in seedtasks)
+        self._seen_taskids[node].update(seedtasks.keys())
+        for request in running:
+            if request.node != node or request.status != SeedRequest.RUNNING:
+                continue
+            tasks = [seedtasks[i] for i in request.taskids if i in seedtasks]
+            if any(t["status"] == SEED_ABORTED for t in tasks):
+                request.status = SeedRequest.ABORTED
+                request.message = "The seed tasks were aborted"
+                request.endtime = time.time()
+            elif any(t["status"] in (SEED_PENDING,SEED_RUNNING) for t in tasks):
+                #a finished seed task is removed from the gwc seed status, keep the done tiles
+                request.tilesdone = max(request.tilesdone,min(request.tiles,sum(t["tilesDone"] for t in tasks)))
+            else:
+                request.status = SeedRequest.DONE
+                request.tilesdone = request.tiles
+                request.endtime = time.time()
+
+    def progress(self):
+        """
+        Return the progress of the seeding
+        {"requests":n,"pending":n,"running":n,"done":n,"failed":n,"tiles":n,"tilesdone":n,"seconds":seconds,"rate":tiles per second,"eta":seconds}
+        the failed requests include the aborted requests; eta is None if no tiles are seeded yet
+        """
+        counts = collections.Counter(r.status for r in self.requests)
+        tiles = sum(r.tiles for r in self.requests)
+        tilesdone = sum(r.tilesdone for r in self.requests)
+        remaining = sum(r.tiles - r.tilesdone for r in self.requests if r.status in (SeedRequest.PENDING,SeedRequest.RUNNING))
+        seconds = (time.time() - self.starttime) if self.starttime else 0
+        rate = tilesdone / seconds if seconds else 0
+        return {
+            "requests": len(self.requests),
+            "pending": counts[SeedRequest.PENDING],
+            "running": counts[SeedRequest.RUNNING],
+            "done": counts[SeedRequest.DONE],
+            "failed": counts[SeedRequest.FAILED] + counts[SeedRequest.ABORTED],
+            "tiles": tiles,
+            "tilesdone": tilesdone,
+            "seconds": seconds,
+            "rate": rate,
+            "eta": (remaining / rate) if rate else (0 if not remaining else None)
+        }
+
+    def _report(self,progress):
+        logger.info("Seeding progress: {}/{} tiles({:.1f}%), {:.1f} tiles/sec, requests(done={},running={},pending={},failed={}), ETA {}".format(
+            progress["tilesdone"],
+            progress["tiles"],
+            progress["tilesdone"] * 100 / progress["tiles"] if progress["tiles"] else 100,
+            progress["rate"],
+            progress["done"],
+            progress["running"],
+            progress["pending"],
+            progress["failed"],
+            "unknown" if progress["eta"] is None else (utils.format_timedelta(int(progress["eta"])) or "0S")
+        ))
+        if self.progress_callback:
+            self.progress_callback(progress)
+
+    def seed(self):
+        """
+        Run the planned seed requests until all of them are finished, return the final progress
+        """
+        pending = collections.deque(r for r in self.requests if r.status == SeedRequest.PENDING)
+        running = [r for r in self.requests if r.status == SeedRequest.RUNNING]
+        self.starttime = time.time()
+        while True:
+            for node,geoserver in enumerate(self.geoservers):
+                try:
+                    seedtasks = geoserver.list_seedtasks()
+                except Exception as ex:
+                    logger.error("Failed to get the seed status of the node({}).{}".format(geoserver.geoserver_url,str(ex)))
+                    continue
+                self._update(node,seedtasks,running)
+                slots = self.max_tasks - sum(1 for t in seedtasks if t["status"] in (SEED_PENDING,SEED_RUNNING))
+                while pending and slots >= self.threadcount:
+                    request = pending.popleft()
+                    self._submit(node,request)
+                    if request.status == SeedRequest.RUNNING:
+                        running.append(request)
+                    slots -= self.threadcount
+
+            running = [r for r in running if r.status == SeedRequest.RUNNING]
+            progress = self.progress()
+            self._report(progress)
+            if not pending and not running:
+                return progress
+            time.sleep(self.poll_interval)
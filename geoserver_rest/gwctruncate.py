@@ -0,0 +1,42 @@
+import os
+
+from . import settings
+from . import loggingconfig
+from .geoserver import Geoserver
+from .gwctruncater import GWCTruncater
+
+
+if __name__ == '__main__':
+    geoserver_url = os.environ["GEOSERVER_URL"]
+    geoserver_user = os.environ["GEOSERVER_USER"]
+    geoserver_password = os.environ["GEOSERVER_PASSWORD"]
+    geoserver_ssl_verify = os.environ.get("GEOSERVER_SSL_VERIFY","true").lower() == "true"
+    requestheaders = settings.GET_REQUEST_HEADERS("GEOSERVER_REQUEST_HEADERS")
+
+    #the layers to truncate, separated by ','. for example: "ws1:layer1,ws2:layer2"
+    layers = [l.strip().split(":",1) for l in os.environ.get("TRUNCATE_LAYERS","").split(",") if l.strip()]
+    if not layers:
+        raise Exception("Missing the layers to truncate")
+    #the edited bboxes, "minx,miny,maxx,maxy" separated by ';', or a file with one bbox per line; truncate the whole layers if both are empty
+    bboxes = [b.strip() for b in os.environ.get("TRUNCATE_BBOXES","").split(";") if b.strip()]
+    if os.environ.get("TRUNCATE_BBOXES_FILE"):
+        with open(os.environ["TRUNCATE_BBOXES_FILE"],'r') as f:
+            bboxes.extend(line.strip() for line in f if line.strip())
+    bboxes = [[float(c) for c in b.split(",")] for b in bboxes] or None
+    bbox_crs = os.environ.get("TRUNCATE_BBOX_CRS","EPSG:4326")
+    gridsets = [g.strip() for g in os.environ.get("TRUNCATE_GRIDSETS","").split(",") if g.strip()] or None
+    zoomstart = int(os.environ.get("TRUNCATE_ZOOMSTART",0))
+    zoomstop = int(os.environ["TRUNCATE_ZOOMSTOP"]) if os.environ.get("TRUNCATE_ZOOMSTOP") else None
+    formats = [f.strip() for f in os.environ.get("TRUNCATE_FORMATS","").split(",") if f.strip()] or None
+    styles = [s.strip() for s in os.environ.get("TRUNCATE_STYLES","").split(",") if s.strip()] or None
+
+    geoserver = Geoserver(geoserver_url,geoserver_user,geoserver_password,headers=requestheaders,ssl_verify=geoserver_ssl_verify)
+    truncater = GWCTruncater(geoserver)
+    truncater.plan_layers(layers,bboxes=bboxes,srs=bbox_crs,gridsets=gridsets,zoomstart=zoomstart,zoomstop=zoomstop,formats=formats,styles=styles)
+    summary = truncater.truncate()
+    print("Ran {} truncate requests for {} layers in {:.2f} seconds, {} tiles truncated, {} failed.".format(summary["requests"],len(layers),summary["seconds"],summary["tiles"],summary["failed"]))
+    for workspace,layername,message in truncater.errors:
+        print("{}:{} : {}".format(workspace,layername,message))
+    for request in truncater.requests:
+        if request.message:
+            print("{} : {}".format(request,request.message))
@@ -0,0 +1,160 @@
+import logging
+import concurrent.futures
+
+from .gwcseeder import SeedRequest,GWCSeeder
+from . import crs
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class GWCTruncater(object):
+    """
+    Truncate the cached tiles of the gwc layers in the edited areas, instead of the whole layers.
+    The edited bboxes of a layer are merged zoom level by zoom level, from the highest zoom level to the lowest zoom level:
+    two bboxes are merged if the tiles covered by the merged bbox are not more than (1 + max_waste) times of the tiles covered by them,
+    and each bbox is truncated by one truncate request in the zoom levels before it is merged into a bigger bbox.
+    The layers are planned concurrently. Each truncate request creates a gwc seed task, so the truncate requests are run by a GWCSeeder,
+    which only submits a request when the geoserver has a free seed task slot(see GWCSeeder).
+    max_tasks: the maximum seed tasks running on the geoserver, default is settings.SEED_MAX_TASKS_PER_NODE
+    progress_callback: called with the progress of the seeder after each poll if not None
+    """
+    def __init__(self,geoserver,concurrency=None,max_waste=None,max_tasks=None,poll_interval=None,progress_callback=None):
+        self.geoserver = geoserver
+        self.concurrency = concurrency or settings.TRUNCATE_CONCURRENCY
+        self.max_waste = settings.TRUNCATE_MAX_WASTE if max_waste is None else max_waste
+        self.seeder = GWCSeeder(
+            geoserver,
+            max_tasks=max_tasks,
+            threadcount=1,
+            poll_interval=settings.TRUNCATE_POLL_INTERVAL if poll_interval is None else poll_interval,
+            progress_callback=progress_callback
+        )
+        #shared with the seeder
+        self.requests = self.seeder.requests
+        #the layers failed to plan: [(workspace,layername,message)]
+        self.errors = []
+
+    def plan(self,workspace,layername,bboxes=None,srs="EPSG:4326",gridsets=None,zoomstart=0,zoomstop=None,formats=None,styles=None):
+        """
+        Plan the truncate requests of the layer, return the planned truncate requests
+        bboxes: the edited bboxes(minx,miny,maxx,maxy) in srs, truncate the whole gridset subsets of the layer if None
+        gridsets: the gridsets of the gwc layer if None
+        zoomstop: the max zoom level of the gridset if None
+        formats: the mime formats of the gwc layer if None
+        styles: the styles whose tiles are truncated, the tiles of the default style if None
+        """
+        requests = self._plan(workspace,layername,bboxes=bboxes,srs=srs,gridsets=gridsets,zoomstart=zoomstart,zoomstop=zoomstop,formats=formats,styles=styles)
+        self.requests.extend(requests)
+        return requests
+
+    def plan_layers(self,layers,**kwargs):
+        """
+        Plan the truncate requests of the layers concurrently, the failed layers are added to 'errors'
+        layers: the list of (workspace,layername)
+        kwargs: the keyword arguments of 'plan'
+        Return the planned truncate requests
+        """
+        requests = []
+        self.geoserver.set_poolsize(self.concurrency)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(self._plan,workspace,layername,**kwargs) for workspace,layername in layers]
+            for (workspace,layername),future in zip(layers,futures):
+                try:
+                    requests.extend(future.result())
+                except Exception as ex:
+                    logger.error("Failed to plan the truncate requests of the layer({}:{}).{}".format(workspace,layername,str(ex)))
+                    self.errors.append((workspace,layername,str(ex)))
+        self.requests.extend(requests)
+        return requests
+
+    def _plan(self,workspace,layername,bboxes=None,srs="EPSG:4326",gridsets=None,zoomstart=0,zoomstop=None,formats=None,styles=None):
+        layerdata = self.geoserver.get_gwclayer(workspace,layername)
+        gridsubsets = dict((g["name"],g) for g in self.geoserver.get_gwclayer_field(layerdata,"gridSubsets"))
+        formats = formats or self.geoserver.get_gwclayer_field(layerdata,"mimeFormats")
+        parameters = [{"STYLES":style} for style in styles] if styles else [None]
+        requests = []
+        for gridset in gridsets or list(gridsubsets.keys()):
+            if gridset not in gridsubsets:
+                logger.warning("The gridset({}) is not configured for the gwc layer({}:{}), ignored".format(gridset,workspace,layername))
+                continue
+            gridsetutil = self.geoserver.get_gridsetutil(gridset)
+            start = max(zoomstart,gridsubsets[gridset].get("zoomStart") or 0)
+            stop = gridsetutil.maxzoom if zoomstop is None else min(zoomstop,gridsetutil.maxzoom)
+            if gridsubsets[gridset].get("zoomStop") is not None:
+                stop = min(stop,gridsubsets[gridset]["zoomStop"])
+            if start > stop:
+                continue
+
+            if bboxes is None:
+                #the tiles of the whole layer truncations are not counted
+                ranges = [(start,stop,None,0)]
+            else:
+                gridset_bboxes = [b for b in (gridsetutil.clip_bbox(b) for b in crs.transform_bboxes(srs,gridsetutil.srs,bboxes)) if b]
+                if not gridset_bboxes:
+                    continue
+                ranges = self._ranges(gridsetutil,gridset_bboxes,start,stop)
+
+            for format in formats:
+                for params in parameters:
+                    for rangestart,rangestop,bbox,tiles in ranges:
+                        requests.append(SeedRequest(workspace,layername,gridset,rangestart,rangestop,bbox,tiles,format=format,type="truncate",parameters=params))
+
+        logger.debug("Plan {} truncate requests for the layer({}:{})".format(len(requests),workspace,layername))
+        return requests
+
+    def _ranges(self,gridsetutil,bboxes,zoomstart,zoomstop):
+        """
+        Compute the truncation ranges of the edited bboxes.
+        The bboxes are merged from the highest zoom level to the lowest zoom level; a bbox is truncated in the zoom levels
+        from the level where it is merged into a bigger bbox(exclusive) to the level where it was merged(inclusive),
+        so the number of the truncation ranges is less than twice of the number of the bboxes.
+        Return the list of (zoomstart,zoomstop,bbox,tiles)
+        """
+        ranges = []
+        def close(cluster,zoom):
+            if zoom <= cluster[2]:
+                ranges.append((zoom,cluster[2],cluster[0],sum(gridsetutil.get_tile_count(cluster[0],z) for z in range(zoom,cluster[2] + 1))))
+
+        #the clusters of the bboxes: [bbox,tiles in the zoom level,the zoom level where the cluster was merged]
+        clusters = [[bbox,0,zoomstop] for bbox in bboxes]
+        for zoom in range(zoomstop,zoomstart - 1,-1):
+            for cluster in clusters:
+                cluster[1] = gridsetutil.get_tile_count(cluster[0],zoom)
+            merged = True
+            while merged:
+                merged = False
+                result = []
+                for cluster in sorted(clusters,key=lambda c:(c[0][0],c[0][1])):
+                    for i,other in enumerate(result):
+                        bbox = [min(other[0][0],cluster[0][0]),min(other[0][1],cluster[0][1]),max(other[0][2],cluster[0][2]),max(other[0][3],cluster[0][3])]
+                        tiles = gridsetutil.get_tile_count(bbox,zoom)
+                        if tiles <= (1 + self.max_waste) * (other[1] + cluster[1]):
+                            close(other,zoom + 1)
+                            close(cluster,zoom + 1)
+                            result[i] = [bbox,tiles,zoom]
+                            merged = True
+                            break
+                    else:
+                        result.append(cluster)
+                clusters = result
+
+        for cluster in clusters:
+            close(cluster,zoomstart)
+        return ranges
+
+    def truncate(self):
+        """
+        Run the planned truncate requests until all of them are finished, GWC truncates the tiles in the seed tasks.
+        Return the summary: {"requests":n,"done":n,"failed":n,"tiles":n,"seconds":seconds}
+        tiles: the planned tiles of the finished truncate requests, the whole layer truncations are not counted
+        """
+        progress = self.seeder.seed()
+        summary = {
+            "requests": progress["requests"],
+            "done": progress["done"],
+            "failed": progress["failed"],
+            "tiles": sum(r.tiles for r in self.requests if r.status == SeedRequest.DONE),
+            "seconds": progress["seconds"]
+        }
+        logger.info("Run {} truncate requests in {:.2f} seconds, {} failed, {} tiles truncated".format(summary["requests"],summary["seconds"],summary["failed"],summary["tiles"]))
+        return summary
@@ -0,0 +1,106 @@
+import struct
+import logging
+
+from .exceptions import InvalidImage
+
+logger = logging.getLogger(__name__)
+
+#the maximum bytes read from the beginning of an image to find its dimension
+IMAGE_HEADER_LIMIT = 65536
+
+#the standalone jpeg markers which have no length
+JPEG_STANDALONE_MARKERS = (0x01,0xd0,0xd1,0xd2,0xd3,0xd4,0xd5,0xd6,0xd7,0xd8,0xd9)
+
+def image_format(format):
+    """
+    Return the image type of the mime type, for example: 'image/png; mode=8bit' => 'png'; return None if the type is not supported
+    """
+    if not format:
+        return None
+    format = format.split(";",1)[0].strip().lower()
+    format = format.rsplit("/",1)[-1]
+    if format.startswith("png"):
+        return "png"
+    elif format in ("jpeg","jpg","vnd.jpeg-png","vnd.jpeg-png8"):
+        return "jpeg"
+    elif format in ("gif","tiff","webp"):
+        return format
+    return None
+
+def _jpeg_size(data):
+    index = 2
+    while index + 4 <= len(data):
+        if data[index] != 0xff:
+            return None
+        marker = data[index + 1]
+        if marker == 0xff:
+            #fill byte
+            index += 1
+            continue
+        if marker in JPEG_STANDALONE_MARKERS:
+            index += 2
+            continue
+        if 0xc0 <= marker <= 0xcf and marker not in (0xc4,0xc8,0xcc):
+            #start of frame
+            if index + 9 > len(data):
+                return None
+            height,width = struct.unpack(">HH",data[index + 5:index + 9])
+            return (width,height)
+        index += 2 + struct.unpack(">H",data[index + 2:index + 4])[0]
+    return None
+
+def image_info(data):
+    """
+    Return (image type,width,height) of the image from its magic bytes and header;
+    the image type is None if not recognized, the width and height are None if not found in the data
+    """
+    data = bytes(data[:IMAGE_HEADER_LIMIT])
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(data) >= 24 and data[12:16] == b"IHDR":
+            return ("png",*struct.unpack(">II",data[16:24]))
+        return ("png",None,None)
+    elif data.startswith(b"\xff\xd8"):
+        return ("jpeg",*(_jpeg_size(data) or (None,None)))
+    elif data.startswith((b"GIF87a",b"GIF89a")):
+        if len(data) >= 10:
+            return ("gif",*struct.unpack("<HH",data[6:10]))
+        return ("gif",None,None)
+    elif data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8 " and len(data) >= 30:
+            width,height = struct.unpack("<HH",data[26:30])
+            return ("webp",width & 0x3fff,height & 0x3fff)
+        elif chunk == b"VP8L" and len(data) >= 25:
+            bits = struct.unpack("<I",data[21:25])[0]
+            return ("webp",(bits & 0x3fff) + 1,((bits >> 14) & 0x3fff) + 1)
+        elif chunk == b"VP8X" and len(data) >= 30:
+            return ("webp",int.from_bytes(data[24:27],"little") + 1,int.from_bytes(data[27:30],"little") + 1)
+        return ("webp",None,None)
+    elif data.startswith((b"II*\x00",b"MM\x00*")):
+        #the dimension of tiff is in the image file directory, not checked
+        return ("tiff",None,None)
+    return (None,None,None)
+
+def validate_image(data,format=None,width=None,height=None):
+    """
+    Check the magic bytes and the dimension of the image in memory, raise InvalidImage if failed.
+    Only the first IMAGE_HEADER_LIMIT bytes are required.
+    format: the expected mime type, not checked if it is not a supported image type
+    width,height: the expected dimension, not checked if None
+    Return (image type,width,height)
+    """
+    expected = image_format(format)
+    info = image_info(data)
+    if not expected:
+        return info
+    if not data:
+        raise InvalidImage("The image is empty")
+    if info[0] != expected:
+        raise InvalidImage("Expect a {} image, but got {}".format(expected,"a {} image".format(info[0]) if info[0] else "an unrecognized data"))
+    if info[1] is None:
+        if info[0] in ("png","jpeg","gif"):
+            raise InvalidImage("The {} image is broken, can't find its dimension".format(info[0]))
+        return info
+    if (width and info[1] != width) or (height and info[2] != height):
+        raise InvalidImage("Expect a {} x {} image, but got a {} x {} image".format(width or "*",height or "*",info[1],info[2]))
+    return info
@@ -0,0 +1,173 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+import threading
+
+from . import settings
+from . import timezone
+
+logger = logging.getLogger(__name__)
+
+class LayerFingerprints(object):
+    """
+    The fingerprints of the layers and the results of their last tests, persisted between the healthchecks.
+    A layer is re-tested if its fingerprint is changed, its last tests reported errors, or it is in the rotating fraction of this run;
+    otherwise the results of its last tests are carried forward.
+    The rotating fraction splits the layers into 1/fraction buckets by the hash of the layer key, and one bucket is re-tested in each run,
+    so each unchanged layer is re-tested at least once every 1/fraction runs.
+
+    layers: {layerkey: {"fingerprint":fingerprint,"tested":time,"reportrows":[row],"warningrows":[row]}}
+    """
+    FILE_VERSION = 1
+
+    def __init__(self,data_dir=None,fraction=None):
+        """
+        data_dir: the geoserver data dir, the modification time of the layer files are included in the fingerprint if not None
+        fraction: the fraction of the unchanged layers re-tested in each run, default is settings.HEALTHCHECK_RETEST_FRACTION
+        """
+        self.data_dir = data_dir if data_dir and os.path.isdir(data_dir) else None
+        self.fraction = settings.HEALTHCHECK_RETEST_FRACTION if fraction is None else fraction
+        self.run = 0
+        self.previous = {}
+        self.layers = {}
+        self.tested = 0
+        self.carriedforward = 0
+        self._lock = threading.Lock()
+
+    @property
+    def buckets(self):
+        return max(1,round(1 / self.fraction)) if self.fraction > 0 else 0
+
+    def load(self,path):
+        """
+        Load the fingerprints saved by the previous run, all the layers are tested if the file doesn't exist or can't be used.
+        Return True if loaded
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path,'r') as f:
+                data = json.loads(f.read())
+            if data.get("version") != self.FILE_VERSION:
+                logger.info("The version of the layer fingerprints file({}) is not supported, ignore it.".format(path))
+                return False
+            self.run = data["run"] + 1
+            self.previous = data["layers"]
+            return True
+        except Exception as ex:
+            logger.error("Failed to load the layer fingerprints file({}).{}".format(path,str(ex)))
+            return False
+
+    def save(self,path):
+        """
+        Save the fingerprints of the layers checked in this run, the layers which were not checked are removed
+        """
+        data = {
+            "version": self.FILE_VERSION,
+            "run": self.run,
+            "layers": self.layers
+        }
+        tmpfile = "{}.tmp".format(path)
+        with open(tmpfile,'w') as f:
+            f.write(json.dumps(data))
+        os.replace(tmpfile,path)
+
+    def _datadir_files(self,detailtask):
+        """
+        Return the files of the layer in the data dir
+        """
+        workspace = detailtask.workspace
+        workspacedir = os.path.join(self.data_dir,"workspaces",workspace) if workspace else self.data_dir
+        files = []
+        if hasattr(detailtask,"layergroup"):
+            files.append(os.path.join(workspacedir,"layergroups","{}.xml".format(detailtask.layergroup)))
+        else:
+            for store,layername in (
+                (getattr(detailtask,"datastore",None),getattr(detailtask,"featuretype",None)),
+                (getattr(detailtask,"coveragestore",None),getattr(detailtask,"coverage",None)),
+                (getattr(detailtask,"wmsstore",None),getattr(detailtask,"layername",None))
+            ):
+                if not layername:
+                    continue
+                if store:
+                    files.append(os.path.join(workspacedir,store))
+                    files.append(os.path.join(workspacedir,store,layername))
+                break
+        #the styles of the layer
+        result = detailtask.result or {}
+        for style in [result.get("defaultStyle"),*(result.get("alternativeStyles") or [])]:
+            if not style:
+                continue
+            if ":" in style:
+                w,style = style.split(":",1)
+                stylesdir = os.path.join(self.data_dir,"workspaces",w,"styles")
+            else:
+                stylesdir = os.path.join(self.data_dir,"styles")
+            files.append(os.path.join(stylesdir,"{}.xml".format(style)))
+            files.append(os.path.join(stylesdir,"{}.sld".format(style)))
+        return files
+
+    def _datadir_mtimes(self,detailtask):
+        mtimes = []
+        for f in self._datadir_files(detailtask):
+            try:
+                if os.path.isdir(f):
+                    mtimes.extend((e.name,e.stat().st_mtime) for e in os.scandir(f) if e.is_file())
+                else:
+                    mtimes.append((os.path.basename(f),os.stat(f).st_mtime))
+            except FileNotFoundError as ex:
+                continue
+        mtimes.sort()
+        return mtimes
+
+    def fingerprint(self,detailtask):
+        """
+        Return the fingerprint of the layer from the metadata collected by its detail task(layer,styles and gwc),
+        the store detail, the data dir file modification times and the test settings
+        """
+        data = {
+            "layer": detailtask.result,
+            "store": getattr(detailtask,"storedetails",None),
+            "settings": [settings.TEST_FORMAT,settings.TEST_ZOOM,settings.GWC_GRIDSETS,settings.TEST_FEATURES_COUNT]
+        }
+        if self.data_dir:
+            data["datadir"] = self._datadir_mtimes(detailtask)
+        return hashlib.sha1(json.dumps(data,sort_keys=True,default=str).encode()).hexdigest()
+
+    def check(self,layerkey,fingerprint):
+        """
+        Return the previous entry of the layer if the results of its last tests can be carried forward;
+        otherwise return None and the layer should be re-tested
+        """
+        previous = self.previous.get(layerkey)
+        with self._lock:
+            if (
+                previous
+                and previous["fingerprint"] == fingerprint
+                and not any(row[2] == "Error" for row in previous["warningrows"])
+                and not (self.buckets and zlib.crc32(layerkey.encode()) % self.buckets == self.run % self.buckets)
+            ):
+                self.layers[layerkey] = previous
+                self.carriedforward += 1
+                return previous
+            self.layers[layerkey] = {"fingerprint":fingerprint,"tested":timezone.format(timezone.localtime(),pattern="%Y-%m-%d %H:%M:%S.%f"),"reportrows":[],"warningrows":[]}
+            self.tested += 1
+            return None
+
+    def add_reportrows(self,layerkey,rows):
+        with self._lock:
+            self.layers[layerkey]["reportrows"].extend(rows)
+
+    def add_warningrows(self,layerkey,rows):
+        with self._lock:
+            self.layers[layerkey]["warningrows"].extend(rows)
+
+    def stats(self):
+        return {
+            "run": self.run,
+            "tested_layers": self.tested,
+            "carriedforward_layers": self.carriedforward,
+            "retest_fraction": self.fraction
+        }
@@ -0,0 +1,256 @@
+import bisect
+import collections
+import threading
+import logging
+import os
+import tempfile
+import urllib.parse
+
+logger = logging.getLogger(__name__)
+
+#the upper bounds(seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120,300)
+
+def latency_bucket(latency):
+    """
+    Return the index of the histogram bucket of the latency(seconds)
+    """
+    return bisect.bisect_left(LATENCY_BUCKETS,latency)
+
+def endpoint_family(url):
+    """
+    Return the endpoint family of the url, for example:
+        rest/workspaces, rest/datastores, rest/featuretypes, gwc/rest, wms GetMap, wmts GetTile, wfs GetFeature
+    """
+    parsed = urllib.parse.urlparse(url)
+    path = parsed.path.rstrip("/")
+    parts = path.split("/")
+    if "/gwc/rest/" in path or path.endswith("/gwc/rest"):
+        return "gwc/rest"
+    elif "/gwc/service/wmts" in path.lower():
+        service = "wmts"
+    elif "rest" in parts:
+        #the last collection in the path: rest/{collection}/{name}/{collection}/{name}...
+        names = parts[parts.index("rest") + 1:]
+        if not names:
+            return "rest"
+        name = names[(len(names) - 1) // 2 * 2]
+        return "rest/{}".format(name.rsplit(".",1)[0] if name.endswith((".json",".xml",".html",".sld")) else name)
+    else:
+        service = None
+
+    params = dict((k.lower(),v) for k,v in urllib.parse.parse_qsl(parsed.query))
+    service = service or (params.get("service") or parts[-1]).lower()
+    if service not in ("wms","wmts","wfs","wcs"):
+        return "other"
+    return "{} {}".format(service,params.get("request") or "-")
+
+class EndpointMetrics(object):
+    """
+    The metrics of the requests of one endpoint family
+    """
+    __slots__ = ("buckets","count","latency","bytes_in","bytes_out","statuses","retries")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.statuses = collections.Counter()
+        self.retries = 0
+
+    def percentile(self,p):
+        """
+        Return the estimated latency percentile, the upper bound of the bucket which contains the percentile
+        """
+        if not self.count:
+            return None
+        rank = self.count * p
+        total = 0
+        for i,n in enumerate(self.buckets):
+            total += n
+            if total >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float("inf")
+
+    def stats(self):
+        return {
+            "requests": self.count,
+            "latency": round(self.latency,3),
+            "avg_latency": round(self.latency / self.count,3) if self.count else None,
+            "p50_latency": self.percentile(0.5),
+            "p95_latency": self.percentile(0.95),
+            "p99_latency": self.percentile(0.99),
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "statuses": dict((str(k),v) for k,v in self.statuses.items()),
+            "retries": self.retries,
+            "histogram": dict(("+Inf" if i == len(LATENCY_BUCKETS) else str(LATENCY_BUCKETS[i]),n) for i,n in enumerate(self.buckets) if n)
+        }
+
+class TaskMetrics(object):
+    """
+    The latency of the tasks grouped by the task category.
+    It is a writer of the report writer thread and only updated by that thread, so no lock is needed.
+    rows: (category,latency in seconds)
+    """
+    def __init__(self):
+        self.categories = collections.defaultdict(EndpointMetrics)
+
+    def writerows(self,rows):
+        for category,latency in rows:
+            metrics = self.categories[category]
+            metrics.count += 1
+            metrics.latency += latency
+            metrics.buckets[latency_bucket(latency)] += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _stats(metrics):
+        return {
+            "tasks": metrics.count,
+            "latency": round(metrics.latency,3),
+            "avg_latency": round(metrics.latency / metrics.count,3) if metrics.count else None,
+            "p50_latency": metrics.percentile(0.5),
+            "p95_latency": metrics.percentile(0.95),
+            "histogram": dict(("+Inf" if i == len(LATENCY_BUCKETS) else str(LATENCY_BUCKETS[i]),n) for i,n in enumerate(metrics.buckets) if n)
+        }
+
+    def stats(self):
+        return dict((category,self._stats(m)) for category,m in sorted(self.categories.items()))
+
+    @classmethod
+    def merge_stats(cls,statslist):
+        """
+        Merge the stats of several TaskMetrics, for example the stats of the shards of a healthcheck
+        """
+        buckets = dict(("+Inf" if i == len(LATENCY_BUCKETS) else str(LATENCY_BUCKETS[i]),i) for i in range(len(LATENCY_BUCKETS) + 1))
+        categories = collections.defaultdict(EndpointMetrics)
+        for stats in statslist:
+            for category,data in (stats or {}).items():
+                metrics = categories[category]
+                metrics.count += data["tasks"]
+                metrics.latency += data["latency"]
+                for k,n in data["histogram"].items():
+                    metrics.buckets[buckets[k]] += n
+        return dict((category,cls._stats(m)) for category,m in sorted(categories.items()))
+
+class RequestMetrics(object):
+    """
+    Thread-safe metrics of the requests sent by a geoserver client, grouped by the endpoint family:
+    latency histogram, bytes in and out, status codes and retries
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = collections.defaultdict(EndpointMetrics)
+
+    def record(self,method,url,status,latency,bytes_in=0,bytes_out=0):
+        """
+        status: the status code, or the exception class name if the request failed without response
+        """
+        family = endpoint_family(url)
+        bucket = latency_bucket(latency)
+        with self._lock:
+            metrics = self.endpoints[family]
+            metrics.count += 1
+            metrics.latency += latency
+            metrics.buckets[bucket] += 1
+            metrics.bytes_in += bytes_in or 0
+            metrics.bytes_out += bytes_out or 0
+            metrics.statuses[status] += 1
+
+    def retried(self,url):
+        with self._lock:
+            self.endpoints[endpoint_family(url)].retries += 1
+
+    def clear(self):
+        with self._lock:
+            self.endpoints.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict((family,m.stats()) for family,m in sorted(self.endpoints.items()))
+
+    @staticmethod
+    def merge_stats(statslist):
+        """
+        Merge the stats of several RequestMetrics, for example the stats of the shards of a healthcheck
+        """
+        buckets = dict(("+Inf" if i == len(LATENCY_BUCKETS) else str(LATENCY_BUCKETS[i]),i) for i in range(len(LATENCY_BUCKETS) + 1))
+        endpoints = collections.defaultdict(EndpointMetrics)
+        for stats in statslist:
+            for family,data in (stats or {}).items():
+                metrics = endpoints[family]
+                metrics.count += data["requests"]
+                metrics.latency += data["latency"]
+                metrics.bytes_in += data["bytes_in"]
+                metrics.bytes_out += data["bytes_out"]
+                metrics.retries += data["retries"]
+                metrics.statuses.update(data["statuses"])
+                for k,n in data["histogram"].items():
+                    metrics.buckets[buckets[k]] += n
+        return dict((family,m.stats()) for family,m in sorted(endpoints.items()))
+
+    def to_prometheus(self,labels=None):
+        """
+        Return the metrics in the prometheus text format
+        labels: the extra labels added to all the metrics
+        """
+        def _labels(**kwargs):
+            l = dict(labels or {},**kwargs)
+            return "{{{}}}".format(",".join("{}=\"{}\"".format(k,str(v).replace("\\","\\\\").replace("\"","\\\"")) for k,v in l.items()))
+
+        lines = []
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            lines.append("# HELP geoserver_request_duration_seconds The latency of the requests sent to geoserver")
+            lines.append("# TYPE geoserver_request_duration_seconds histogram")
+            for family,m in endpoints:
+                total = 0
+                for i,n in enumerate(m.buckets):
+                    total += n
+                    lines.append("geoserver_request_duration_seconds_bucket{} {}".format(_labels(endpoint=family,le="+Inf" if i == len(LATENCY_BUCKETS) else LATENCY_BUCKETS[i]),total))
+                lines.append("geoserver_request_duration_seconds_sum{} {}".format(_labels(endpoint=family),m.latency))
+                lines.append("geoserver_request_duration_seconds_count{} {}".format(_labels(endpoint=family),m.count))
+
+            lines.append("# HELP geoserver_requests_total The requests sent to geoserver by status code")
+            lines.append("# TYPE geoserver_requests_total counter")
+            for family,m in endpoints:
+                for status,n in sorted(m.statuses.items(),key=lambda o:str(o[0])):
+                    lines.append("geoserver_requests_total{} {}".format(_labels(endpoint=family,status=status),n))
+
+            for name,attr,help in (
+                ("geoserver_request_received_bytes_total","bytes_in","The bytes received from geoserver"),
+                ("geoserver_request_sent_bytes_total","bytes_out","The bytes sent to geoserver"),
+                ("geoserver_request_retries_total","retries","The retried requests")
+            ):
+                lines.append("# HELP {} {}".format(name,help))
+                lines.append("# TYPE {} counter".format(name))
+                for family,m in endpoints:
+                    lines.append("{}{} {}".format(name,_labels(endpoint=family),getattr(m,attr)))
+
+        lines.append("")
+        return "\n".join(lines)
+
+    def write_textfile(self,path,labels=None):
+        """
+        Write the metrics to a prometheus textfile for the textfile collector of node-exporter.
+        The file is replaced atomically, so the collector never reads a partial file
+        """
+        folder = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        fd,tmpfile = tempfile.mkstemp(dir=folder,prefix=".{}".format(os.path.basename(path)))
+        try:
+            with os.fdopen(fd,"w") as f:
+                f.write(self.to_prometheus(labels))
+            os.chmod(tmpfile,0o644)
+            os.replace(tmpfile,path)
+        except:
+            os.remove(tmpfile)
+            raise
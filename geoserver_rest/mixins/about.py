@@ -10,17 +10,25 @@ class AboutMixin(object):
     def get_version(self,component="geoserver"):
         if self.geoserver_url not in self.VERSIONS:
             res = self.get(self.version_url(),headers=self.accept_header("json"))
-            data = {}
-            for d in res.json().get("about",{}).get("resource") or []:
-                if isinstance(d["Version"],int):
-                    data[d["@name"].lower()] = [d["Version"]]
-                elif isinstance(d["Version"],float):
-                    data[d["@name"].lower()] = [int(i) for i in str(d["Version"]).split(".")]
-                else:
-                    data[d["@name"].lower()] = [int(i) for i in d["Version"].split(".")]
-
-            self.VERSIONS[self.geoserver_url] = data
+            self.VERSIONS[self.geoserver_url] = self._parse_version(res.json())
  
+        return self._get_component_version(component)
+
+    def _parse_version(self,versiondata):
+        """
+        Return a dict of (component,version list) from the json data returned by version_url
+        """
+        data = {}
+        for d in versiondata.get("about",{}).get("resource") or []:
+            if isinstance(d["Version"],int):
+                data[d["@name"].lower()] = [d["Version"]]
+            elif isinstance(d["Version"],float):
+                data[d["@name"].lower()] = [int(i) for i in str(d["Version"]).split(".")]
+            else:
+                data[d["@name"].lower()] = [int(i) for i in d["Version"].split(".")]
+        return data
+
+    def _get_component_version(self,component):
         if component:
             return self.VERSIONS[self.geoserver_url].get(component.lower()) or None
         else:
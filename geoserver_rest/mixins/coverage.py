@@ -29,20 +29,8 @@ class CoverageMixin(object):
             return "{}/ows?service=WCS&version={}&request=GetCapabilities".format(self.geoserver_url,version)
 
     def get_coveragecapabilities(self,version="1.3.0",outputfile=None):
-        while True:
-            attempts = 0
-            try:
-                attempts += 1
-                res = self.get(self.coveragecapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
-                break
-            except Exception as ex:
-                if attempts > 10:
-                    raise
-                elif "InvalidChunkLength" in str(ex):
-                    time.sleep(1)
-                    continue
-                else:
-                    raise
+        #the broken responses are retried by the http layer
+        res = self.get(self.coveragecapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
 
         if outputfile:
             output = open(outputfile,'wb')
@@ -59,14 +47,17 @@ class CoverageMixin(object):
         try:
             for data in res.iter_content(chunk_size = 1024):
                 output.write(data)
-            if attempts == 1:
-                logger.debug("Coverage capabilities was saved to {}".format(outputfile))
-            else:
-                logger.debug("Coverage capabilities was saved to {}, but tried {} times.".format(outputfile,attempts))
+            logger.debug("Coverage capabilities was saved to {}".format(outputfile))
             return outputfile
         finally:
             output.close()
 
+    def get_coveragecapabilities_index(self,version="2.0.1"):
+        """
+        Return a CapabilitiesIndex of the coverages advertised by the WCS GetCapabilities document
+        """
+        return self._get_capabilities_index("WCS",self.coveragecapabilities_url(version=version))
+
     def has_coverage(self,workspace,layername,storename=None):
         return self.has(self.coverage_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
     
@@ -76,14 +67,20 @@ class CoverageMixin(object):
         Raise ResourceNotFound if not found
         """
         res = self.get(self.coverage_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
-        return res.json()["coverage"]
+        return self._parse_coverage(res.json())
+
+    def _parse_coverage(self,data):
+        return data["coverage"]
     
     def list_coverages(self,workspace,storename):
         """
         Return the list of layers in the store if storename is not null;otherwise return all layers in the workspace
         """
         res = self.get(self.coverages_url(workspace,storename),headers=self.accept_header("json"))
-        return [str(l["name"]) for l in (res.json().get("coverages") or {}).get("coverage") or [] ]
+        return self._parse_coverages(res.json())
+
+    def _parse_coverages(self,data):
+        return [str(l["name"]) for l in (data.get("coverages") or {}).get("coverage") or [] ]
     
     def get_coverage_field(self,layerdata,field):
         """
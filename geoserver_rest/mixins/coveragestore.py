@@ -17,7 +17,10 @@ class CoverageStoreMixin(object):
         Return coveragestore json data; raise ResourceNotFound if not found.
         """
         res = self.get(self.coveragestore_url(workspace,storename),headers=self.accept_header("json"))
-        return res.json().get("coverageStore")
+        return self._parse_coveragestore(res.json())
+
+    def _parse_coveragestore(self,data):
+        return data.get("coverageStore")
 
     def get_coveragestore_field(self,storedata,field):
         """
@@ -35,5 +38,8 @@ class CoverageStoreMixin(object):
     def list_coveragestores(self,workspace):
         res = self.get(self.coveragestores_url(workspace),headers=self.accept_header("json"))
 
-        return [str(s["name"]) for s in (res.json().get("coverageStores") or {}).get("coverageStore") or [] ]
+        return self._parse_coveragestores(res.json())
+
+    def _parse_coveragestores(self,data):
+        return [str(s["name"]) for s in (data.get("coverageStores") or {}).get("coverageStore") or [] ]
     
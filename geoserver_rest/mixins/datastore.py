@@ -115,7 +115,10 @@ class DatastoreMixin(object):
         return self.has(self.datastore_url(workspace,storename))
     
     def get_datastore(self,workspace,storename):
-        return self.get(self.datastore_url(workspace,storename)).json().get("dataStore",{})
+        return self._parse_datastore(self.get(self.datastore_url(workspace,storename)).json())
+
+    def _parse_datastore(self,data):
+        return data.get("dataStore",{})
 
     def list_datastores(self,workspace):
         """
@@ -123,7 +126,10 @@ class DatastoreMixin(object):
         """
         res = self.get(self.datastores_url(workspace), headers=self.accept_header("json"))
     
-        return [str(d["name"]) for d in (res.json().get("dataStores") or {}).get("dataStore") or [] ]
+        return self._parse_datastores(res.json())
+
+    def _parse_datastores(self,data):
+        return [str(d["name"]) for d in (data.get("dataStores") or {}).get("dataStore") or [] ]
 
     def upload_dataset(self,workspace,storename,file,filename=None,dataformat=None,update="overwrite",configure="none"):
         """
@@ -149,20 +149,7 @@ class FeaturetypeMixin(object):
             return "{}/ows?service=WFS&version=1.0.0&request=GetCapabilities".format(self.geoserver_url)
 
     def get_wfscapabilities(self,version="2.0.0",outputfile=None):
-        while True:
-            attempts = 0
-            try:
-                attempts += 1
-                res = self.get(self.wfscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
-                break
-            except Exception as ex:
-                if attempts > 10:
-                    raise
-                elif "InvalidChunkLength" in str(ex):
-                    time.sleep(1)
-                    continue
-                else:
-                    raise
+        #the broken responses are retried by the http layer
         res = self.get(self.wfscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
 
         if outputfile:
@@ -179,14 +166,17 @@ class FeaturetypeMixin(object):
         try:
             for data in res.iter_content(chunk_size = 1024):
                 output.write(data)
-            if attempts == 1:
-                logger.debug("WFS capabilities was saved to {}".format(outputfile))
-            else:
-                logger.debug("WFS capabilities was saved to {}, but tried {} times.".format(outputfile,attempts))
+            logger.debug("WFS capabilities was saved to {}".format(outputfile))
             return outputfile
         finally:
             output.close()
 
+    def get_wfscapabilities_index(self,version="2.0.0"):
+        """
+        Return a CapabilitiesIndex of the feature types advertised by the WFS GetCapabilities document
+        """
+        return self._get_capabilities_index("WFS",self.wfscapabilities_url(version=version))
+
     def has_featuretype(self,workspace,layername,storename=None):
         return self.has(self.featuretype_url(workspace,layername,storename=storename))
     
@@ -196,18 +186,24 @@ class FeaturetypeMixin(object):
         raise ReourceNotFound excepion if not found
         """
         res = self.get(self.featuretype_url(workspace,layername,storename=storename),headers=self.accept_header("json"))
-        return res.json()["featureType"]
+        return self._parse_featuretype(res.json())
+
+    def _parse_featuretype(self,data):
+        return data["featureType"]
     
     def get_featurecount(self,workspace,layername,storename=None):
         """
         Return the number of features 
         """
         res = self.get(self.featurecount_url(workspace,layername),headers=self.accept_header("xml"),timeout=settings.GETFEATURE_TIMEOUT)
+        return self._parse_featurecount(res.text)
+
+    def _parse_featurecount(self,text):
         try:
-            data = ET.fromstring(res.text)
+            data = ET.fromstring(text)
             return int(data.attrib["numberMatched"])
         except Exception as ex:
-            raise Exception("Failed to parse the xml data.{}".format(res.text))
+            raise Exception("Failed to parse the xml data.{}".format(text))
     
     def get_features(self,workspace,layername,storename=None,count=5,bbox=None,srs=None):
         """
@@ -222,7 +218,10 @@ class FeaturetypeMixin(object):
         Return the list of featuretypes belonging to the workspace and storename(if not empty)
         """
         res = self.get(self.featuretypes_url(workspace,storename),headers=self.accept_header("json"))
-        return [str(f["name"]) for f in (res.json().get("featureTypes") or {}).get("featureType") or [] ]
+        return self._parse_featuretypes(res.json())
+
+    def _parse_featuretypes(self,data):
+        return [str(f["name"]) for f in (data.get("featureTypes") or {}).get("featureType") or [] ]
     
     def delete_featuretype(self,workspace,storename,layername):
         if not self.has_featuretype(workspace,layername,storename=storename):
@@ -307,7 +306,12 @@ class FeaturetypeMixin(object):
         Raise ResourceNotFound if layername doesn't exist
         """
         res = self.get(self.layer_styles_url(workspace,layername),headers=self.accept_header("json"))
-        data = res.json()
+        return self._parse_featuretype_styles(res.json())
+
+    def _parse_featuretype_styles(self,data):
+        """
+        Return a tuple(default style, [] or alternate styles) from the json data returned by layer_styles_url
+        """
         default_style = data["layer"].get("defaultStyle",{}).get("name",None)
         if isinstance(data["layer"].get("styles",{}).get("style",[]),list):
             return (
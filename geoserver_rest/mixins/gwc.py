@@ -3,11 +3,19 @@ import itertools
 import collections
 import requests
 import math
+import bisect
 import urllib.parse
 import traceback
 import tempfile
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from ..exceptions import *
+from ..singleflight import LoadingCache
+from .. import crs
 from .. import settings
 
 logger = logging.getLogger(__name__)
@@ -65,132 +73,303 @@ ZOOMSTART_TEMPLATE = """
 ZOOMSTOP_TEMPLATE = """
     <zoomStop>{}</zoomStop>"""
 
+"""
+0: workspace
+1: layername
+2: bounds
+3: gridset
+4: zoomstart
+5: zoomstop
+6: format
+7: type, seed,reseed or truncate
+8: threadcount
+9: parameters
+"""
+SEED_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<seedRequest>
+    <name>{0}:{1}</name>{2}
+    <gridSetId>{3}</gridSetId>
+    <zoomStart>{4}</zoomStart>
+    <zoomStop>{5}</zoomStop>
+    <format>{6}</format>
+    <type>{7}</type>
+    <threadCount>{8}</threadCount>{9}
+</seedRequest>
+"""
+BOUNDS_TEMPLATE = """
+    <bounds>
+        <coords>
+            <double>{0}</double>
+            <double>{1}</double>
+            <double>{2}</double>
+            <double>{3}</double>
+        </coords>
+    </bounds>"""
+SEED_PARAMETERS_TEMPLATE = """
+    <parameters>{}
+    </parameters>"""
+SEED_PARAMETER_TEMPLATE = """
+        <entry><string>{}</string><string>{}</string></entry>"""
+
+#the status of the gwc seed task
+SEED_ABORTED = -1
+SEED_PENDING = 0
+SEED_RUNNING = 1
+SEED_DONE = 2
+
+def _numbers(data):
+    """
+    Return the list of the numbers in the gwc json data; the list can be wrapped as {"double":[...]} and a single number can be unwrapped
+    """
+    if isinstance(data,dict):
+        data = next(iter(data.values()),None)
+    if data is None:
+        return []
+    elif isinstance(data,(list,tuple)):
+        return [float(d) for d in data]
+    else:
+        return [float(data)]
+
 INSTANCES = {}
 class GridsetUtil(object):
+    """
+    The tile math of a gwc gridset, built from the gridset definition returned by 'get_gridset'(extent,resolutions or scale denominators,tile size and alignTopLeft).
+    The tile span, the matrix size and the top of each zoom level are precomputed, so the tile calculations are O(1) for any gridset.
+    The tile rows are counted from the top of the gridset, the same as the WMTS TileRow.
+    The coordinates are always in x/y(lon/lat) order, yCoordinateFirst only affects how the gridset srs is advertised.
+    """
     SRS = None
-    INSTANCES = {}
-
-    def __init__(self):
-        INSTANCES[self.SRS] = self
-
+    #the gridset definition of the builtin gridset util
+    GRIDSET = None
+
+    def __init__(self,gridsetdata=None):
+        if gridsetdata is None:
+            gridsetdata = self.GRIDSET
+            INSTANCES[self.SRS] = self
+        self.name = gridsetdata.get("name")
+        self.srs = gridsetdata["srs"] if isinstance(gridsetdata["srs"],str) else "EPSG:{}".format(gridsetdata["srs"]["number"])
+        self.extent = _numbers(gridsetdata["extent"]["coords"] if isinstance(gridsetdata["extent"],dict) and "coords" in gridsetdata["extent"] else gridsetdata["extent"])
+        self.tilewidth = int(gridsetdata["tileWidth"])
+        self.tileheight = int(gridsetdata["tileHeight"])
+        self.aligntopleft = bool(gridsetdata.get("alignTopLeft"))
+        self.ycoordinatefirst = bool(gridsetdata.get("yCoordinateFirst"))
+        if gridsetdata.get("resolutions"):
+            self.resolutions = _numbers(gridsetdata["resolutions"])
+        elif gridsetdata.get("scaleDenominators"):
+            #the same conversion as gwc, the scale denominator is based on the standard rendering pixel size(0.28mm)
+            pixelsize = float(gridsetdata.get("pixelSize") or 0.00028)
+            metersperunit = float(gridsetdata.get("metersPerUnit") or 1)
+            self.resolutions = [d * pixelsize / metersperunit for d in _numbers(gridsetdata["scaleDenominators"])]
+        else:
+            raise Exception("The gridset({}) has neither resolutions nor scale denominators".format(self.name))
+
+        self.left = self.extent[0]
+        #the per level constants: (tile width in map units,tile height in map units,matrix width,matrix height,top of the gridset)
+        self.levels = []
+        for resolution in self.resolutions:
+            width = self.tilewidth * resolution
+            height = self.tileheight * resolution
+            #the same as gwc, ignore the extent exceeding the tiles by less than 1%
+            matrixwidth = max(1,int(math.ceil((self.extent[2] - self.extent[0]) / width - 0.01)))
+            matrixheight = max(1,int(math.ceil((self.extent[3] - self.extent[1]) / height - 0.01)))
+            top = self.extent[3] if self.aligntopleft else (self.extent[1] + matrixheight * height)
+            self.levels.append((width,height,matrixwidth,matrixheight,top))
+        #the negative tile spans in ascending order, used to locate the highest zoom level whose tile is not smaller than a bbox
+        self._negwidths = [-level[0] for level in self.levels]
+        self._negheights = [-level[1] for level in self.levels]
+        self._arrays = None
+
+    @property
+    def maxzoom(self):
+        return len(self.levels) - 1
 
     @staticmethod
     def get_instance(srs):
+        """
+        Return the builtin gridset util of the srs
+        """
         try:
             return INSTANCES[srs.upper()]
         except:
             raise Exception("The SRS({}) Not Support".format(srs))
 
+    def matrix_size(self,zoom):
+        """
+        Return the number of the tiles (columns,rows) of the zoom level
+        """
+        level = self.levels[zoom]
+        return (level[2],level[3])
+
     def tile_bbox(self,zoom,x,y):
         """
-        Return the bbox of a title
+        Return the bounding box(left bottom, right top)(minx,miny,maxx,maxy) of a tile
         """
-        raise Exception("Not Implemented")
-        
+        width,height,matrixwidth,matrixheight,top = self.levels[zoom]
+        return (self.left + x * width,top - (y + 1) * height,self.left + (x + 1) * width,top - y * height)
 
     def get_tile(self,x,y,zoom):
         """
-        Retun the tile position(x,y)
+        Retun the tile position(x,y) containing the point; the point outside of the gridset is clamped to the nearest tile
         """
-        raise Exception("Not Implemented")
+        width,height,matrixwidth,matrixheight,top = self.levels[zoom]
+        xtile = int(math.floor((x - self.left) / width))
+        ytile = int(math.floor((top - y) / height))
+        return (min(max(xtile,0),matrixwidth - 1),min(max(ytile,0),matrixheight - 1))
 
-    def tiles(self,bbox, zoom):
+    def clip_bbox(self,bbox):
         """
-        bbox: left bottom, right top
+        Return the bbox clipped by the extent of the gridset, None if the bbox is outside of the gridset
+        """
+        bbox = [max(bbox[0],self.extent[0]),max(bbox[1],self.extent[1]),min(bbox[2],self.extent[2]),min(bbox[3],self.extent[3])]
+        return None if bbox[0] > bbox[2] or bbox[1] > bbox[3] else bbox
+
+    def tile_range(self,bbox,zoom):
+        """
+        Return the tile range (minx,miny,maxx,maxy) covering the bbox, both ends are inclusive
         """
         left_bottom_tile = self.get_tile(bbox[0],bbox[1], zoom)
         right_top_tile = self.get_tile(bbox[2],bbox[3], zoom)
+        return (left_bottom_tile[0],right_top_tile[1],right_top_tile[0],left_bottom_tile[1])
 
-        for x in range(left_bottom_tile[0],right_top_tile[0] + 1):
-            for y in range(right_top_tile[1],left_bottom_tile[1] + 1):
+    def tiles(self,bbox, zoom):
+        """
+        bbox: left bottom, right top
+        """
+        minx,miny,maxx,maxy = self.tile_range(bbox,zoom)
+        for x in range(minx,maxx + 1):
+            for y in range(miny,maxy + 1):
                 yield (x,y)
 
     def get_tile_count(self,bbox, zoom):
-        totalTileCount = 0
-        left_bottom_tile = self.get_tile(bbox[0],bbox[1], zoom)
-        right_top_tile = self.get_tile(bbox[2],bbox[3], zoom)
-
-        return (right_top_tile[0] - left_bottom_tile[0] + 1) * (left_bottom_tile[1] - right_top_tile[1] + 1)
+        minx,miny,maxx,maxy = self.tile_range(bbox,zoom)
+        return (maxx - minx + 1) * (maxy - miny + 1)
 
     def get_bbox_tile(self,bbox):
         """
         bbox : [minx,miny,maxx,maxy] [minLon,minLat,maxLon,maxLat]
-        Return (zoom,x,y)
+        Return (zoom,x,y) of the tile in the highest zoom level which covers the whole bbox
         """
-        zoom = 5
-        isbiggerbefore = None
-        while(True):
-            x,y= self.get_tile(bbox[0],bbox[1],zoom)
+        #the tiles in the zoom levels higher than the levels whose tile is not smaller than the bbox can't cover the bbox
+        zoom = min(bisect.bisect_right(self._negwidths,bbox[0] - bbox[2]),bisect.bisect_right(self._negheights,bbox[1] - bbox[3])) - 1
+        while zoom > 0:
+            x,y = self.get_tile(bbox[0],bbox[1],zoom)
             tilebbox = self.tile_bbox(zoom,x,y)
             if tilebbox[0] <= bbox[0] and tilebbox[1] <= bbox[1] and tilebbox[2] >= bbox[2] and tilebbox[3] >= bbox[3]:
-                #tilebbox bigger than the bbox.zoom in
-                if isbiggerbefore == False:
-                    return (zoom,x,y)
-                else:
-                    isbiggerbefore = True
-                    zoom += 1
-            else:
-                #tilebbox smaller than the bbox.zoom out
-                if isbiggerbefore == True:
-                    return (zoom - 1,*self.get_tile(bbox[0],bbox[1],zoom - 1))
-                else:
-                    isbiggerbefore = False
-                    zoom -= 1
+                return (zoom,x,y)
+            #the bbox crosses the tile boundary, zoom out
+            zoom -= 1
+        return (0,*self.get_tile(bbox[0],bbox[1],0))
 
+    #the batch apis, require the package 'numpy'
+    def _get_arrays(self):
+        """
+        Return the per level constants as numpy arrays: (tile widths,tile heights,matrix widths,matrix heights,tops)
+        """
+        if numpy is None:
+            raise Exception("The batch tile calculations require the package 'numpy'")
+        if self._arrays is None:
+            self._arrays = (
+                numpy.array([level[0] for level in self.levels],dtype=numpy.float64),
+                numpy.array([level[1] for level in self.levels],dtype=numpy.float64),
+                numpy.array([level[2] for level in self.levels],dtype=numpy.int64),
+                numpy.array([level[3] for level in self.levels],dtype=numpy.int64),
+                numpy.array([level[4] for level in self.levels],dtype=numpy.float64)
+            )
+        return self._arrays
 
-class EPSG4326Util(GridsetUtil):
-    SRS = "EPSG:4326"
-    #R2D = 180 / math.pi
-    #D2R = math.pi / 180
-
-    def tile_lon(self,zoom,x) :
-        assert x <= math.pow(2,zoom + 1),"The tile row index should be not greater than {}".format(int(math.pow(2,zoom + 1)))
-        return x / math.pow(2.0, zoom + 1) * 360.0 - 180
-
-    def tile_lat(self,zoom,y) :
-        assert y <=math.pow(2,zoom),"The tile column index should be not greater than {}".format(int(math.pow(2,zoom)))
-        #return math.degrees(
-        #    math.atan(math.sinh(math.pi - (2.0 * math.pi * y) / math.pow(2.0, zoom)))
-        #)
-        #n = math.pi - 2 * math.pi * y / math.pow(2, zoom)
-        #return self.R2D * math.atan(0.5 * (math.exp(n) - math.exp(-n)))
-        return y / math.pow(2.0, zoom ) * -180.0 + 90
+    def _batch_tiles(self,xs,ys,zooms):
+        """
+        Return the clamped tile columns and rows of the points in the zoom levels, the arrays are broadcasted
+        """
+        widths,heights,matrixwidths,matrixheights,tops = self._get_arrays()
+        xtiles = numpy.floor((xs - self.left) / widths[zooms]).astype(numpy.int64)
+        ytiles = numpy.floor((tops[zooms] - ys) / heights[zooms]).astype(numpy.int64)
+        return (numpy.clip(xtiles,0,matrixwidths[zooms] - 1),numpy.clip(ytiles,0,matrixheights[zooms] - 1))
 
-    def tile_bbox(self,zoom,x,y):
+    def tile_ranges(self,bboxes,zooms=None):
         """
-        Return the bounding box(left bottom, right top)(minx,miny,maxx,maxy)
-        """
-        return (self.tile_lon(zoom,x),self.tile_lat(zoom,y + 1),self.tile_lon(zoom,x + 1),self.tile_lat(zoom,y))
-
-    def get_tile(self,lon_deg, lat_deg, zoom):
-        xtile = int((lon_deg + 180.0) / 360.0 * math.pow(2.0,zoom + 1))
-        #lat_rad = math.radians(lat_deg)
-        #ytile = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * math.pow(2.0,zoom))
-        #lat_rad = math.radians(lat_deg)
-        #ytile = int((1.0 - math.log(math.tan(lat_rad) + (1 / math.cos(lat_rad))) / math.pi) / 2.0 * zoom)
-        ytile = int((lat_deg - 90.0) / -180.0 * math.pow(2.0,zoom))
-        return (xtile, ytile)
-
-
-    def _decimal2minutes(decimal_degrees, is_latitude) :
-        absdegrees = Math.abs(decimal_degrees);
-        degrees = math.floor(absdegrees)
-        absdegrees -= degrees
-        absdegrees *= 60
-        minutes = math.floor(absdegrees);
-        absdegrees -= minutes;
-        absdegrees *= 60
-        seconds = Math.floor(absdegrees);
-        suffix = "";
-        if is_latitude:
-            suffix = "N" if decimal_degrees >= 0 else "S"
-        else:
-            suffix = "E" if decimal_degrees >= 0 else "W"
-  
-        return "{}\u00B0 {}' {}\" {}".format(degrees,minutes,seconds,suffix);
+        bboxes: a sequence or an array of bbox(minx,miny,maxx,maxy), shape (n,4)
+        zooms: a sequence of the zoom levels, all the zoom levels if None
+        Return an int64 array of the tile ranges(minx,miny,maxx,maxy) with shape (n,len(zooms),4), both ends are inclusive
+        """
+        bboxes = numpy.asarray(bboxes,dtype=numpy.float64).reshape(-1,4)
+        zooms = numpy.arange(len(self.levels)) if zooms is None else numpy.asarray(zooms,dtype=numpy.int64).reshape(-1)
+        minxs,maxys = self._batch_tiles(bboxes[:,0:1],bboxes[:,1:2],zooms[numpy.newaxis,:])
+        maxxs,minys = self._batch_tiles(bboxes[:,2:3],bboxes[:,3:4],zooms[numpy.newaxis,:])
+        return numpy.stack((minxs,minys,maxxs,maxys),axis=-1)
+
+    def tile_counts(self,bboxes,zooms=None):
+        """
+        Return an int64 array of the tile counts with shape (n,len(zooms)), see tile_ranges
+        """
+        ranges = self.tile_ranges(bboxes,zooms)
+        return (ranges[...,2] - ranges[...,0] + 1) * (ranges[...,3] - ranges[...,1] + 1)
+
+    def tile_bboxes(self,zooms,xs,ys):
+        """
+        zooms,xs,ys: the zoom levels, the tile columns and the tile rows, a number or a sequence; they are broadcasted to the same shape
+        Return a float64 array of the tile bboxes(minx,miny,maxx,maxy) with shape (n,4)
+        """
+        widths,heights,matrixwidths,matrixheights,tops = self._get_arrays()
+        zooms,xs,ys = numpy.broadcast_arrays(*(numpy.asarray(v,dtype=numpy.int64).reshape(-1) for v in (zooms,xs,ys)))
+        width = widths[zooms]
+        height = heights[zooms]
+        top = tops[zooms]
+        return numpy.stack((self.left + xs * width,top - (ys + 1) * height,self.left + (xs + 1) * width,top - ys * height),axis=-1)
+
+    def bbox_tiles(self,bboxes):
+        """
+        The batch version of get_bbox_tile.
+        The highest zoom level whose tile is not smaller than the bbox is located by the binary search of the tile spans,
+        then the bboxes crossing a tile boundary are zoomed out level by level until they are covered by a tile.
+        Return an int64 array of (zoom,x,y) with shape (n,3)
+        """
+        widths,heights,matrixwidths,matrixheights,tops = self._get_arrays()
+        bboxes = numpy.asarray(bboxes,dtype=numpy.float64).reshape(-1,4)
+        #the tile spans decrease with the zoom levels, search the negative spans
+        zooms = numpy.minimum(
+            numpy.searchsorted(-widths,bboxes[:,0] - bboxes[:,2],side="right"),
+            numpy.searchsorted(-heights,bboxes[:,1] - bboxes[:,3],side="right")
+        ) - 1
+        zooms = numpy.maximum(zooms,0)
+        xs = numpy.zeros(len(bboxes),dtype=numpy.int64)
+        ys = numpy.zeros(len(bboxes),dtype=numpy.int64)
+        pending = numpy.arange(len(bboxes))
+        while len(pending):
+            z = zooms[pending]
+            x,y = self._batch_tiles(bboxes[pending,0],bboxes[pending,1],z)
+            xs[pending] = x
+            ys[pending] = y
+            width = widths[z]
+            height = heights[z]
+            top = tops[z]
+            covered = (
+                (self.left + x * width <= bboxes[pending,0]) & (top - (y + 1) * height <= bboxes[pending,1]) &
+                (self.left + (x + 1) * width >= bboxes[pending,2]) & (top - y * height >= bboxes[pending,3])
+            )
+            #the bbox crosses the tile boundary, zoom out; the tile in zoom level 0 is used if no tile covers the bbox
+            pending = pending[~covered & (z > 0)]
+            zooms[pending] -= 1
+        return numpy.stack((zooms,xs,ys),axis=-1)
+
+
+class EPSG4326Util(GridsetUtil):
+    SRS = "EPSG:4326"
+    #the builtin gwc gridset 'EPSG:4326', two tiles at zoom level 0
+    GRIDSET = {
+        "name": "EPSG:4326",
+        "srs": "EPSG:4326",
+        "extent": [-180.0,-90.0,180.0,90.0],
+        "alignTopLeft": False,
+        "resolutions": [0.703125 / math.pow(2,z) for z in range(22)],
+        "tileWidth": 256,
+        "tileHeight": 256,
+        "yCoordinateFirst": False
+    }
 
 class EPSG4283Util(EPSG4326Util):
     SRS = "EPSG:4283"
+    GRIDSET = dict(EPSG4326Util.GRIDSET,name="gda94",srs="EPSG:4283")
 
 def init_gridsetutil(util_class=GridsetUtil):
     for cls in util_class.__subclasses__():
@@ -210,6 +389,12 @@ class GWCMixin(object):
     def gwclayer_seed_url(self,workspace,layername):
         return "{0}/gwc/rest/seed/{1}:{2}.xml".format(self.geoserver_url,workspace,layername)
 
+    def gwcseed_url(self,workspace=None,layername=None,f=None):
+        if workspace:
+            return "{0}/gwc/rest/seed/{1}:{2}{3}".format(self.geoserver_url,workspace,layername,".{}".format(f) if f else "")
+        else:
+            return "{0}/gwc/rest/seed{1}".format(self.geoserver_url,".{}".format(f) if f else "")
+
     def gwclayer_truncate_url(self,workspace,layername,requestType="truncateLayer"):
         #return "{0}/gwc/rest/masstruncate?requestType={2}&layer={1}".format(self.geoserver_url,self.urlencode("{}:{}".format(workspace,layername)),requestType)
         return "{0}/gwc/rest/masstruncate".format(self.geoserver_url)
@@ -230,20 +415,7 @@ class GWCMixin(object):
         return "{}/gwc/service/wmts?service=WMTS&version=1.1.1&request=GetCapabilities".format(self.geoserver_url)
 
     def get_wmtscapabilities(self,version="1.1.1",outputfile=None):
-        while True:
-            attempts = 0
-            try:
-                attempts += 1
-                res = self.get(self.wmtscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
-                break
-            except Exception as ex:
-                if attempts > 10:
-                    raise
-                elif "InvalidChunkLength" in str(ex):
-                    time.sleep(1)
-                    continue
-                else:
-                    raise
+        #the broken responses are retried by the http layer
         res = self.get(self.wmtscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
 
         if outputfile:
@@ -260,31 +432,48 @@ class GWCMixin(object):
         try:
             for data in res.iter_content(chunk_size = 1024):
                 output.write(data)
-            if attempts == 1:
-                logger.debug("WMTS capabilities was saved to {}".format(outputfile))
-            else:
-                logger.debug("WMTS capabilities was saved to {}. but tried {} times.".format(outputfile,attempts))
+            logger.debug("WMTS capabilities was saved to {}".format(outputfile))
 
             return outputfile
         finally:
             output.close()
     
 
+    def get_wmtscapabilities_index(self,version="1.1.1"):
+        """
+        Return a CapabilitiesIndex of the layers and tile matrix sets advertised by the WMTS GetCapabilities document
+        """
+        return self._get_capabilities_index("WMTS",self.wmtscapabilities_url(version=version))
+
     def _handle_gwcresponse_error(self,res):
         if res.status_code >= 400 and "Unknown layer" in res.text:
             raise ResourceNotFound(response=res)
         super()._handle_response_error(res)
 
-    _gridsets = {}
+    #shared by all the clients and threads, keyed by (geoserver url,gridset); a gridset is fetched only once even if requested concurrently
+    _gridsets = LoadingCache()
     def get_gridset(self,gridset):
-        try:
-            return self._gridsets[gridset]
-        except KeyError as ex:
-            res = self.get(self.gridset_url(gridset),headers=self.accept_header("json"))
-            data = res.json()["gridSet"]
-            data["srs"] = "EPSG:{}".format(data["srs"]["number"])
-            self._gridsets[gridset] = data
-            return data
+        return self._gridsets.get((self.geoserver_url,gridset),self._load_gridset,gridset)
+
+    def _load_gridset(self,gridset):
+        res = self.get(self.gridset_url(gridset),headers=self.accept_header("json"))
+        return self._parse_gridset(res.json())
+
+    def _parse_gridset(self,data):
+        data = data["gridSet"]
+        data["srs"] = "EPSG:{}".format(data["srs"]["number"])
+        return data
+
+    #shared by all the clients and threads, keyed by (geoserver url,gridset)
+    _gridsetutils = LoadingCache()
+    def get_gridsetutil(self,gridset):
+        """
+        Return the GridsetUtil built from the gridset definition
+        """
+        return self._gridsetutils.get((self.geoserver_url,gridset),self._load_gridsetutil,gridset)
+
+    def _load_gridsetutil(self,gridset):
+        return GridsetUtil(self.get_gridset(gridset))
 
     def list_gwclayers(self,workspace=None):
         """
@@ -292,11 +481,14 @@ class GWCMixin(object):
         Return the list of layers:[(workspace,layername)]
         """
         res = self.get(self.gwclayers_url(),headers=self.accept_header("json"))
+        return self._parse_gwclayers(res.json(),workspace)
+
+    def _parse_gwclayers(self,data,workspace=None):
         if workspace:
             prefix = "{}:".format(workspace)
-            return [ name.split(":",1) if ":" in name else [None,name]  for name in res.json() if name.startswith(prefix)]
+            return [ name.split(":",1) if ":" in name else [None,name]  for name in data if name.startswith(prefix)]
         else:
-            return [ name.split(":",1) if ":" in name else [None,name]  for name in res.json()]
+            return [ name.split(":",1) if ":" in name else [None,name]  for name in data]
         
     def has_gwclayer(self,workspace,layername):
         return self.has(self.gwclayer_url(workspace,layername) , headers=self.accept_header("json"),error_handler=self._handle_gwcresponse_error)
@@ -306,7 +498,10 @@ class GWCMixin(object):
         Return a json object if exists; otherwise return None
         """
         res = self.get(self.gwclayer_url(workspace,layername,f="json") , headers=self.accept_header("json"),error_handler=self._handle_gwcresponse_error)
-        return res.json().get("GeoServerLayer")
+        return self._parse_gwclayer(res.json())
+
+    def _parse_gwclayer(self,data):
+        return data.get("GeoServerLayer")
             
     def delete_gwclayer(self,workspace,layername):
         if self.has_gwclayer(workspace,layername):
@@ -370,73 +565,120 @@ class GWCMixin(object):
             TRUNCATE_TEMPLATE.format(workspace,layername),
             headers={'content-type': 'text/xml'})
 
+    def seed_gwclayer(self,workspace,layername,gridset=settings.GWC_GRIDSET,zoomstart=0,zoomstop=None,bbox=None,format="image/png",type="seed",threadcount=1,parameters=None):
+        """
+        Submit a seed request to GWC, GWC runs the request with 'threadcount' seed tasks
+        bbox: the bbox(minx,miny,maxx,maxy) in the gridset crs, the whole gridset subset of the layer if None
+        type: seed, reseed or truncate
+        parameters: the parameter filters, for example {"STYLES":"style"}
+        """
+        if zoomstop is None:
+            zoomstop = self.get_gridsetutil(gridset).maxzoom
+        data = SEED_TEMPLATE.format(
+            workspace,
+            layername,
+            BOUNDS_TEMPLATE.format(*bbox) if bbox else "",
+            gridset,
+            zoomstart,
+            zoomstop,
+            format,
+            type,
+            threadcount,
+            SEED_PARAMETERS_TEMPLATE.format("".join(SEED_PARAMETER_TEMPLATE.format(k,v) for k,v in parameters.items())) if parameters else ""
+        )
+        self.post(self.gwclayer_seed_url(workspace,layername),data,headers=self.contenttype_header("xml"),error_handler=self._handle_gwcresponse_error)
+        logger.debug("Succeed to submit the {} request of the gwc layer({}:{}), gridset={}, zoom={}-{}, bbox={}".format(type,workspace,layername,gridset,zoomstart,zoomstop,bbox))
+
+    def truncate_gwclayer(self,workspace,layername,gridset=settings.GWC_GRIDSET,zoomstart=0,zoomstop=None,bbox=None,format="image/png",parameters=None,threadcount=1):
+        """
+        Truncate the cached tiles of the gwc layer in the bbox and the zoom range, only the tiles of the format and the parameters are truncated
+        bbox: the bbox(minx,miny,maxx,maxy) in the gridset crs, the whole gridset subset of the layer if None
+        parameters: the parameter filters, for example {"STYLES":"style"}; the tiles of the default parameters if None
+        """
+        self.seed_gwclayer(workspace,layername,gridset=gridset,zoomstart=zoomstart,zoomstop=zoomstop,bbox=bbox,format=format,type="truncate",threadcount=threadcount,parameters=parameters)
+
+    def list_seedtasks(self,workspace=None,layername=None):
+        """
+        Return the seed tasks of the gwc layer if workspace is not None; otherwise return the seed tasks of all gwc layers
+        Return the list of the seed tasks: [{"id":id,"tilesDone":n,"tilesTotal":n,"timeRemaining":seconds,"status":status}]
+        status: SEED_ABORTED, SEED_PENDING, SEED_RUNNING or SEED_DONE
+        """
+        res = self.get(self.gwcseed_url(workspace,layername,f="json"),headers=self.accept_header("json"),error_handler=self._handle_gwcresponse_error)
+        return [
+            {"id":t[3],"tilesDone":t[0],"tilesTotal":t[1],"timeRemaining":t[2],"status":t[4]}
+            for t in res.json().get("long-array-array") or []
+        ]
+
+    def kill_seedtasks(self,workspace=None,layername=None,kill="all"):
+        """
+        Kill the seed tasks of the gwc layer if workspace is not None; otherwise kill the seed tasks of all gwc layers
+        kill: all, running or pending
+        """
+        self.post(self.gwcseed_url(workspace,layername),"kill_all={}".format(kill),headers={"content-type":"application/x-www-form-urlencoded"},error_handler=self._handle_gwcresponse_error)
+        logger.debug("Succeed to kill the {} seed tasks of {}".format(kill,"the gwc layer({}:{})".format(workspace,layername) if workspace else "all gwc layers"))
+
+    #the layer types tried in order to find the latlon bbox of a layer: (get layer,get field,field of the latlon bbox)
+    LAYER_LATLONBBOX_FIELDS = (
+        ("get_featuretype","get_featuretype_field","latLonBoundingBox"),
+        ("get_wmslayer","get_wmslayer_field","latLonBoundingBox"),
+        ("get_coverage","get_coverage_field","latLonBoundingBox"),
+        ("get_layergroup","get_layergroup_field","bounds")
+    )
+    def get_layer_latlonbbox(self,workspace,layername):
+        """
+        Return the latlon bbox(minx,miny,maxx,maxy) of the layer, the layer can be a featuretype, wmslayer, coverage or layergroup
+        """
+        for f_get,f_field,field in self.LAYER_LATLONBBOX_FIELDS:
+            try:
+                return self._parse_latlonbbox(getattr(self,f_field)(getattr(self,f_get)(workspace,layername),field))
+            except ResourceNotFound as ex:
+                if f_get == self.LAYER_LATLONBBOX_FIELDS[-1][0]:
+                    raise
+
+    def _parse_latlonbbox(self,bbox):
+        return (bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"])
+
+    def _get_layer_tile(self,gridsetutil,bbox,workspace,layername):
+        """
+        Return the tile (zoom,column,row) covering the latlon bbox of the layer in the gridset
+        """
+        gridset_bbox = gridsetutil.clip_bbox(crs.transform_bbox("EPSG:4326",gridsetutil.srs,bbox))
+        if not gridset_bbox:
+            raise Exception("The bbox({}) of the layer({}:{}) is outside of the gridset({})".format(bbox,workspace,layername,gridsetutil.name))
+        return gridsetutil.get_bbox_tile(gridset_bbox)
+
     def get_tileposition(self,x,y,zoom,gridset=settings.GWC_GRIDSET):
-        return GridsetUtil.get_instance(self.get_gridset(gridset)["srs"]).get_tile(x,y,zoom)
+        return self.get_gridsetutil(gridset).get_tile(x,y,zoom)
 
     def get_tilebbox(self,zoom,xtile,ytile,gridset=settings.GWC_GRIDSET):
-        return GridsetUtil.get_instance(self.get_gridset(gridset)["srs"]).tile_bbox(zoom,xtile,ytile)
+        return self.get_gridsetutil(gridset).tile_bbox(zoom,xtile,ytile)
 
     def get_tile_count(self,gridset,bbox,zoom):
-        return GridsetUtil.get_instance(self.get_gridset(gridset)["srs"]).get_tile_count(bbox,zoom)
+        return self.get_gridsetutil(gridset).get_tile_count(bbox,zoom)
 
-    def get_tile(self,workspace,layername,zoom=None,row=None,column=None,gridset=settings.GWC_GRIDSET,format="image/jpeg",style=None,version=settings.WMTS_VERSION,outputfile=None):
+    def get_tile(self,workspace,layername,zoom=None,row=None,column=None,gridset=settings.GWC_GRIDSET,format="image/jpeg",style=None,version=settings.WMTS_VERSION,outputfile=None,output="file",chunk_size=settings.IMAGE_CHUNK_SIZE,validate=False):
         """
         if zoom,row or column is None, will return a tile conver the whole layer
         outputfile: a temporary file will be created if outputfile is None, the client has the responsibility to delete the outputfile
-        If succeed, save the image to outputfile
+        output: how to return the tile, 'file','bytes','memoryview' or 'size', see get_map
+        validate: check the magic bytes and the dimension(the tile size of the gridset) of the tile in memory if True
         """
         if zoom is None or row is None or column is None:
-            try:
-                layerdata = self.get_featuretype(workspace,layername)
-                bbox = self.get_featuretype_field(layerdata,"latLonBoundingBox")
-                bbox = (bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"])
-            except ResourceNotFound as ex:
-                try:
-                    layerdata = self.get_wmslayer(workspace,layername)
-                    bbox = self.get_wmslayer_field(layerdata,"latLonBoundingBox")
-                    bbox = (bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"])
-                except ResourceNotFound as ex:
-                    try:
-                        layerdata = self.get_coverage(workspace,layername)
-                        bbox = self.get_coverage_field(layerdata,"latLonBoundingBox")
-                        bbox = (bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"])
-                    except ResourceNotFound as ex:
-                        layerdata = self.get_layergroup(workspace,layername)
-                        bbox = self.get_layergroup_field(layerdata,"bounds")
-                        bbox = (bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"])
-            zoom,column,row = GridsetUtil.get_instance(self.get_gridset(gridset)["srs"]).get_bbox_tile(bbox)
+            zoom,column,row = self._get_layer_tile(self.get_gridsetutil(gridset),self.get_layer_latlonbbox(workspace,layername),workspace,layername)
 
         url = self.tile_url(workspace,layername,zoom,row,column,gridset=gridset,format=format,style=style,version=version)
         logger.debug("Tile url={}".format(url))
-        res = self.get(url,headers=self.accept_header("jpeg"),error_handler=self._handle_gwcresponse_error,timeout=settings.WMTS_TIMEOUT)
-        if res.headers.get("content-type") != format:
-            if any( t in res.headers.get("content-type","") for t in ("text/","xml","css","json","javascript")):
-                try:
-                    msg = res.text
-                except:
-                    raise GetMapFailed("Failed to get the map of layer({}:{}).Expect '{}', but got '{}'".format(workspace,layername,format,res.headers.get("content-type","")),res)
-
-                raise GetMapFailed("Failed to get the map of layer({}:{}).{}".format(workspace,layername,msg),res)
-            else:
-                raise GetMapFailed("Failed to get the map of layer({}:{}).Expect '{}', but got '{}'".format(workspace,layername,format,res.headers.get("content-type","")),res)
-        if outputfile:
-            output = open(outputfile,'wb')
+        #load the gridset before the tile is streamed, the streamed response holds its connection until it is closed
+        gridsetdata = self.get_gridset(gridset) if validate else None
+        def _read(res):
+            self._check_image(res,workspace,layername,format)
+            return self._read_image(res,workspace,layername,format,outputfile=outputfile,output=output,chunk_size=chunk_size,width=gridsetdata["tileWidth"] if validate else None,height=gridsetdata["tileHeight"] if validate else None,validate=validate,prefix="gswmts_")
+
+        if output == "size":
+            #stream the tile, the tile is requested again if its body is broken
+            return self.get_streamed(url,_read,headers=self.accept_header("jpeg"),error_handler=self._handle_gwcresponse_error,timeout=settings.WMTS_TIMEOUT)
         else:
-            output = tempfile.NamedTemporaryFile(
-                mode='wb',
-                prefix="gswmts_",
-                suffix=".{}".format(format.rsplit("/",1)[1] if "/" in format else format),
-                delete = False, 
-                delete_on_close = False
-            )
-            outputfile = output.name
-        try:
-            for data in res.iter_content(chunk_size = 1024):
-                output.write(data)
-            logger.debug("WMTS image was saved to {}".format(outputfile))
-            return outputfile
-        finally:
-            output.close()
+            return _read(self.get(url,headers=self.accept_header("jpeg"),error_handler=self._handle_gwcresponse_error,timeout=settings.WMTS_TIMEOUT))
 
     def get_gwclayer_field(self,layerdata,field):
         """
@@ -465,7 +707,7 @@ class GWCMixin(object):
                 if "zoomStart" in data:
                     gridset["zoomStart"] = data["zoomStart"]
                 if "zoomStop" in data:
-                    gridset["zoomStop]"] = data["zoomStop"]
+                    gridset["zoomStop"] = data["zoomStop"]
                 gridsets.append(gridset)
             return gridsets
         elif field == "metaWidth":
@@ -84,7 +84,10 @@ class LayergroupMixin(object):
         }
         """
         res = self.get(self.layergroup_url(workspace,groupname),headers=self.accept_header("json"))
-        return res.json()["layerGroup"]
+        return self._parse_layergroup(res.json())
+
+    def _parse_layergroup(self,data):
+        return data["layerGroup"]
     
     def get_layergroup_field(self,layergroupdata,field):
         """
@@ -123,7 +126,10 @@ class LayergroupMixin(object):
 
         """
         res = self.get(self.layergroups_url(workspace),headers=self.accept_header("json"))
-        return [str(g["name"]) for g in (res.json().get("layerGroups") or {}).get("layerGroup") or [] ]
+        return self._parse_layergroups(res.json())
+
+    def _parse_layergroups(self,data):
+        return [str(g["name"]) for g in (data.get("layerGroups") or {}).get("layerGroup") or [] ]
 
     def has_layergroup(self,workspace,groupname):
         return groupname in self.list_layergroups(workspace)
@@ -32,7 +32,10 @@ class SecurityMixin(object):
     
     def get_catalogue_mode(self):
         res = self.get(self.catalogue_mode_url(),headers=self.accept_header("json"))
-        return res.json()["mode"]
+        return self._parse_catalogue_mode(res.json())
+
+    def _parse_catalogue_mode(self,data):
+        return data["mode"]
     
     def set_catalogue_mode(self,mode):
         data = CATALOGUE_MODE_TEMPLATE.format(mode)
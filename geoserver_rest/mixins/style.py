@@ -96,10 +96,16 @@ class StyleMixin(object):
     def list_styles(self,workspace):
         res = self.get(self.styles_url(workspace),headers=self.accept_header("json"))
     
-        return [str(s["name"]) for s in (res.json().get("styles") or {}).get("style") or [] ]
+        return self._parse_styles(res.json())
+
+    def _parse_styles(self,data):
+        return [str(s["name"]) for s in (data.get("styles") or {}).get("style") or [] ]
     
     def get_style(self,workspace,stylename):
-        return self.get(self.style_url(workspace,stylename),headers=self.accept_header("json")).json()["style"]
+        return self._parse_style(self.get(self.style_url(workspace,stylename),headers=self.accept_header("json")).json())
+
+    def _parse_style(self,data):
+        return data["style"]
     
     def get_sld(self,workspace,stylename):
         sldversion = self.get_style(workspace,stylename)["languageVersion"]["version"]
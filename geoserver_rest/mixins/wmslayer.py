@@ -87,20 +87,8 @@ class WMSLayerMixin(object):
             return "{}/ows?service=WMS&version=1.1.1&request=GetCapabilities".format(self.geoserver_url)
 
     def get_wmscapabilities(self,version="1.3.0",outputfile=None):
-        while True:
-            attempts = 0
-            try:
-                attempts += 1
-                res = self.get(self.wmscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
-                break
-            except Exception as ex:
-                if attempts > 10:
-                    raise
-                elif "InvalidChunkLength" in str(ex):
-                    time.sleep(1)
-                    continue
-                else:
-                    raise
+        #the broken responses are retried by the http layer
+        res = self.get(self.wmscapabilities_url(version=version),headers=self.accept_header("xml"),timeout=settings.GETCAPABILITY_TIMEOUT)
 
         if outputfile:
             output = open(outputfile,'wb')
@@ -117,14 +105,17 @@ class WMSLayerMixin(object):
         try:
             for data in res.iter_content(chunk_size = 1024):
                 output.write(data)
-            if attempts == 1:
-                logger.debug("WMS capabilities was saved to {}".format(outputfile))
-            else:
-                logger.debug("WMS capabilities was saved to {}, but tried {} times.".format(outputfile,attempts))
+            logger.debug("WMS capabilities was saved to {}".format(outputfile))
             return outputfile
         finally:
             output.close()
 
+    def get_wmscapabilities_index(self,version="1.3.0"):
+        """
+        Return a CapabilitiesIndex of the layers advertised by the WMS GetCapabilities document
+        """
+        return self._get_capabilities_index("WMS",self.wmscapabilities_url(version=version))
+
     def has_wmslayer(self,workspace,layername,storename=None):
         return self.has(self.wmslayer_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
     
@@ -134,14 +125,20 @@ class WMSLayerMixin(object):
         Raise ResourceNotFound if not found
         """
         res = self.get(self.wmslayer_url(workspace,layername,storename=storename,format="json"),headers=self.accept_header("json"))
-        return res.json()["wmsLayer"]
+        return self._parse_wmslayer(res.json())
+
+    def _parse_wmslayer(self,data):
+        return data["wmsLayer"]
     
     def list_wmslayers(self,workspace,storename):
         """
         Return the list of layers in the store if storename is not null;otherwise return all layers in the workspace
         """
         res = self.get(self.wmslayers_url(workspace,storename),headers=self.accept_header("json"))
-        return [str(l["name"]) for l in (res.json().get("wmsLayers") or {}).get("wmsLayer") or [] ]
+        return self._parse_wmslayers(res.json())
+
+    def _parse_wmslayers(self,data):
+        return [str(l["name"]) for l in (data.get("wmsLayers") or {}).get("wmsLayer") or [] ]
     
     def delete_wmslayer(self,workspace,layername,recurse=False):
         """
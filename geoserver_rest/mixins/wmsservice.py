@@ -3,6 +3,7 @@ import tempfile
 import logging
 
 from ..exceptions import *
+from ..imagevalidator import image_info,validate_image,IMAGE_HEADER_LIMIT
 from .. import settings
 
 logger = logging.getLogger(__name__)
@@ -18,17 +19,32 @@ class WMSServiceMixin(object):
         return "{0}/{1}/wms?{2}".format(self.geoserver_url,workspace,parameters)
 
 
-    def get_map(self,workspace,layername,bbox,version="1.1.0",srs="EPSG:4326",width=1024,height=1024,format="image/jpeg",style="",outputfile=None):
+    def get_map(self,workspace,layername,bbox,version="1.1.0",srs="EPSG:4326",width=1024,height=1024,format="image/jpeg",style="",outputfile=None,output="file",chunk_size=settings.IMAGE_CHUNK_SIZE,validate=False):
         """
         bbox is [minx,miny,maxx,maxy]
         outputfile: a temporary file will be created if outputfile is None, the client has the responsibility to delete the outputfile,
-        If succeed, save the image to outputfile
+        output: how to return the image
+            file: save the image to outputfile and return the outputfile
+            bytes: return the image as bytes
+            memoryview: return the image as memoryview
+            size: read the image in chunks without keeping it and return the size of the image
+        validate: check the magic bytes and the dimension of the image in memory if True
         """
         if isinstance(bbox,dict):
             bbox = [bbox["minx"],bbox["miny"],bbox["maxx"],bbox["maxy"]]
         url = self.map_url(workspace,layername,bbox,version=version,srs=srs,width=width,height=height,format=format,style=style)
         logger.debug("get map url = {}".format(url))
-        res = self.get(url,headers=self.accept_header(format),timeout=settings.WMS_TIMEOUT)
+        def _read(res):
+            self._check_image(res,workspace,layername,format)
+            return self._read_image(res,workspace,layername,format,outputfile=outputfile,output=output,chunk_size=chunk_size,width=width if validate else None,height=height if validate else None,validate=validate,prefix="gswms_")
+
+        if output == "size":
+            #stream the image, the image is requested again if its body is broken
+            return self.get_streamed(url,_read,headers=self.accept_header(format),timeout=settings.WMS_TIMEOUT)
+        else:
+            return _read(self.get(url,headers=self.accept_header(format),timeout=settings.WMS_TIMEOUT))
+
+    def _check_image(self,res,workspace,layername,format):
         if res.headers.get("content-type") != format:
             if any( t in res.headers.get("content-type","") for t in ("text/","xml","css","json","javascript")):
                 try:
@@ -39,23 +55,54 @@ class WMSServiceMixin(object):
                 raise GetMapFailed("Failed to get the map of layer({}:{}).{}".format(workspace,layername,msg),res)
             else:
                 raise GetMapFailed("Failed to get the map of layer({}:{}).Expect '{}', but got '{}'".format(workspace,layername,format,res.headers.get("content-type","")),res)
+
+    def _read_image(self,res,workspace,layername,format,outputfile=None,output="file",chunk_size=settings.IMAGE_CHUNK_SIZE,width=None,height=None,validate=False,prefix="gsimage_"):
+        """
+        Read the image from the response, see get_map for the parameters
+        """
+        try:
+            if output == "size":
+                size = 0
+                header = b""
+                for data in res.iter_content(chunk_size = chunk_size):
+                    size += len(data)
+                    if validate:
+                        #validate the image as soon as its header is read
+                        header += data[:IMAGE_HEADER_LIMIT - len(header)]
+                        if len(header) >= IMAGE_HEADER_LIMIT or image_info(header)[1] is not None:
+                            validate_image(header,format,width,height)
+                            validate = False
+                if validate:
+                    validate_image(header,format,width,height)
+                return size
+
+            if validate:
+                validate_image(res.content,format,width,height)
+            if output == "bytes":
+                return res.content
+            elif output == "memoryview":
+                return memoryview(res.content)
+            elif output != "file":
+                raise Exception("Output({}) Not Support".format(output))
+        except InvalidImage as ex:
+            raise GetMapFailed("Failed to get the map of layer({}:{}).{}".format(workspace,layername,str(ex)),res)
+
         if outputfile:
             output = open(outputfile,'wb')
         else:
             output = tempfile.NamedTemporaryFile(
                 mode='wb',
-                prefix="gswms_",
+                prefix=prefix,
                 suffix=".{}".format(format.rsplit("/",1)[1] if "/" in format else format),
                 delete = False,
                 delete_on_close = False
             )
             outputfile = output.name
         try:
-            for data in res.iter_content(chunk_size = 1024):
+            for data in res.iter_content(chunk_size = chunk_size):
                 output.write(data)
 
-            logger.debug("WMS image was saved to {}".format(outputfile))
+            logger.debug("The image was saved to {}".format(outputfile))
             return outputfile
         finally:
             output.close()
-
@@ -37,7 +37,10 @@ class WMSStoreMixin(object):
         Return wmsstore json data; raise ResourceNotFound if not found.
         """
         res = self.get(self.wmsstore_url(workspace,storename),headers=self.accept_header("json"))
-        return res.json().get("wmsStore")
+        return self._parse_wmsstore(res.json())
+
+    def _parse_wmsstore(self,data):
+        return data.get("wmsStore")
 
     def get_wmsstore_field(self,storedata,field):
         """
@@ -60,7 +63,10 @@ class WMSStoreMixin(object):
     def list_wmsstores(self,workspace):
         res = self.get(self.wmsstores_url(workspace),headers=self.accept_header("json"))
     
-        return [str(s["name"]) for s in (res.json().get("wmsStores") or {}).get("wmsStore") or [] ]
+        return self._parse_wmsstores(res.json())
+
+    def _parse_wmsstores(self,data):
+        return [str(s["name"]) for s in (data.get("wmsStores") or {}).get("wmsStore") or [] ]
     
     def update_wmsstore(self,workspace,storename,parameters,create=None):
         """
@@ -26,7 +26,10 @@ class WorkspaceMixin(object):
         """
         res = self.get(self.workspaces_url(),headers=self.accept_header("json"))
     
-        return [str(w["name"]) for w in (res.json().get("workspaces") or {}).get("workspace") or [] ]
+        return self._parse_workspaces(res.json())
+
+    def _parse_workspaces(self,data):
+        return [str(w["name"]) for w in (data.get("workspaces") or {}).get("workspace") or [] ]
     
     def create_workspace(self,workspace):
         """
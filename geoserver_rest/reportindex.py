@@ -0,0 +1,103 @@
+import os
+import json
+import shutil
+import logging
+import traceback
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class ReportIndex(object):
+    """
+    The append-only index of the healthcheck reports in the reports home, one json line per report in the order they were written.
+    The history page is rendered from the index instead of reading the reportmeta.json of every report folder,
+    and each entry keeps the per-run timing and the per-category latency summary for the trend charts.
+    The expired reports are pruned by their position in the index;
+    the index is compacted when it holds twice the maximum reports, so the index file stays small.
+    """
+    FILE = "reportindex.jsonl"
+    #the metadata stored in the index
+    FIELDS = ("starttime","endtime","exectime","exectime_seconds","mode","total_tasks","warnings","errors","report_dir","report_file","warnings_file","results_file","exceptions","categories")
+
+    def __init__(self,reports_home,max_reports=None):
+        self.reports_home = reports_home
+        self.max_reports = max_reports or settings.MAX_REPORTS
+        self.file = os.path.join(self.reports_home,self.FILE)
+
+    def _entry(self,metadata):
+        return dict((k,metadata.get(k)) for k in self.FIELDS if metadata.get(k) is not None)
+
+    def _build(self):
+        """
+        Build the index from the reportmeta.json of the existing report folders, only run once if the index doesn't exist
+        """
+        entries = []
+        for f in os.listdir(self.reports_home):
+            metafile = os.path.join(self.reports_home,f,"reportmeta.json")
+            if not os.path.exists(metafile):
+                continue
+            try:
+                with open(metafile,'rt') as fd:
+                    entries.append(self._entry(json.loads(fd.read())))
+            except :
+                logger.error("Failed to load report meta data.{}".format(traceback.format_exc()))
+        entries.sort(key=lambda d:d["starttime"])
+        self._write(entries)
+        logger.info("Build the report index({}) from {} reports".format(self.file,len(entries)))
+        return entries
+
+    def _write(self,entries):
+        tmpfile = "{}.tmp".format(self.file)
+        with open(tmpfile,'w') as f:
+            for entry in entries:
+                f.write(json.dumps(entry))
+                f.write("\n")
+        os.replace(tmpfile,self.file)
+
+    def read(self):
+        """
+        Return all the entries in the index, including the expired entries which are not compacted yet
+        """
+        if not os.path.exists(self.file):
+            return self._build()
+        entries = []
+        with open(self.file,'rt') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(json.loads(line))
+                except:
+                    #a partially written line
+                    logger.error("Failed to parse the line of the report index({}).{}".format(self.file,line))
+        return entries
+
+    def add(self,metadata):
+        """
+        Append the report to the index, remove the expired report folders and return the entries of the kept reports, latest first
+        """
+        entries = self.read()
+        entry = self._entry(metadata)
+        if not any(e["report_dir"] == entry["report_dir"] for e in entries[-self.max_reports:]):
+            with open(self.file,'a') as f:
+                f.write(json.dumps(entry))
+                f.write("\n")
+            entries.append(entry)
+
+        if len(entries) > self.max_reports:
+            for e in entries[:-self.max_reports]:
+                folder = os.path.join(self.reports_home,e["report_dir"])
+                if not os.path.exists(folder):
+                    #already removed
+                    continue
+                try:
+                    shutil.rmtree(folder)
+                except:
+                    logger.error("Failed to delete expired report folder({}).{}".format(e["report_dir"],traceback.format_exc()))
+            if len(entries) >= self.max_reports * 2:
+                #compact the index
+                self._write(entries[-self.max_reports:])
+            entries = entries[-self.max_reports:]
+        return sorted(entries,key=lambda d:d["starttime"],reverse=True)
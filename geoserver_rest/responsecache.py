@@ -0,0 +1,180 @@
+import collections
+import threading
+import logging
+import time
+import urllib.parse
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse(object):
+    __slots__ = ("response","expires","etag","last_modified")
+
+    def __init__(self,response,expires):
+        self.response = response
+        self.expires = expires
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    @property
+    def validators(self):
+        """
+        Return the conditional request headers to revalidate the cached response, or None if the response has no validator
+        """
+        if not self.etag and not self.last_modified:
+            return None
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+class ResponseCache(object):
+    """
+    A thread-safe TTL/LRU cache of the successful GET responses of the rest apis(including the gwc rest apis), keyed by url and Accept header.
+    The ogc service responses(capabilities,maps,tiles and features) are never cached, they are large and
+    the checks which fetch the same map or tile before and after a change need the current response.
+    A response is fresh for ttl seconds, after which it is revalidated with its ETag/Last-Modified if it has one.
+    generation: increased by each invalidation; a response fetched across an invalidation is not stored,
+        because it may be fetched before the write was applied and would be served stale until it expires
+    hits: the lookups served without a request
+    misses: the lookups which need a request, including the revalidations
+    revalidations: the expired responses which were confirmed not modified by the server
+    """
+    def __init__(self,ttl=None,maxsize=None):
+        self.ttl = settings.HTTP_CACHE_TTL if ttl is None else ttl
+        self.maxsize = maxsize or settings.HTTP_CACHE_MAXSIZE
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(url,headers=None):
+        return (url,(headers or {}).get("Accept"))
+
+    @staticmethod
+    def cacheable(url):
+        """
+        Return True if the response of the url can be cached, only the responses of the rest apis are cached
+        """
+        return "/rest/" in urllib.parse.urlparse(url).path
+
+    @staticmethod
+    def resource_path(url):
+        """
+        Return the path of the resource without the format extension, the query string is ignored
+        """
+        path = urllib.parse.urlparse(url).path.rstrip("/")
+        name = path.rsplit("/",1)[-1]
+        if "." in name and name.rsplit(".",1)[1] in ("json","xml","html","sld"):
+            path = path[:-len(name.rsplit(".",1)[1]) - 1]
+        return path
+
+    def get(self,key):
+        """
+        Return a tuple(fresh response,None) if the response is fresh;
+        return (None,cached response) if the cached response is expired but can be revalidated;
+        otherwise return (None,None)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return (None,None)
+            if entry.expires > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return (entry.response,None)
+            self.misses += 1
+            if entry.validators:
+                return (None,entry)
+            del self._entries[key]
+            return (None,None)
+
+    def set(self,key,response,generation=None):
+        """
+        Cache the response if no invalidation happened since the generation(the generation before the response was requested)
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = CachedResponse(response,time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def revalidated(self,key,entry,generation=None):
+        """
+        The cached response is not modified, keep it fresh for another ttl seconds if no invalidation happened since the generation
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            entry.expires = time.time() + self.ttl
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+
+    def invalidate(self,url):
+        """
+        Invalidate the cached responses affected by a write to url:
+        the resource itself, its parent collections and its children;
+        all the resources in the same workspace, because a write to a store or layer also changes the workspace level lists.
+        A reload or reset clears the whole cache.
+        """
+        path = self.resource_path(url)
+        if path.endswith(("/rest/reload","/rest/reset")):
+            self.clear()
+            return
+
+        #the resources under the scopes are affected
+        scopes = [path]
+        #the resources whose names start with the prefixes are affected
+        prefixes = []
+        parts = path.split("/")
+        if "rest" in parts:
+            index = parts.index("rest")
+            if parts[index + 1:index + 2] == ["workspaces"] and len(parts) > index + 2:
+                workspace = parts[index + 2]
+                scopes.append("/".join(parts[:index + 3]))
+                prefixes.append("{}/layers/{}:".format("/".join(parts[:index + 1]),workspace))
+                prefixes.append("{}/gwc/rest/layers/{}:".format("/".join(parts[:index]),workspace))
+
+        def _affected(entrypath):
+            if entrypath.startswith(tuple("{}/".format(scope) for scope in scopes)) or entrypath in scopes:
+                return True
+            if prefixes and entrypath.startswith(tuple(prefixes)):
+                return True
+            #parent collections
+            return path.startswith("{}/".format(entrypath))
+
+        with self._lock:
+            self.generation += 1
+            keys = [k for k in self._entries.keys() if _affected(self.resource_path(k[0]))]
+            for k in keys:
+                del self._entries[k]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,248 @@
+import os
+import gzip
+import json
+import shutil
+import logging
+from datetime import datetime
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from . import settings
+from .tasks.base import CarriedForwardTask
+
+logger = logging.getLogger(__name__)
+
+#the typed columns of the result records
+RESULT_COLUMNS = (
+    ("time","string"),
+    ("category","string"),
+    ("workspace","string"),
+    ("layer","string"),
+    ("status","string"),
+    ("level","string"),
+    ("latency_ms","float64"),
+    ("bytes","int64"),
+    ("message","string"),
+    ("parameters","string"),
+    ("carriedforward","bool_")
+)
+
+#the task parameters containing the layer name
+LAYER_PARAMETERS = ("featuretype","coverage","layername","layergroup")
+
+TIME_PATTERN = "%Y-%m-%d %H:%M:%S.%f"
+
+FILE_EXTENSIONS = {
+    "jsonl": ".jsonl.gz",
+    "parquet": ".parquet"
+}
+
+def _parse_parameters(parameters):
+    """
+    Parse the parameters formatted by 'Task.format_parameters("\r\n")'
+    """
+    result = {}
+    for line in (parameters or "").split("\r\n"):
+        if "=" not in line:
+            continue
+        k,v = line.split("=",1)
+        try:
+            result[k] = json.loads(v)
+        except Exception as ex:
+            result[k] = v
+    return result
+
+def _parse_time(value):
+    return datetime.strptime(value,TIME_PATTERN) if value else None
+
+def _record(category,parameters,status,starttime,endtime,warnings,size=None,carriedforward=False):
+    levels = [w[2] for w in warnings]
+    return {
+        "time": starttime.strftime(TIME_PATTERN) if starttime else None,
+        "category": category,
+        "workspace": parameters.get("workspace") or None,
+        "layer": next((parameters[k] for k in LAYER_PARAMETERS if parameters.get(k)),None),
+        "status": status,
+        "level": "Error" if "Error" in levels else ("Warning" if levels else None),
+        "latency_ms": round((endtime - starttime).total_seconds() * 1000,3) if starttime and endtime else None,
+        "bytes": size,
+        "message": "\r\n".join("{}: {}".format(w[2],w[6]) for w in warnings) or None,
+        "parameters": json.dumps(parameters) if parameters else None,
+        "carriedforward": carriedforward
+    }
+
+def task_records(task,warnings):
+    """
+    A generator to return the result records of the task, one record per task.
+    The records of a carried forward task are rebuilt from its report rows.
+    warnings: the warning rows of the task
+    """
+    if isinstance(task,CarriedForwardTask):
+        for row in task._reportrows:
+            rowwarnings = [w for w in warnings if w[0] == row[0] and w[1] == row[1]]
+            yield _record(row[0],_parse_parameters(row[1]),row[2],_parse_time(row[3]),_parse_time(row[4]),rowwarnings,carriedforward=True)
+    else:
+        size = task.result if task.sized_result and isinstance(task.result,int) else None
+        yield _record(task.category,dict(task.parameters),task.status,task.starttime,task.endtime,warnings,size=size)
+
+class JSONLWriter(object):
+    """
+    Write the records as gzip compressed json lines, the files can be merged by concatenation
+    """
+    def __init__(self,file):
+        self.file = file
+        self.file_output = gzip.open(self.file,'wt',encoding="utf-8",compresslevel=settings.RESULT_COMPRESSLEVEL)
+        self.records = 0
+
+    def writerows(self,records):
+        if not self.file_output:
+            raise Exception("File({}) was already closed".format(self.file))
+        for record in records:
+            self.file_output.write(json.dumps(record,separators=(",",":")))
+            self.file_output.write("\n")
+            self.records += 1
+
+    def flush(self):
+        if self.file_output:
+            self.file_output.flush()
+
+    def close(self):
+        try:
+            if self.file_output:
+                self.file_output.close()
+        except:
+            pass
+        self.file_output = None
+
+class ParquetWriter(object):
+    """
+    Write the records to a parquet file with the typed columns, a row group is written every 'RESULT_ROWGROUP_SIZE' records
+    """
+    def __init__(self,file):
+        if pyarrow is None:
+            raise Exception("The parquet result file requires the package 'pyarrow'")
+        self.file = file
+        self.schema = result_schema()
+        self.writer = pyarrow.parquet.ParquetWriter(self.file,self.schema,compression="zstd")
+        self.buffer = []
+        self.records = 0
+
+    def writerows(self,records):
+        if not self.writer:
+            raise Exception("File({}) was already closed".format(self.file))
+        for record in records:
+            self.buffer.append(record)
+            self.records += 1
+        if len(self.buffer) >= settings.RESULT_ROWGROUP_SIZE:
+            self._write_rowgroup()
+
+    def _write_rowgroup(self):
+        if self.buffer:
+            self.writer.write_table(pyarrow.Table.from_pylist(self.buffer,schema=self.schema))
+            self.buffer = []
+
+    def flush(self):
+        #the buffered records are written as a row group when enough records are buffered, small row groups make the file slow to read
+        pass
+
+    def close(self):
+        try:
+            if self.writer:
+                self._write_rowgroup()
+                self.writer.close()
+        except Exception as ex:
+            logger.error("Failed to close the parquet file({}).{}".format(self.file,str(ex)))
+        self.writer = None
+
+def result_schema():
+    return pyarrow.schema([(name,getattr(pyarrow,datatype)()) for name,datatype in RESULT_COLUMNS])
+
+def result_format(format):
+    """
+    Return the supported result format, 'parquet' falls back to 'jsonl' if pyarrow is not installed
+    """
+    format = (format or "").lower()
+    if not format:
+        return None
+    if format not in FILE_EXTENSIONS:
+        raise Exception("Result format({}) Not Support".format(format))
+    if format == "parquet" and pyarrow is None:
+        logger.warning("The package 'pyarrow' is not installed, write the results as compressed json lines")
+        return "jsonl"
+    return format
+
+def result_filename(name,format):
+    return "{}{}".format(name,FILE_EXTENSIONS[format])
+
+def open_result_writer(file):
+    if file.endswith(FILE_EXTENSIONS["parquet"]):
+        return ParquetWriter(file)
+    else:
+        return JSONLWriter(file)
+
+def read_results(file,columns=None):
+    """
+    A generator to return the result records from a result file
+    columns: only return the columns if not None; only the columns are read from a parquet file
+    """
+    if file.endswith(FILE_EXTENSIONS["parquet"]):
+        if pyarrow is None:
+            raise Exception("Reading the parquet file({}) requires the package 'pyarrow'".format(file))
+        for batch in pyarrow.parquet.ParquetFile(file).iter_batches(columns=columns):
+            yield from batch.to_pylist()
+    else:
+        with gzip.open(file,'rt',encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield dict((k,record.get(k)) for k in columns) if columns else record
+
+def merge_results(files,output):
+    """
+    Merge the result files into the output file, the files have the same format as the output file
+    """
+    if output.endswith(FILE_EXTENSIONS["parquet"]):
+        writer = ParquetWriter(output)
+        try:
+            for f in files:
+                for batch in pyarrow.parquet.ParquetFile(f).iter_batches():
+                    writer.writer.write_table(pyarrow.Table.from_batches([batch],schema=writer.schema))
+        finally:
+            writer.close()
+    else:
+        #the concatenated gzip members are a valid gzip file
+        with open(output,'wb') as o:
+            for f in files:
+                with open(f,'rb') as i:
+                    shutil.copyfileobj(i,o)
+
+def summarize_results(files):
+    """
+    Return the summary of each result file for the trend analysis across the healthchecks, only the needed columns are read
+    return [{"file":file,"tasks":n,"failed":n,"errors":n,"warnings":n,"latency_ms":{"avg":avg,"p95":p95},"bytes":total bytes}]
+    """
+    summaries = []
+    for f in files:
+        summary = {"file":os.path.basename(f),"tasks":0,"failed":0,"errors":0,"warnings":0,"bytes":0}
+        latencies = []
+        for record in read_results(f,columns=["status","level","latency_ms","bytes"]):
+            summary["tasks"] += 1
+            if record["status"] == "Failed":
+                summary["failed"] += 1
+            if record["level"] == "Error":
+                summary["errors"] += 1
+            elif record["level"] == "Warning":
+                summary["warnings"] += 1
+            if record["latency_ms"] is not None:
+                latencies.append(record["latency_ms"])
+            summary["bytes"] += record["bytes"] or 0
+        latencies.sort()
+        summary["latency_ms"] = {
+            "avg": round(sum(latencies) / len(latencies),3) if latencies else None,
+            "p95": latencies[min(len(latencies) - 1,int(len(latencies) * 0.95))] if latencies else None
+        }
+        summaries.append(summary)
+    return summaries
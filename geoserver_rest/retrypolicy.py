@@ -0,0 +1,109 @@
+import random
+import threading
+import logging
+import requests
+
+from . import settings
+
+logger = logging.getLogger(__name__)
+
+#the failures with these messages can't be fixed by retry
+NON_RETRYABLE_MESSAGES = [
+    "the requested style can not be used with this layer",
+    "unknown wkb type",
+    "errors while inspecting the location of an external graphic",
+    "unknown font",
+    "exceptioncode=\"tileoutofrange\"",
+    "http error code 401",
+    "could not find layer",
+    "could not locate a layer",
+    "rendering process failed"
+]
+
+def is_retryable_message(msg):
+    msg = msg.lower()
+    return not any(m in msg for m in NON_RETRYABLE_MESSAGES)
+
+class RetryPolicy(object):
+    """
+    Retry the failed requests with exponential backoff and full jitter.
+    The failures are classified into error classes, each error class has its own maximum retries:
+        connection: failed to connect or the connection was dropped
+        timeout: no response in time
+        chunked: the response body was broken, for example 'InvalidChunkLength'
+        server: 502, 503 or 504
+    The other failures are not retried.
+    The retry budget limits the retries to a ratio of the requests, so an unhealthy geoserver is not flooded with retries.
+    """
+    METHODS = ("GET","HEAD","PUT","DELETE","OPTIONS")
+    STATUS_CODES = (502,503,504)
+
+    def __init__(self,rules=None,backoff=None,max_backoff=None,budget=None,min_budget=None):
+        """
+        rules: dict(error class, maximum retries), default is settings.HTTP_RETRY_RULES
+        backoff: the base backoff in seconds
+        max_backoff: the maximum backoff in seconds
+        budget: each request earns 'budget' retries
+        min_budget: the retries available before any request is sent; also the maximum retries can be saved from the requests
+        """
+        self.rules = settings.HTTP_RETRY_RULES if rules is None else rules
+        self.backoff = settings.HTTP_RETRY_BACKOFF if backoff is None else backoff
+        self.max_backoff = settings.HTTP_RETRY_MAX_BACKOFF if max_backoff is None else max_backoff
+        self.budget = settings.HTTP_RETRY_BUDGET if budget is None else budget
+        self.min_budget = settings.HTTP_RETRY_MIN_BUDGET if min_budget is None else min_budget
+        self._tokens = self.min_budget
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.exhausted = 0
+
+    @classmethod
+    def classify(cls,ex=None,res=None):
+        """
+        Return the error class of the exception or the response; return None if not retryable
+        """
+        if ex is not None:
+            if not is_retryable_message(str(ex)):
+                return None
+            if isinstance(ex,requests.exceptions.ChunkedEncodingError) or "InvalidChunkLength" in str(ex):
+                return "chunked"
+            elif isinstance(ex,requests.exceptions.ConnectTimeout):
+                return "connection"
+            elif isinstance(ex,requests.Timeout):
+                return "timeout"
+            elif isinstance(ex,requests.ConnectionError):
+                return "connection"
+            return None
+        elif res is not None and res.status_code in cls.STATUS_CODES:
+            return "server"
+        return None
+
+    def requested(self):
+        """
+        Called for each request, earn the retry budget
+        """
+        with self._lock:
+            self._tokens = min(self._tokens + self.budget,max(self.min_budget,1))
+
+    def retry(self,method,errorclass,attempt):
+        """
+        Return the delay(seconds) before the next attempt if the failed attempt should be retried; otherwise return None
+        attempt: the number of the failed attempt, based on 1
+        """
+        if not errorclass or method.upper() not in self.METHODS:
+            return None
+        if attempt > self.rules.get(errorclass,0):
+            return None
+        with self._lock:
+            if self._tokens < 1:
+                self.exhausted += 1
+                return None
+            self._tokens -= 1
+            self.retries += 1
+        return random.uniform(0,min(self.max_backoff,self.backoff * (2 ** (attempt - 1))))
+
+    def stats(self):
+        return {
+            "retries": self.retries,
+            "exhausted": self.exhausted,
+            "budget": self._tokens
+        }
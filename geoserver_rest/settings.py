@@ -29,7 +29,27 @@ EMAIL_ENABLED = True if (EMAIL_HOST and (EMAIL_TO or EMAIL_CC or EMAIL_BCC)) els
 MAX_BBOX = [108,-45,155,-10]
 GWC_GRIDSETS = os.environ.get("GWC_GRIDSETS","gda94").split(",")
 GWC_GRIDSET = GWC_GRIDSETS[0]
+#the maximum number of the cached crs transformers, keyed by (source crs,target crs)
+TRANSFORMER_CACHE_SIZE = int(os.environ.get("TRANSFORMER_CACHE_SIZE",32))
+#the number of the points densified on each edge of a bbox when transforming the bbox to another crs
+BBOX_DENSIFY_POINTS = int(os.environ.get("BBOX_DENSIFY_POINTS",21))
+#the maximum number of the gwc seed tasks running on each geoserver node, including the seed tasks not submitted by the seeder
+SEED_MAX_TASKS_PER_NODE = int(os.environ.get("SEED_MAX_TASKS_PER_NODE",4))
+#the number of the gwc seed tasks(threads) running a seed request
+SEED_THREAD_COUNT = int(os.environ.get("SEED_THREAD_COUNT",2))
+#the maximum tiles of a seed request, a larger seeding job is split into bbox partitions
+SEED_MAX_TILES = int(os.environ.get("SEED_MAX_TILES",100000))
+#the interval(seconds) to poll the gwc seed status
+SEED_POLL_INTERVAL = float(os.environ.get("SEED_POLL_INTERVAL",5))
+#the number of the layers planned concurrently
+TRUNCATE_CONCURRENCY = int(os.environ.get("TRUNCATE_CONCURRENCY",4))
+#the interval(seconds) to poll the gwc seed status when truncating, the truncate requests are submitted when the seed task slots are free
+TRUNCATE_POLL_INTERVAL = float(os.environ.get("TRUNCATE_POLL_INTERVAL",1))
+#the ratio of the extra tiles allowed when merging the edited bboxes into one truncation range
+TRUNCATE_MAX_WASTE = float(os.environ.get("TRUNCATE_MAX_WASTE",0.25))
 TEST_FORMAT = os.environ.get("TEST_FORMAT","image/jpeg")
+#check the magic bytes and the dimension of the test images in memory
+TEST_IMAGE_VALIDATE = os.environ.get("TEST_IMAGE_VALIDATE","true").lower() == "true"
 WMTS_VERSION = os.environ.get("WMTS_VERSION","1.0.0")
 TEST_ZOOM = int(os.environ.get("TEST_ZOOM",12))
 TEST_FEATURES_COUNT = int(os.environ.get("TEST_FEATURES_COUNT",1))
@@ -39,6 +59,51 @@ WMS_TIMEOUT = int(os.environ.get("WMS_TIMEOUT",600))
 WMTS_TIMEOUT = int(os.environ.get("WMTS_TIMEOUT",600))
 GETFEATURE_TIMEOUT = int(os.environ.get("GETFEATURE_TIMEOUT",600))
 GETCAPABILITY_TIMEOUT = int(os.environ.get("GETCAPABILITY_TIMEOUT",600))
+#the chunk size(bytes) to read the map and tile images
+IMAGE_CHUNK_SIZE = int(os.environ.get("IMAGE_CHUNK_SIZE",65536))
+
+#reuse the tcp/tls connections among the requests sent to the same host
+HTTP_KEEPALIVE = os.environ.get("HTTP_KEEPALIVE","true").lower() == "true"
+#the number of hosts whose connection pool is cached
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS",4))
+#the maximum connections to one host, 0 means the connections follow the degree of parallelism of the task runner
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE",0))
+#the initial connections to one host if HTTP_POOL_MAXSIZE is 0, enlarged by the parallel callers(task runner, catalog crawl, etc) to their degree of parallelism
+HTTP_POOL_DEFAULT_SIZE = int(os.environ.get("HTTP_POOL_DEFAULT_SIZE",10))
+#cache the GET responses of the rest apis in the geoserver client, the cached responses are revalidated with ETag/Last-Modified after HTTP_CACHE_TTL seconds
+HTTP_CACHE = os.environ.get("HTTP_CACHE","false").lower() == "true"
+HTTP_CACHE_TTL = int(os.environ.get("HTTP_CACHE_TTL",60))
+HTTP_CACHE_MAXSIZE = int(os.environ.get("HTTP_CACHE_MAXSIZE",1024))
+#retry the failed requests with exponential backoff and jitter, "error class:maximum retries" separated by ",".
+#error classes: connection, timeout, chunked(broken response body) and server(502,503,504)
+HTTP_RETRY_RULES = dict((r.split(":",1)[0].strip(),int(r.split(":",1)[1].strip())) for r in os.environ.get("HTTP_RETRY_RULES","connection:3,chunked:3,server:3,timeout:0").split(",") if ":" in r)
+HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF",0.5)) #seconds
+HTTP_RETRY_MAX_BACKOFF = float(os.environ.get("HTTP_RETRY_MAX_BACKOFF",10)) #seconds
+#each request earns HTTP_RETRY_BUDGET retries, at most HTTP_RETRY_MIN_BUDGET retries can be saved
+HTTP_RETRY_BUDGET = float(os.environ.get("HTTP_RETRY_BUDGET",0.2))
+HTTP_RETRY_MIN_BUDGET = int(os.environ.get("HTTP_RETRY_MIN_BUDGET",10))
+#the concurrent identical GET requests share one in-flight request
+HTTP_SINGLEFLIGHT = os.environ.get("HTTP_SINGLEFLIGHT","true").lower() == "true"
+#limit the in-flight requests per endpoint class(rest,wms,wmts,wfs) with additive increase and multiplicative decrease, "endpoint class:value" separated by ","
+HTTP_ADAPTIVE_CONCURRENCY = os.environ.get("HTTP_ADAPTIVE_CONCURRENCY","false").lower() == "true"
+HTTP_CONCURRENCY_INITIAL = dict((r.split(":",1)[0].strip(),int(r.split(":",1)[1].strip())) for r in os.environ.get("HTTP_CONCURRENCY_INITIAL","rest:2,wms:2,wmts:2,wfs:1").split(",") if ":" in r)
+HTTP_CONCURRENCY_MAX = dict((r.split(":",1)[0].strip(),int(r.split(":",1)[1].strip())) for r in os.environ.get("HTTP_CONCURRENCY_MAX","rest:16,wms:8,wmts:16,wfs:4").split(",") if ":" in r)
+#the healthy p95 latency(seconds) per endpoint class
+HTTP_CONCURRENCY_TARGET_LATENCY = dict((r.split(":",1)[0].strip(),float(r.split(":",1)[1].strip())) for r in os.environ.get("HTTP_CONCURRENCY_TARGET_LATENCY","rest:2,wms:5,wmts:2,wfs:10").split(",") if ":" in r)
+HTTP_CONCURRENCY_MAX_ERROR_RATE = float(os.environ.get("HTTP_CONCURRENCY_MAX_ERROR_RATE",0.02))
+#the limit is multiplied by HTTP_CONCURRENCY_BACKOFF on timeout or 5xx
+HTTP_CONCURRENCY_BACKOFF = float(os.environ.get("HTTP_CONCURRENCY_BACKOFF",0.5))
+#the number of requests evaluated before the limit is increased by 1
+HTTP_CONCURRENCY_WINDOW = int(os.environ.get("HTTP_CONCURRENCY_WINDOW",20))
+#the folder of the textfile collector of node-exporter, the request metrics are written into it as prometheus textfiles if configured
+PROMETHEUS_TEXTFILE_DIR = os.environ.get("PROMETHEUS_TEXTFILE_DIR")
+#the maximum in-flight list requests when crawling the catalog
+CATALOG_CRAWL_DOP = int(os.environ.get("CATALOG_CRAWL_DOP",8))
+#the maximum age(seconds) of the resource details without ETag/Last-Modified in the catalog snapshot before they are fetched again,
+#the details with ETag/Last-Modified are revalidated by conditional GETs in each refresh
+CATALOG_SNAPSHOT_MAX_AGE = int(os.environ.get("CATALOG_SNAPSHOT_MAX_AGE",3600))
+#the maximum in-flight requests to one host sent by AsyncGeoserver
+ASYNC_CONCURRENCY_PER_HOST = int(os.environ.get("ASYNC_CONCURRENCY_PER_HOST",100))
 
 def GET_REQUEST_HEADERS(name):
     headers = os.environ.get(name)
@@ -49,13 +114,44 @@ def GET_REQUEST_HEADERS(name):
 
 
 HEALTHCHECK_DOP = int(os.environ.get("HEALTHCHECK_DOP",2))
+#the scheduling of the healthcheck tasks: 'depthfirst' runs the leaves of the task tree before more siblings are expanded; 'fifo' expands the tree breadth-first
+HEALTHCHECK_SCHEDULING = os.environ.get("HEALTHCHECK_SCHEDULING","depthfirst").lower()
+#read the catalog from a snapshot which is saved under the reports home and refreshed incrementally before each healthcheck
+HEALTHCHECK_CATALOG_SNAPSHOT = os.environ.get("HEALTHCHECK_CATALOG_SNAPSHOT","false").lower() == "true"
+#the mode of the healthcheck: 'full' discovers the layers from the rest api; 'fast' creates the layer tests from the GetCapabilities documents
+HEALTHCHECK_MODE = os.environ.get("HEALTHCHECK_MODE","full").lower()
+#only re-test the layers whose fingerprints are changed since the last healthcheck, and carry forward the results of the unchanged layers
+HEALTHCHECK_INCREMENTAL = os.environ.get("HEALTHCHECK_INCREMENTAL","false").lower() == "true"
+#the fraction of the unchanged layers re-tested in each incremental healthcheck
+HEALTHCHECK_RETEST_FRACTION = float(os.environ.get("HEALTHCHECK_RETEST_FRACTION",0.1))
+#run the healthcheck in shards: the workspaces or the layers are partitioned by consistent hash
+HEALTHCHECK_SHARDS = int(os.environ.get("HEALTHCHECK_SHARDS",1))
+#'workspace' or 'layer'
+HEALTHCHECK_SHARD_BY = os.environ.get("HEALTHCHECK_SHARD_BY","layer").lower()
+#run only the shard with this index(starting from 0) in this process, used to run the shards in multiple containers;
+#all the shards are run in local processes if not set
+HEALTHCHECK_SHARD_INDEX = int(os.environ["HEALTHCHECK_SHARD_INDEX"]) if os.environ.get("HEALTHCHECK_SHARD_INDEX") else None
+#the id shared by the shards of the same healthcheck run, default is the current date
+HEALTHCHECK_SHARD_RUNID = os.environ.get("HEALTHCHECK_SHARD_RUNID")
+#merge the partial reports of the shards instead of running a healthcheck
+HEALTHCHECK_SHARD_MERGE = os.environ.get("HEALTHCHECK_SHARD_MERGE","false").lower() == "true"
+#the report rows are written by a dedicated thread: the size of its bounded queue, and the files are flushed every batch of rows or flush interval(seconds)
+REPORT_WRITER_QUEUESIZE = int(os.environ.get("REPORT_WRITER_QUEUESIZE",1000))
+REPORT_WRITER_BATCHSIZE = int(os.environ.get("REPORT_WRITER_BATCHSIZE",500))
+REPORT_WRITER_FLUSH_INTERVAL = float(os.environ.get("REPORT_WRITER_FLUSH_INTERVAL",1))
+#also write the typed result records of the healthcheck: 'jsonl'(gzip compressed json lines) or 'parquet'(requires pyarrow); disabled if empty
+HEALTHCHECK_RESULT_FORMAT = os.environ.get("HEALTHCHECK_RESULT_FORMAT","").lower()
+RESULT_COMPRESSLEVEL = int(os.environ.get("RESULT_COMPRESSLEVEL",6))
+RESULT_ROWGROUP_SIZE = int(os.environ.get("RESULT_ROWGROUP_SIZE",10000))
 
 IGNORE_EMPTY_WORKSPACE = os.environ.get("IGNORE_EMPTY_WORKSPACE","false").lower() == "true"
 IGNORE_EMPTY_DATASTORE = os.environ.get("IGNORE_EMPTY_DATASTORE","false").lower() == "true"
 IGNORE_EMPTY_WMSSTORE = os.environ.get("IGNORE_EMPTY_WMSSTORE","false").lower() == "true"
 IGNORE_EMPTY_COVERAGESTORE = os.environ.get("IGNORE_EMPTY_COVERAGESTORE","false").lower() == "true"
 
-TASK_RETRY_INTERVAL = int(os.environ.get("TASK_RETRY_INTERVAL",300)) #seconds,
+TASK_RETRY_INTERVAL = int(os.environ.get("TASK_RETRY_INTERVAL",300)) #seconds, the maximum delay before retrying a failed task
+#the delay(seconds) before the first retry of a failed task per error class, doubled for each further retry; the error classes are the same as HTTP_RETRY_RULES
+TASK_RETRY_DELAYS = dict((r.split(":",1)[0].strip(),int(r.split(":",1)[1].strip())) for r in os.environ.get("TASK_RETRY_DELAYS","connection:60,timeout:30,__DEFAULT__:10").split(",") if ":" in r)
 TASK_ATTEMPTS = os.environ.get("TASK_ATTEMPTS") #name '__DEFAULT__' means the default attempts for all tasks
 if TASK_ATTEMPTS:
     TASK_ATTEMPTS = [ t.rsplit(":",1) for t in TASK_ATTEMPTS.split(",") if t.strip()]
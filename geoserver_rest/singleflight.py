@@ -0,0 +1,107 @@
+import threading
+import logging
+import collections
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight(object):
+    """
+    Coalesce the concurrent calls with the same key into one call;
+    the callers arriving while the call is in flight wait for it and get its result or its exception.
+    shared: the number of the calls which were served by another in-flight call
+    """
+    class Call(object):
+        __slots__ = ("event","result","exception")
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.exception = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self,key,func,*args,**kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self.Call()
+                self._calls[key] = call
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+
+        try:
+            call.result = func(*args,**kwargs)
+            return call.result
+        except BaseException as ex:
+            call.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+class LoadingCache(object):
+    """
+    A thread-safe dict whose missing value is loaded only once, the concurrent loads of the same key are coalesced
+    maxsize: keep at most maxsize values and evict the least recently used value if not None
+    """
+    def __init__(self,maxsize=None):
+        self.maxsize = maxsize
+        self._data = {} if maxsize is None else collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._singleflight = SingleFlight()
+
+    def __contains__(self,key):
+        return key in self._data
+
+    def __getitem__(self,key):
+        return self._data[key]
+
+    def __setitem__(self,key,value):
+        if self.maxsize is None:
+            self._data[key] = value
+        else:
+            with self._lock:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self,key,loader,*args,**kwargs):
+        """
+        Return the value of the key, call loader(*args,**kwargs) to load the value if missing
+        """
+        try:
+            if self.maxsize is None:
+                return self._data[key]
+            else:
+                with self._lock:
+                    self._data.move_to_end(key)
+                    return self._data[key]
+        except KeyError as ex:
+            return self._singleflight.do(key,self._load,key,loader,*args,**kwargs)
+
+    def _load(self,key,loader,*args,**kwargs):
+        #the value may be loaded by the previous flight which finished just now
+        if key in self._data:
+            return self._data[key]
+        value = loader(*args,**kwargs)
+        self[key] = value
+        return value
+
+    def clear(self):
+        self._data.clear()
@@ -3,6 +3,8 @@ import queue
 import collections
 import logging
 import time
+import heapq
+import itertools
 from datetime import timedelta
 
 from . import settings
@@ -10,78 +12,138 @@ from . import timezone
 
 logger = logging.getLogger(__name__)
 
+def depth_first(task):
+    """
+    The deeper tasks in the task tree run first, so the leaves run before more siblings are expanded
+    """
+    return -getattr(task,"depth",0)
+
+def class_priority(priorities,default=0):
+    """
+    Return a priority function based on the task class
+    priorities: dict(task class,priority), the lower value runs first
+    """
+    def _priority(task):
+        return priorities.get(task.__class__,default)
+    return _priority
+
+SCHEDULINGS = {
+    "fifo": None,
+    "depthfirst": depth_first
+}
+
+class TaskQueue(queue.PriorityQueue):
+    """
+    A priority queue of tasks, the tasks with the same priority run in FIFO order
+    priority: a function to return the priority of a task, the lower value runs first; all tasks have the same priority if None
+    peak: the maximum length of the queue
+    """
+    def __init__(self,priority=None):
+        super().__init__()
+        self.priority = priority
+        self.peak = 0
+        self._seq = itertools.count()
+
+    def _put(self,task):
+        super()._put((self.priority(task) if self.priority else 0,next(self._seq),task))
+        if len(self.queue) > self.peak:
+            self.peak = len(self.queue)
+
+    def _get(self):
+        return super()._get()[2]
+
 class TaskRunner(object):
     endtask = object()
     finished_tasks = None
 
-    def __init__(self,name,dop=1,keep_tasks=False):
+    def __init__(self,name,dop=1,keep_tasks=False,priority=None):
         """
         timeout: the timeout for getting task from queue
         dop: degree of parallelism
+        priority: a function to return the priority of a task or a scheduling name in SCHEDULINGS, FIFO if None
         """
         self.name = name
         self.dop = dop
-        self.tasks = queue.Queue()
-        self.retrytasks = queue.Queue()
+        self.tasks = TaskQueue(SCHEDULINGS[priority] if isinstance(priority,str) else priority)
+        #the timer heap of the retry tasks: (due time,sequence,task)
+        self.retrytasks = []
+        self._retrycond = threading.Condition()
+        self._retryseq = itertools.count()
+        self._retryscheduler = None
+        self._shutdown = False
         if keep_tasks:
             self.finished_tasks = queue.Queue()
         self.workers = None
         self.total_tasks = 0
 
-    def add_task(self,task):
+    def keep(self,task):
+        """
+        Return the object kept in finished_tasks for the finished task
+        """
+        return task
+
+    def add_task(self,task,parent=None):
         """
         Should call this method in sync mode(in the same thread)
+        parent: the task which creates this task
         """
-        self.tasks.put(task)
+        task.depth = parent.depth + 1 if parent else 0
         task.taskrunner = self
+        self.tasks.put(task)
         self.total_tasks += 1
     
-    def add_retrytask(self,task):
+    def add_retrytask(self,task,delay=None):
         """
-        Should call this method in sync mode(in the same thread)
+        Schedule the task to run again after delay(default settings.TASK_RETRY_INTERVAL) seconds.
+        The task is moved to the queue 'tasks' by the retry scheduler when it is due
         """
-        self.retrytasks.put(task)
+        due = time.time() + (settings.TASK_RETRY_INTERVAL if delay is None else delay)
+        with self._retrycond:
+            heapq.heappush(self.retrytasks,(due,next(self._retryseq),task))
+            self._retrycond.notify_all()
 
-    def readd_retrytasks(self):
+    def schedule_retrytasks(self):
         """
-        move the retry tasks from queue 'retrytasks' to queue 'tasks'
+        Run in the retry scheduler thread, move the due retry tasks from the timer heap to the queue 'tasks'
         """
-        if self.retrytasks.empty():
-            return 0
-
-        count = 0
-        while True:
-            try:
-                self.tasks.put(self.retrytasks.get(block=False,timeout=None))
-                count += 1
-            except queue.Empty as ex:
-                break
-            except Exception as ex:
-                logger.error("{} : Failed to move task from queue 'retrytasks' to queue 'tasks'.{}".format(self.name,ex))
-                continue
+        with self._retrycond:
+            while not self._shutdown:
+                if not self.retrytasks:
+                    self._retrycond.wait()
+                    continue
+                wait = self.retrytasks[0][0] - time.time()
+                if wait > 0:
+                    self._retrycond.wait(wait)
+                    continue
+                #put the task before removing it from the heap, so the task is always tracked by one of them
+                task = self.retrytasks[0][2]
+                self.tasks.put(task)
+                heapq.heappop(self.retrytasks)
+                logger.debug("{} : Retry the task {}".format(self.name,task))
+                self._retrycond.notify_all()
 
-        logger.info("{} : Move {} tasks from queue 'retrytasks' to queue 'tasks'".format(self.name,count))
-
-        return count
-    
     def wait_to_shutdown(self):
         """
         Wait until all tasks are finished and worker threads are terminated.
+        The runner is finished as soon as the queue 'tasks' and the retry timer heap are both empty
         """
         logger.info("{} : Wait all tasks to finish.".format(self.name))
-        retry = 0
         while True:
             self.tasks.join()
-            if self.retrytasks.empty():
-                break
-            else:
-                retry += 1
-                logger.info("{} : All tasks in the queue 'tasks' have been finished, wait {} seconds before the {}th time to retry the failed tasks".format(self.name,settings.TASK_RETRY_INTERVAL,retry))
-                time.sleep(settings.TASK_RETRY_INTERVAL)
-                count = self.readd_retrytasks()
-                logger.info("{} : The {}th time to retry the failed {} tasks now".format(self.name,retry,count))
+            with self._retrycond:
+                if not self.retrytasks:
+                    break
+                logger.info("{} : All tasks in the queue 'tasks' have been finished, wait {} retry tasks to be due, the earliest one is due in {:.1f} seconds".format(self.name,len(self.retrytasks),max(0,self.retrytasks[0][0] - time.time())))
+                #woken up when a retry task is moved to the queue 'tasks'
+                self._retrycond.wait()
         logger.info("{} : All tasks({}) are finished.".format(self.name,self.total_tasks))
 
+        with self._retrycond:
+            self._shutdown = True
+            self._retrycond.notify_all()
+        if self._retryscheduler:
+            self._retryscheduler.join()
+
         for worker in self.workers:
             self.tasks.put(self.endtask)
         logger.info("{} : All tasks have been finish, wait runner workers to end".format(self.name))
@@ -92,6 +154,9 @@ class TaskRunner(object):
         logger.info("{} : All runner workers have been end".format(self.name))
 
     def start(self):
+        self._shutdown = False
+        self._retryscheduler = threading.Thread(target=self.schedule_retrytasks,name="RetryScheduler-{}".format(self.name),daemon=True)
+        self._retryscheduler.start()
         self.workers = []
         if self.dop == 1:
             self.workers.append(TaskWorker("TaskWorker-{}".format(self.name),self))
@@ -128,7 +193,7 @@ class TaskWorker(threading.Thread):
                 try:
                     self.runner.run_task(task)
                     if self.runner.finished_tasks:
-                        self.runner.finished_tasks.put(task)
+                        self.runner.finished_tasks.put(self.runner.keep(task))
                 finally:
                     self.runner.tasks.task_done()
                 logger.debug("{0} : End to run task {1}".format(self.name,task))
@@ -140,13 +205,20 @@ class GeoserverTaskRunner(TaskRunner):
     endtask = object()
     finished_tasks = None
 
-    def __init__(self,name,geoserver,dop=1,keep_tasks=False):
+    def __init__(self,name,geoserver,dop=1,keep_tasks=False,priority=None):
         """
         timeout: the timeout for getting task from queue
         dop: degree of parallelism
+        priority: a function to return the priority of a task or a scheduling name in SCHEDULINGS, FIFO if None
         """
-        super().__init__(name,dop=dop,keep_tasks=keep_tasks)
+        super().__init__(name,dop=dop,keep_tasks=keep_tasks,priority=priority)
         self.geoserver = geoserver
+        #one connection per worker
+        self.geoserver.set_poolsize(dop)
+
+    def keep(self,task):
+        #only keep the compact summary, the results and details of the finished tasks can take gigabytes for a large catalog
+        return task.summary()
 
     def run_task(self,task):
         try:
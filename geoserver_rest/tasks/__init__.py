@@ -7,7 +7,8 @@ from .coveragetasks import *
 from .wmslayertasks import *
 from .layergrouptasks import *
 from .mapservicetasks import *
-from .base import OutOfSyncTask,Task
+from .capabilitiestasks import *
+from .base import OutOfSyncTask,CarriedForwardTask,TaskSummary,Task
 
 
 class CheckGeoserverAlive(Task):
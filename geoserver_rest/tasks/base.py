@@ -3,10 +3,13 @@ import traceback
 import requests
 import json
 import time
+import random
 import logging
 
 from .. import timezone
 from .. import settings
+from .. import utils
+from ..retrypolicy import is_retryable_message,RetryPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +29,15 @@ class Task(object):
 
     trieddata = None
     taskrunner = None
+    #the depth in the task tree, set by the task runner
+    depth = 0
+    #the incremental healthcheck: the key of the layer tested by this task, and the key of the layer whose tests are created by this detail task
+    layerkey = None
+    fingerprintkey = None
+    #the layer is unchanged, its tests are not created and the results of its last tests are carried forward
+    unchanged = False
+    #the result of the task is the size in bytes of the tested response
+    sized_result = False
 
     _messages = None
     def __init__(self,post_actions_factory = None):
@@ -55,6 +67,13 @@ class Task(object):
                 v = getattr(self,arg)
                 yield (arg,"" if v is None else v)
 
+    @property
+    def key(self):
+        """
+        The key to identify the task among geoservers
+        """
+        return (self.category,utils.toMapKey(self.keyparameters))
+
     def format_parameters(self,separator=","):
         return separator.join("{}={}".format(k,json.dumps(v)) for k,v in self.parameters)
 
@@ -216,18 +235,7 @@ class Task(object):
         except Exception as ex:
             if not isinstance(ex,requests.ConnectionError):
                 #failed not because  geoserver is not ready, reduce the attempts by 1
-                exmsg = str(ex).lower()
-                if any(msg in exmsg for msg in [
-                        "the requested style can not be used with this layer",
-                        "unknown wkb type",
-                        "errors while inspecting the location of an external graphic",
-                        "unknown font",
-                        "exceptioncode=\"tileoutofrange\"",
-                        "http error code 401",
-                        "could not find layer",
-                        "could not locate a layer",
-                        "rendering process failed"
-                ]):
+                if not is_retryable_message(str(ex)):
                     #this issues can't be fixed by retry
                     self.attempts = 0
                 else:
@@ -245,8 +253,9 @@ class Task(object):
                 else:
                     self.trieddata.append((self.starttime,timezone.localtime(),ex))
                 #readd this task as retry tasks
-                logger.info("Task({1}({0})) is scheduled to retry".format(geoserver,self))
-                self.taskrunner.add_retrytask(self)
+                delay = self.retry_delay(ex)
+                logger.info("Task({1}({0})) is scheduled to retry in {2:.1f} seconds".format(geoserver,self,delay))
+                self.taskrunner.add_retrytask(self,delay)
 
                 return
         finally:
@@ -265,12 +274,49 @@ class Task(object):
                         else:
                             self.exceptions = [ex]
                         
+    def retry_delay(self,ex):
+        """
+        Return the delay(seconds) before retrying the task, based on the number of the failed attempts and the error class of the exception
+        """
+        errorclass = RetryPolicy.classify(ex=ex) or "__DEFAULT__"
+        delay = settings.TASK_RETRY_DELAYS.get(errorclass,settings.TASK_RETRY_DELAYS.get("__DEFAULT__",10))
+        delay = min(settings.TASK_RETRY_INTERVAL,delay * (2 ** (len(self.trieddata or []) - 1)))
+        #jitter, avoid retrying the tasks failed at the same time together
+        return random.uniform(delay / 2,delay)
+
     def _exec(self,geoserver):
         raise Exception("Not implemented")
 
     def __str__(self):
         return "{}({})".format(self.category,",".join("{}={}".format(k,json.dumps(v)) for k,v in self.keyparameters))
 
+    def summary(self):
+        """
+        Return the compact summary of the finished task which is kept for the comparison among geoservers
+        """
+        return TaskSummary(self)
+
+class TaskSummary(object):
+    """
+    The compact summary of a finished task, only keeps what the comparison among geoservers needs;
+    the result, the details and the exceptions of the task are released.
+    key: the key of the task, (category,key parameters)
+    parameters: the parameters formatted with the separator '\r\n'
+    """
+    __slots__ = ("category","key","parameters","status")
+
+    def __init__(self,task):
+        self.category = task.category
+        self.key = task.key
+        self.parameters = task.format_parameters("\r\n")
+        self.status = task.status
+
+    def format_parameters(self,separator=","):
+        return self.parameters if separator == "\r\n" else self.parameters.replace("\r\n",separator)
+
+    def __str__(self):
+        return "{}({})".format(self.category,",".join("{}={}".format(k,json.dumps(v)) for k,v in self.key[1]))
+
 
 class OutOfSyncTask(Task):
     def __init__(self,task,missing=True):
@@ -304,3 +350,23 @@ class OutOfSyncTask(Task):
                 "Not exist in admin geoserver"
             )
 
+class CarriedForwardTask(Task):
+    """
+    Report the results of the last tests of an unchanged layer, with their original time
+    """
+    def __init__(self,tested,reportrows,warningrows):
+        super().__init__()
+        self.tested = tested
+        self._reportrows = reportrows
+        self._warningrows = warningrows
+
+    def _exec(self,geoserver):
+        raise Exception("Not Supported")
+
+    def reportrows(self):
+        for row in self._reportrows:
+            yield (*row[:-1],"Carried forward, the layer is unchanged since {}\r\n{}".format(self.tested,row[-1] or ""))
+
+    def warnings(self):
+        for row in self._warningrows:
+            yield tuple(row)
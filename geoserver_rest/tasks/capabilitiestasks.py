@@ -0,0 +1,187 @@
+import logging
+
+from .. import settings
+from .featuretypetasks import WFSGetCapabilitiesTask,GetFeatureTypeDetail,GetFeatures
+from .coveragetasks import CoverageGetCapabilitiesTask,GetCoverageDetail
+from .wmslayertasks import WMSGetCapabilitiesTask,GetWMSLayerDetail
+from .layergrouptasks import GetLayergroupDetail
+from .mapservicetasks import *
+
+logger = logging.getLogger(__name__)
+
+#the GetCapabilities tasks whose indexes are used to create the layer tasks
+CAPABILITIES_TASKS = (WMSGetCapabilitiesTask,WFSGetCapabilitiesTask,CoverageGetCapabilitiesTask,WMTSGetCapabilitiesTask)
+
+#the crs of the wgs84 bounding box in the capabilities
+CAPABILITIES_BBOX_CRS = "EPSG:4326"
+
+def _epsg(crs):
+    """
+    Return the crs in the format 'EPSG:xxxx', for example: 'urn:ogc:def:crs:EPSG::28350' => 'EPSG:28350'
+    """
+    if crs and crs.lower().startswith("urn:") and "epsg" in crs.lower():
+        return "EPSG:{}".format(crs.rsplit(":",1)[-1])
+    return crs
+
+def _split_name(name):
+    """
+    Return (workspace,layername) of the advertised layer name
+    """
+    if ":" in name:
+        return name.split(":",1)
+    return (None,name)
+
+def _excluded(workspace,layername):
+    return workspace in settings.EXCLUDED_LAYERS and layername in settings.EXCLUDED_LAYERS[workspace]
+
+def _get_layer(index,workspace,layername):
+    if not index:
+        return None
+    return index.get_layer(workspace,layername) if workspace else index.get_layer(layername)
+
+def _resource_type(layer,workspace,layername,wfs,wcs,layergroups=None):
+    """
+    Return the resource type of the advertised layer: 'featuretype','coverage','layergroup' or 'wmslayer'
+    A layer which is neither advertised by wfs nor wcs is a layergroup if it contains nested layers or is listed in layergroups;
+    otherwise it is a wms layer. A layergroup in 'single' or 'opaque' mode doesn't advertise its nested layers.
+    layergroups: the set of (workspace,layergroup) listed by the rest api
+    """
+    if _get_layer(wfs,workspace,layername):
+        return "featuretype"
+    elif _get_layer(wcs,workspace,layername):
+        return "coverage"
+    elif layer.group:
+        return "layergroup"
+    elif layergroups and (workspace,layername) in layergroups:
+        return "layergroup"
+    else:
+        return "wmslayer"
+
+def unclassified_workspaces(capabilities):
+    """
+    Return the set of the workspaces which have the advertised layers whose resource types can't be decided from the capabilities,
+    the layergroups of these workspaces should be listed to tell the layergroups from the wms layers
+    capabilities: dict(task service,CapabilitiesIndex or None if failed)
+    """
+    wfs = capabilities.get(WFSGetCapabilitiesTask.service)
+    wcs = capabilities.get(CoverageGetCapabilitiesTask.service)
+    workspaces = set()
+    for service in (WMSGetCapabilitiesTask.service,WMTSGetCapabilitiesTask.service):
+        for layer in (capabilities.get(service) or []):
+            workspace,layername = _split_name(layer.name)
+            if workspace and not layer.group and not _excluded(workspace,layername) and _resource_type(layer,workspace,layername,wfs,wcs) == "wmslayer":
+                workspaces.add(workspace)
+    return workspaces
+
+def _create_detailtask(resource_type,workspace,layername,post_actions_factory):
+    """
+    Return the rest detail task of the layer whose capabilities entry is incomplete.
+    The advertised layer and its store are enabled.
+    """
+    if resource_type == "featuretype":
+        return GetFeatureTypeDetail(workspace,None,layername,{"enabled":True},post_actions_factory=post_actions_factory)
+    elif resource_type == "coverage":
+        return GetCoverageDetail(workspace,None,layername,{"enabled":True},post_actions_factory=post_actions_factory)
+    elif resource_type == "layergroup":
+        return GetLayergroupDetail(workspace,layername,post_actions_factory=post_actions_factory)
+    else:
+        return GetWMSLayerDetail(workspace,None,layername,{"enabled":True},post_actions_factory=post_actions_factory)
+
+def _create_wmstask(resource_type,workspace,layername,bbox,style,post_actions_factory):
+    if resource_type == "featuretype":
+        return TestWMSService4FeatureType(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),style,zoom=settings.TEST_ZOOM,post_actions_factory=post_actions_factory)
+    elif resource_type == "coverage":
+        return TestWMSService4Coverage(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),style,zoom=settings.TEST_ZOOM,post_actions_factory=post_actions_factory)
+    elif resource_type == "layergroup":
+        return TestWMSService4Layergroup(workspace,layername,list(bbox),style,zoom=settings.TEST_ZOOM,post_actions_factory=post_actions_factory,srs=CAPABILITIES_BBOX_CRS)
+    else:
+        return TestWMSService4WMSLayer(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),style,zoom=settings.TEST_ZOOM,post_actions_factory=post_actions_factory)
+
+def _create_wmtstask(resource_type,workspace,layername,bbox,gridset,post_actions_factory):
+    if resource_type == "featuretype":
+        return TestWMTSService4FeatureType(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),None,post_actions_factory=post_actions_factory,gridset=gridset,zoom=settings.TEST_ZOOM)
+    elif resource_type == "coverage":
+        return TestWMTSService4Coverage(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),None,post_actions_factory=post_actions_factory,gridset=gridset,zoom=settings.TEST_ZOOM)
+    elif resource_type == "layergroup":
+        return TestWMTSService4Layergroup(workspace,layername,list(bbox),None,post_actions_factory=post_actions_factory,gridset=gridset,zoom=settings.TEST_ZOOM,srs=CAPABILITIES_BBOX_CRS)
+    else:
+        return TestWMTSService4WMSLayer(workspace,None,layername,CAPABILITIES_BBOX_CRS,list(bbox),None,post_actions_factory=post_actions_factory,gridset=gridset,zoom=settings.TEST_ZOOM)
+
+def _create_featurestask(workspace,layername,wfslayer,bbox,post_actions_factory):
+    featuredetails = {
+        "enabled":True,
+        #the geometry type is not advertised, only used to decide whether to query the features with bbox
+        "geometry":True if bbox else None,
+        "srs":_epsg(wfslayer.crs[0]) if wfslayer.crs else CAPABILITIES_BBOX_CRS,
+        "latLonBoundingBox":dict(zip(("minx","miny","maxx","maxy"),bbox),crs=CAPABILITIES_BBOX_CRS) if bbox else None
+    }
+    return GetFeatures(workspace,None,layername,featuredetails,{"enabled":True},post_actions_factory=post_actions_factory)
+
+def createtasks_FromCapabilities(capabilities,post_actions_factory=None,limit = 0,layergroups=None):
+    """
+    a generator to return the layer test tasks created from the parsed capabilities, without any rest call
+        WMS layers: TestWMSService4* tasks for the default style and the other advertised styles, and GetFeatures if the layer is advertised by WFS
+        WFS featuretypes not advertised by WMS: GetFeatures
+        WMTS layers: TestWMTSService4* tasks for the gridsets in settings.GWC_GRIDSETS linked by the layer
+    A layer whose WMS entry has no bounding box falls back to the rest detail task.
+    The store is not advertised and is reported as empty.
+    capabilities: dict(task service,CapabilitiesIndex or None if failed)
+    layergroups: the set of (workspace,layergroup) of the workspaces returned by unclassified_workspaces
+    """
+    wms = capabilities.get(WMSGetCapabilitiesTask.service)
+    wfs = capabilities.get(WFSGetCapabilitiesTask.service)
+    wcs = capabilities.get(CoverageGetCapabilitiesTask.service)
+    wmts = capabilities.get(WMTSGetCapabilitiesTask.service)
+
+    row = 0
+    for layer in (wms or []):
+        workspace,layername = _split_name(layer.name)
+        if _excluded(workspace,layername):
+            continue
+        row += 1
+        if limit > 0 and row > limit:
+            break
+        resource_type = _resource_type(layer,workspace,layername,wfs,wcs,layergroups)
+        if not layer.bbox:
+            yield _create_detailtask(resource_type,workspace,layername,post_actions_factory)
+            continue
+
+        if resource_type == "featuretype":
+            wfslayer = _get_layer(wfs,workspace,layername)
+            yield _create_featurestask(workspace,layername,wfslayer,wfslayer.bbox or layer.bbox,post_actions_factory)
+
+        #the first advertised style is the default style
+        for style in (None,*layer.styles[1:]):
+            yield _create_wmstask(resource_type,workspace,layername,layer.bbox,style,post_actions_factory)
+
+    for layer in (wfs or []):
+        if wms and layer.name in wms:
+            continue
+        workspace,layername = _split_name(layer.name)
+        if _excluded(workspace,layername):
+            continue
+        row += 1
+        if limit > 0 and row > limit:
+            break
+        if layer.bbox:
+            yield _create_featurestask(workspace,layername,layer,layer.bbox,post_actions_factory)
+        else:
+            yield _create_detailtask("featuretype",workspace,layername,post_actions_factory)
+
+    row = 0
+    for layer in (wmts or []):
+        workspace,layername = _split_name(layer.name)
+        if _excluded(workspace,layername):
+            continue
+        row += 1
+        if limit > 0 and row > limit:
+            break
+        wmslayer = wms.get_layer(layer.name) if wms else None
+        bbox = layer.bbox or (wmslayer.bbox if wmslayer else None)
+        if not bbox:
+            continue
+        resource_type = _resource_type(wmslayer or layer,workspace,layername,wfs,wcs,layergroups)
+        for gridset in settings.GWC_GRIDSETS:
+            if gridset not in layer.tilematrixsets:
+                continue
+            yield _create_wmtstask(resource_type,workspace,layername,bbox,gridset,post_actions_factory)
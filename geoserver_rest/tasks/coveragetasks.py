@@ -17,21 +17,20 @@ class CoverageGetCapabilitiesTask(Task):
     keyarguments = ("service",)
     service = "Coverage"
     url = None
+    layers = None
+    #the parsed capabilities index, used by the fast healthcheck to create the layer tasks
+    index = None
+    sized_result = True
 
     def _format_result(self):
-        return "URL : {}\r\nCapabilities File Size = {}".format(self.url or "",self.result)
+        return "URL : {}\r\nCapabilities File Size = {}\r\nAdvertised Layers = {}".format(self.url or "",self.result,self.layers)
 
     def _exec(self,geoserver):
         self.url = geoserver.coveragecapabilities_url()
-        file = geoserver.get_coveragecapabilities()
-        try:
-            return os.path.getsize(file)
-        finally:
-            try:
-                os.remove(file)
-            except:
-                logger.error("Failed to delete temporary file '{}'".format(file))
-                pass
+        #the document is parsed while downloading, nothing is written to disk
+        self.index = geoserver.get_coveragecapabilities_index()
+        self.layers = len(self.index)
+        return self.index.size
 
 class ListCoverages(Task):
     """
@@ -16,20 +16,20 @@ class WFSGetCapabilitiesTask(Task):
     keyarguments = ("service",)
     service = "WFS"
     url = None
+    layers = None
+    #the parsed capabilities index, used by the fast healthcheck to create the layer tasks
+    index = None
+    sized_result = True
+
     def _format_result(self):
-        return "URL : {}\r\nCapabilities File Size = {}".format(self.url or "",self.result)
+        return "URL : {}\r\nCapabilities File Size = {}\r\nAdvertised Layers = {}".format(self.url or "",self.result,self.layers)
 
     def _exec(self,geoserver):
         self.url = geoserver.wfscapabilities_url()
-        file = geoserver.get_wfscapabilities()
-        try:
-            return os.path.getsize(file)
-        finally:
-            try:
-                os.remove(file)
-            except:
-                logger.error("Failed to delete temporary file '{}'".format(file))
-                pass
+        #the document is parsed while downloading, nothing is written to disk
+        self.index = geoserver.get_wfscapabilities_index()
+        self.layers = len(self.index)
+        return self.index.size
 
 
 class ListFeatureTypes(Task):
@@ -1,11 +1,11 @@
 import json
 import logging
 import os
-from pyproj import Transformer
 
 from .base import Task
 from .. import settings
 from .. import utils
+from .. import crs
 
 logger = logging.getLogger(__name__)
 
@@ -15,21 +15,20 @@ class WMTSGetCapabilitiesTask(Task):
     keyarguments = ("service",)
     service = "WMTS"
     url = None
+    layers = None
+    #the parsed capabilities index, used by the fast healthcheck to create the layer tasks
+    index = None
+    sized_result = True
 
     def _format_result(self):
-        return "URL : {}\r\nCapabilities File Size = {}".format(self.url or "",self.result)
+        return "URL : {}\r\nCapabilities File Size = {}\r\nAdvertised Layers = {}".format(self.url or "",self.result,self.layers)
 
     def _exec(self,geoserver):
         self.url = geoserver.wmtscapabilities_url()
-        file = geoserver.get_wmtscapabilities()
-        try:
-            return os.path.getsize(file)
-        finally:
-            try:
-                os.remove(file)
-            except:
-                logger.error("Failed to delete temporary file '{}'".format(file))
-                pass
+        #the document is parsed while downloading, nothing is written to disk
+        self.index = geoserver.get_wmtscapabilities_index()
+        self.layers = len(self.index)
+        return self.index.size
 
 class TestWMTSService(Task):
     """
@@ -39,6 +38,7 @@ class TestWMTSService(Task):
     column = None
     format = settings.TEST_FORMAT
     url = None
+    sized_result = True
 
     def __init__(self,workspace,store,layername,srs,layer_bbox,style,post_actions_factory = None,zoom=-1,gridset=settings.GWC_GRIDSET):
         """
@@ -77,16 +77,9 @@ image size : {}
 
     def set_with_gridset(self,geoserver):
         self.gridsetdata = geoserver.get_gridset(self.gridset)
-        if self.srs.upper() != self.gridsetdata["srs"]:
-            layer_bbox = list(self.layer_bbox)
-            transformer = Transformer.from_crs(self.srs, self.gridsetdata["srs"])
-            layer_bbox[1], layer_bbox[0] = transformer.transform(layer_bbox[0],layer_bbox[1])
-            layer_bbox[3], layer_bbox[2] = transformer.transform(layer_bbox[2],layer_bbox[3])
-        else:
-            layer_bbox = self.layer_bbox
-
-        for i in range(len(layer_bbox)):
-            layer_bbox[i] = float(layer_bbox[i])
+        self.layer_bbox = [float(c) for c in self.layer_bbox]
+        #the bbox is in x/y(lon/lat) order for both the layer srs and the gridset srs
+        layer_bbox = crs.transform_bbox(self.srs,self.gridsetdata["srs"],self.layer_bbox)
 
         """
         if self.gridsetdata["srs"].upper() in ("EPSG:4326","EPSG:4283"): 
@@ -103,21 +96,14 @@ image size : {}
         """
 
         #get the gwc details
-        maxZoom = len(self.gridsetdata["resolutions"]) - 1
+        gridsetutil = geoserver.get_gridsetutil(self.gridset)
+        maxZoom = gridsetutil.maxzoom
         if self.zoom >= 0:
             if self.zoom > maxZoom:
                 self.zoom = maxZoom
         else:
-            zoom = maxZoom
-            while zoom > 0:
-                if geoserver.get_tile_count(self.gridset,self.layer_bbox,zoom) > 1:
-                    zoom -= 1
-                else:
-                    self.zoom = zoom
-                    break
-
-            if self.zoom < 0:
-                self.zoom = 0
+            #the highest zoom level whose tile covers the whole layer
+            self.zoom = gridsetutil.get_bbox_tile(gridsetutil.clip_bbox(layer_bbox) or layer_bbox)[0]
 
         self.layer_bbox_gridset = layer_bbox
 
@@ -143,7 +129,7 @@ image size : {}
             style=self.style or "",
             format=self.format
         )
-        img = geoserver.get_tile(
+        return geoserver.get_tile(
             self.workspace,
             self._layername,
             self.zoom,
@@ -151,16 +137,10 @@ image size : {}
             self.column,
             gridset=self.gridset,
             style=self.style or "",
-            format=self.format
+            format=self.format,
+            output="size",
+            validate=settings.TEST_IMAGE_VALIDATE
         )
-        try:
-            return os.path.getsize(img)
-        finally:
-            try:
-                os.remove(img)
-            except:
-                logger.error("Failed to delete temporary file '{}'".format(img))
-                pass
 
 class TestWMSService(TestWMTSService):
     """
@@ -192,7 +172,7 @@ class TestWMSService(TestWMTSService):
             format=self.format
         )
 
-        img = geoserver.get_map(
+        return geoserver.get_map(
             self.workspace,
             self._layername,
             self.bbox,
@@ -200,16 +180,10 @@ class TestWMSService(TestWMTSService):
             style=self.style or "",
             width=self.dimension[0],
             height=self.dimension[1],
-            format=self.format
+            format=self.format,
+            output="size",
+            validate=settings.TEST_IMAGE_VALIDATE
         )
-        try:
-            return os.path.getsize(img)
-        finally:
-            try:
-                os.remove(img)
-            except:
-                logger.error("Failed to delete temporary file '{}'".format(img))
-                pass
 
 class TestWMTSService4FeatureType(TestWMTSService):
     """
@@ -277,8 +251,8 @@ class TestWMTSService4Layergroup(TestWMTSService):
     arguments = ("workspace","layergroup","gridset","zoom","row","column","style")
     keyarguments = ("workspace","layergroup","gridset","style")
 
-    def __init__(self,workspace,layergroup,layer_bbox,style,post_actions_factory = None,zoom=-1,gridset=settings.GWC_GRIDSET):
-        super().__init__(workspace,None,layergroup,None,layer_bbox,style,post_actions_factory = post_actions_factory,zoom=zoom,gridset=gridset)
+    def __init__(self,workspace,layergroup,layer_bbox,style,post_actions_factory = None,zoom=-1,gridset=settings.GWC_GRIDSET,srs=None):
+        super().__init__(workspace,None,layergroup,srs,layer_bbox,style,post_actions_factory = post_actions_factory,zoom=zoom,gridset=gridset)
 
     @property 
     def layergroup(self):
@@ -289,8 +263,9 @@ class TestWMSService4Layergroup(TestWMSService,TestWMTSService4Layergroup):
     keyarguments = ("workspace","layergroup","srs","style","dimension","format")
     category = "Test WMS Service for Layergroup"
 
-    def __init__(self,workspace,layergroup,layer_bbox,style,post_actions_factory = None,zoom=-1,gridset=settings.GWC_GRIDSET,detailTask=None):
-        super().__init__(workspace,None,layergroup,None,layer_bbox,style,post_actions_factory = post_actions_factory,zoom=zoom,gridset=gridset)
+    def __init__(self,workspace,layergroup,layer_bbox,style,post_actions_factory = None,zoom=-1,gridset=settings.GWC_GRIDSET,detailTask=None,srs=None):
+        #the next __init__ in the mro is TestWMTSService4Layergroup's, which has a different signature
+        TestWMTSService.__init__(self,workspace,None,layergroup,srs,layer_bbox,style,post_actions_factory = post_actions_factory,zoom=zoom,gridset=gridset)
         self.detailTask = detailTask
 
 def createtasks_TestWMSService4FeatureType(getFeatureTypeDetailTask,limit = 0):
@@ -0,0 +1,31 @@
+"""
+The gwc gridset definitions used by the offline tile math tests, in the format returned by Geoserver.get_gridset
+"""
+GRIDSETS = {
+    "gda94": {
+        "name": "gda94",
+        "srs": {"number": 4283},
+        "extent": {"coords": [-180.0,-90.0,180.0,90.0]},
+        "alignTopLeft": False,
+        "resolutions": [0.703125 / (2 ** z) for z in range(22)],
+        "metersPerUnit": 111319.49079327358,
+        "pixelSize": 2.8E-4,
+        "scaleNames": ["gda94:{}".format(z) for z in range(22)],
+        "tileHeight": 256,
+        "tileWidth": 256,
+        "yCoordinateFirst": False
+    },
+    "mercator": {
+        "name": "mercator",
+        "srs": {"number": 3857},
+        "extent": {"coords": [-20037508.34,-20037508.34,20037508.34,20037508.34]},
+        "alignTopLeft": False,
+        "resolutions": [156543.03390625 / (2 ** z) for z in range(22)],
+        "metersPerUnit": 1.0,
+        "pixelSize": 2.8E-4,
+        "scaleNames": ["mercator:{}".format(z) for z in range(22)],
+        "tileHeight": 256,
+        "tileWidth": 256,
+        "yCoordinateFirst": False
+    }
+}
@@ -0,0 +1,124 @@
+import unittest
+import contextlib
+import tempfile
+import shutil
+
+from ..catalogsnapshot import CatalogSnapshot
+from ..geoserverhealthcheck import GeoserverHealthCheck
+
+class FakeGeoserver(object):
+    """
+    An in-memory geoserver with one workspace, one datastore and some featuretypes
+    failing: the names of the methods or the layers which raise an exception
+    """
+    geoserver_url = "http://fakegeoserver/geoserver"
+
+    def __init__(self,featuretypes=("ft1","ft2","ft3")):
+        self.featuretypes = list(featuretypes)
+        self.failing = set()
+        self.calls = []
+
+    def __str__(self):
+        return self.geoserver_url
+
+    def _call(self,name,*args):
+        self.calls.append((name,*args))
+        if name in self.failing or any(a in self.failing for a in args):
+            raise Exception("Failed to call {}{}".format(name,args))
+
+    def set_poolsize(self,poolsize):
+        pass
+
+    @contextlib.contextmanager
+    def conditional(self,etag=None,last_modified=None):
+        yield {"etag":None,"last_modified":None}
+
+    def list_workspaces(self):
+        self._call("list_workspaces")
+        return ["ws"]
+
+    def list_datastores(self,workspace):
+        self._call("list_datastores",workspace)
+        return ["ds"]
+
+    def list_wmsstores(self,workspace):
+        return []
+
+    def list_coveragestores(self,workspace):
+        return []
+
+    def list_layergroups(self,workspace):
+        return []
+
+    def get_datastore(self,workspace,storename):
+        self._call("get_datastore",workspace,storename)
+        return {"name":storename}
+
+    def list_featuretypes(self,workspace,storename=None):
+        self._call("list_featuretypes",workspace,storename)
+        return list(self.featuretypes)
+
+    def get_featuretype(self,workspace,layername,storename=None):
+        self._call("get_featuretype",workspace,layername)
+        return {"name":layername}
+
+    def get_featuretype_styles(self,workspace,layername):
+        self._call("get_featuretype_styles",workspace,layername)
+        return (None,[])
+
+class CatalogSnapshotTest(unittest.TestCase):
+    """
+    The failed refresh of the catalog snapshot, run without geoserver
+    """
+    def setUp(self):
+        self.geoserver = FakeGeoserver()
+        self.snapshot = CatalogSnapshot(self.geoserver,dop=2,gwc=False)
+
+    def test_failed_detail(self):
+        self.geoserver.failing.add("ft2")
+        self.snapshot.refresh()
+        self.assertTrue(self.snapshot.loaded)
+        self.assertEqual(sorted((kind,w,l) for kind,w,l,msg in self.snapshot.errors),[("layer","ws","ft2"),("styles","ws","ft2")])
+        self.assertEqual(self.snapshot.list_featuretypes("ws","ds"),["ft1","ft2","ft3"])
+
+        #the failed detail is read from the geoserver, the others are read from the snapshot
+        self.geoserver.failing.clear()
+        self.geoserver.calls.clear()
+        self.assertEqual(self.snapshot.get_featuretype("ws","ft1"),{"name":"ft1"})
+        self.assertEqual(self.snapshot.get_featuretype("ws","ft2"),{"name":"ft2"})
+        self.assertEqual(self.geoserver.calls,[("get_featuretype","ws","ft2")])
+
+        #the failed detail is fetched again in the next refresh
+        self.snapshot.refresh()
+        self.assertEqual(self.snapshot.errors,[])
+        self.geoserver.calls.clear()
+        self.assertEqual(self.snapshot.get_featuretype("ws","ft2"),{"name":"ft2"})
+        self.assertEqual(self.geoserver.calls,[])
+
+    def test_failed_refresh(self):
+        reports_home = tempfile.mkdtemp()
+        try:
+            healthcheck = GeoserverHealthCheck("unitest",self.geoserver.geoserver_url,"admin","geoserver",False,None,None,None,None,None,None,None,catalog_snapshot=True)
+            healthcheck._reports_home = reports_home
+            healthcheck.snapshot = self.snapshot
+            self.assertTrue(healthcheck.refresh_snapshot())
+            self.assertTrue(self.snapshot.loaded)
+
+            #the catalog was changed, but the listing failed
+            self.geoserver.featuretypes.append("ft4")
+            self.geoserver.failing.add("list_featuretypes")
+            self.assertFalse(healthcheck.refresh_snapshot())
+            self.assertFalse(self.snapshot.loaded)
+
+            #the snapshot is reset and the reads fall back to the geoserver instead of the previous catalog
+            self.geoserver.failing.clear()
+            self.assertEqual(self.snapshot.list_workspaces(),["ws"])
+            self.assertEqual(self.snapshot.list_featuretypes("ws","ds"),["ft1","ft2","ft3","ft4"])
+            self.geoserver.calls.clear()
+            self.assertEqual(self.snapshot.get_featuretype("ws","ft1"),{"name":"ft1"})
+            self.assertEqual(self.geoserver.calls,[("get_featuretype","ws","ft1")])
+        finally:
+            shutil.rmtree(reports_home)
+
+if __name__ == '__main__':
+    unittest.main()
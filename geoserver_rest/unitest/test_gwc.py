@@ -84,6 +84,18 @@ class WMSLayerTest(BaseTest):
             print("Update the gwc cache layer for layer({}) successfully".format(test_layername))
 
 
+            print("Try to seed the gwc cache layer for layer({})".format(test_layername))
+            self.geoserver.seed_gwclayer(test_workspace,test_layername,gridset="gda94",zoomstart=0,zoomstop=2,format="image/png",threadcount=1)
+            for task in self.geoserver.list_seedtasks(test_workspace,test_layername):
+                self.assertIn(task["status"],(-1,0,1,2),"The status of the seed task({}) should be -1,0,1 or 2 instead of {}".format(task["id"],task["status"]))
+            self.geoserver.kill_seedtasks(test_workspace,test_layername)
+            self.assertEqual(len([t for t in self.geoserver.list_seedtasks(test_workspace,test_layername) if t["status"] in (0,1)]),0,"The seed tasks of the gwc layer for layer({}) should have been killed".format(test_layername))
+            print("Seed the gwc cache layer for layer({}) successfully".format(test_layername))
+
+            print("Try to truncate the gwc cache layer for layer({}) in the bbox({})".format(test_layername,self.BBOX_AUSTRALIA))
+            self.geoserver.truncate_gwclayer(test_workspace,test_layername,gridset="gda94",zoomstart=0,zoomstop=5,bbox=self.BBOX_AUSTRALIA,format="image/png")
+            print("Truncate the gwc cache layer for layer({}) in the bbox({}) successfully".format(test_layername,self.BBOX_AUSTRALIA))
+
             print("Try to empty the gwc cache layer for layer({})".format(test_layername))
             self.geoserver.empty_gwclayer(test_workspace,test_layername)
 
@@ -0,0 +1,52 @@
+import unittest
+import random
+import collections
+
+from ..mixins.gwc import GridsetUtil
+from ..gwcseeder import GWCSeeder
+from .. import crs
+from .gridsets import GRIDSETS
+
+class GWCSeederTest(unittest.TestCase):
+    """
+    The partitions of the seeding jobs, run without geoserver
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gridsetutils = [GridsetUtil.get_instance("EPSG:4326"),GridsetUtil(GRIDSETS["mercator"])]
+
+    def check_partitions(self,seeder,gridsetutil,bbox,zoomstart,zoomstop):
+        partitions = list(seeder._partition(gridsetutil,bbox,zoomstart,zoomstop))
+        seeded = collections.defaultdict(collections.Counter)
+        for start,stop,partition,tiles in partitions:
+            self.assertLessEqual(tiles,seeder.max_tiles,"The partition({}) has more than {} tiles".format(partition,seeder.max_tiles))
+            self.assertEqual(tiles,sum(gridsetutil.get_tile_count(partition,zoom) for zoom in range(start,stop + 1)),"The tiles of the partition({}) are not correct".format(partition))
+            for zoom in range(start,stop + 1):
+                seeded[zoom].update(gridsetutil.tiles(partition,zoom))
+
+        self.assertEqual(sorted(seeded.keys()),list(range(zoomstart,zoomstop + 1)))
+        for zoom in range(zoomstart,zoomstop + 1):
+            #each tile of the bbox is seeded exactly once
+            self.assertEqual(set(seeded[zoom].keys()),set(gridsetutil.tiles(bbox,zoom)),"The partitions don't cover the tiles of the bbox({}) in zoom level {}".format(bbox,zoom))
+            self.assertEqual(max(seeded[zoom].values()),1,"The partitions overlap in zoom level {}".format(zoom))
+
+    def test_partition(self):
+        rand = random.Random(0)
+        for gridsetutil in self.gridsetutils:
+            for max_tiles in (1,7,100,1000):
+                seeder = GWCSeeder([None],max_tiles=max_tiles)
+                for i in range(5):
+                    x,y = rand.uniform(112,150),rand.uniform(-44,-14)
+                    latlonbbox = (x,y,x + rand.uniform(0.01,4),y + rand.uniform(0.01,4))
+                    bbox = gridsetutil.clip_bbox(crs.transform_bbox("EPSG:4326",gridsetutil.srs,latlonbbox))
+                    self.check_partitions(seeder,gridsetutil,bbox,0,10 if max_tiles > 1 else 6)
+
+    def test_split_wide_row(self):
+        #a row has more tiles than max_tiles, the row is split into columns
+        gridsetutil = GridsetUtil.get_instance("EPSG:4326")
+        seeder = GWCSeeder([None],max_tiles=10)
+        self.check_partitions(seeder,gridsetutil,(100.0,-10.0,160.0,-9.0),6,7)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+import random
+
+from ..mixins.gwc import GridsetUtil
+from ..gwctruncater import GWCTruncater
+from .. import crs
+from .gridsets import GRIDSETS
+
+class GWCTruncaterTest(unittest.TestCase):
+    """
+    The truncation ranges of the edited bboxes, run without geoserver
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gridsetutils = [GridsetUtil.get_instance("EPSG:4326"),GridsetUtil(GRIDSETS["mercator"])]
+
+    def random_bboxes(self,gridsetutil,size,rand):
+        bboxes = []
+        for i in range(size):
+            #the edited features are clustered in some areas
+            x,y = rand.choice(((115.8,-32.0),(116.0,-31.9),(146.0,-37.0)))
+            x,y = x + rand.uniform(-0.5,0.5),y + rand.uniform(-0.5,0.5)
+            latlonbbox = (x,y,x + rand.uniform(0.0001,0.05),y + rand.uniform(0.0001,0.05))
+            bboxes.append(gridsetutil.clip_bbox(crs.transform_bbox("EPSG:4326",gridsetutil.srs,latlonbbox)))
+        return bboxes
+
+    def test_ranges(self):
+        rand = random.Random(0)
+        for gridsetutil in self.gridsetutils:
+            for max_waste in (0,0.25,1):
+                truncater = GWCTruncater(None,max_waste=max_waste)
+                bboxes = self.random_bboxes(gridsetutil,30,rand)
+                zoomstart,zoomstop = 2,14
+                ranges = truncater._ranges(gridsetutil,bboxes,zoomstart,zoomstop)
+                self.assertLess(len(ranges),2 * len(bboxes))
+
+                truncated = dict((zoom,set()) for zoom in range(zoomstart,zoomstop + 1))
+                for start,stop,bbox,tiles in ranges:
+                    self.assertTrue(zoomstart <= start <= stop <= zoomstop,"The zoom levels({},{}) of the range are out of the truncated zoom levels".format(start,stop))
+                    self.assertEqual(tiles,sum(gridsetutil.get_tile_count(bbox,zoom) for zoom in range(start,stop + 1)),"The tiles of the range({}) are not correct".format(bbox))
+                    for zoom in range(start,stop + 1):
+                        truncated[zoom].update(gridsetutil.tiles(bbox,zoom))
+
+                for zoom in range(zoomstart,zoomstop + 1):
+                    for bbox in bboxes:
+                        missing = set(gridsetutil.tiles(bbox,zoom)) - truncated[zoom]
+                        self.assertFalse(missing,"The tiles({}) of the edited bbox({}) in zoom level {} are not truncated".format(list(missing)[:5],bbox,zoom))
+
+    def test_ranges_without_waste(self):
+        #the disjoint bboxes far away from each other are never merged
+        gridsetutil = GridsetUtil.get_instance("EPSG:4326")
+        truncater = GWCTruncater(None,max_waste=0)
+        bboxes = [[115.0,-32.0,115.01,-31.99],[146.0,-37.0,146.01,-36.99]]
+        ranges = truncater._ranges(gridsetutil,bboxes,5,12)
+        self.assertEqual(sorted((start,stop,list(bbox)) for start,stop,bbox,tiles in ranges),sorted((5,12,bbox) for bbox in bboxes))
+
+if __name__ == '__main__':
+    unittest.main()
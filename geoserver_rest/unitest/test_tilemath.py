@@ -0,0 +1,119 @@
+import unittest
+import math
+import random
+
+from ..mixins.gwc import GridsetUtil
+from .. import crs
+from .gridsets import GRIDSETS
+
+def random_bboxes(gridsetutil,size,seed=0):
+    """
+    Return the random bboxes from the whole gridset to 1/10^8 of the gridset
+    """
+    rand = random.Random(seed)
+    minx,miny,maxx,maxy = gridsetutil.extent
+    bboxes = []
+    for i in range(size):
+        width = (maxx - minx) * math.pow(10,rand.uniform(-8,0))
+        height = (maxy - miny) * math.pow(10,rand.uniform(-8,0))
+        x = rand.uniform(minx,maxx - width)
+        y = rand.uniform(miny,maxy - height)
+        bboxes.append((x,y,x + width,y + height))
+    return bboxes
+
+def covers(outer,inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and outer[2] >= inner[2] and outer[3] >= inner[3]
+
+class GridsetUtilTest(unittest.TestCase):
+    """
+    The tile math of the gridsets, run without geoserver
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gridsetutils = [GridsetUtil.get_instance("EPSG:4326"),GridsetUtil(GRIDSETS["mercator"]),GridsetUtil(GRIDSETS["gda94"])]
+
+    def test_tile_roundtrip(self):
+        rand = random.Random(0)
+        for gridsetutil in self.gridsetutils:
+            for zoom in range(gridsetutil.maxzoom + 1):
+                matrixwidth,matrixheight = gridsetutil.matrix_size(zoom)
+                for i in range(50):
+                    x,y = rand.randrange(matrixwidth),rand.randrange(matrixheight)
+                    tilebbox = gridsetutil.tile_bbox(zoom,x,y)
+                    center = ((tilebbox[0] + tilebbox[2]) / 2,(tilebbox[1] + tilebbox[3]) / 2)
+                    self.assertEqual(gridsetutil.get_tile(*center,zoom),(x,y),"The center of the tile({},{},{}) of the gridset({}) should be in the tile".format(zoom,x,y,gridsetutil.name))
+
+                    point = (rand.uniform(gridsetutil.extent[0],gridsetutil.extent[2]),rand.uniform(gridsetutil.extent[1],gridsetutil.extent[3]))
+                    tilebbox = gridsetutil.tile_bbox(zoom,*gridsetutil.get_tile(*point,zoom))
+                    self.assertTrue(covers(tilebbox,point + point),"The tile({}) of the gridset({}) should contain the point({})".format(tilebbox,gridsetutil.name,point))
+
+    def test_bbox_tile(self):
+        for gridsetutil in self.gridsetutils:
+            for bbox in random_bboxes(gridsetutil,2000):
+                zoom,x,y = gridsetutil.get_bbox_tile(bbox)
+                if zoom == 0 and gridsetutil.get_tile_count(bbox,0) > 1:
+                    #no tile covers the bbox, the tile in zoom level 0 is used
+                    self.assertEqual((x,y),gridsetutil.get_tile(bbox[0],bbox[1],0))
+                    continue
+                self.assertTrue(covers(gridsetutil.tile_bbox(zoom,x,y),bbox),"The tile({},{},{}) of the gridset({}) should cover the bbox({})".format(zoom,x,y,gridsetutil.name,bbox))
+                if zoom < gridsetutil.maxzoom:
+                    self.assertGreater(gridsetutil.get_tile_count(bbox,zoom + 1),1,"The tile({},{},{}) of the gridset({}) should be in the highest zoom level covering the bbox({})".format(zoom,x,y,gridsetutil.name,bbox))
+
+    def test_latlonbbox_tile(self):
+        rand = random.Random(0)
+        for gridsetutil in self.gridsetutils:
+            for i in range(200):
+                width,height = math.pow(10,rand.uniform(-5,1)),math.pow(10,rand.uniform(-5,1))
+                x,y = rand.uniform(112,154 - width),rand.uniform(-44,-10 - height)
+                latlonbbox = (x,y,x + width,y + height)
+                bbox = gridsetutil.clip_bbox(crs.transform_bbox("EPSG:4326",gridsetutil.srs,latlonbbox))
+                zoom,x,y = gridsetutil.get_bbox_tile(bbox)
+                tilebbox = crs.transform_bbox(gridsetutil.srs,"EPSG:4326",gridsetutil.tile_bbox(zoom,x,y))
+                #allow the rounding error of the transformation
+                tilebbox = (tilebbox[0] - 1e-9,tilebbox[1] - 1e-9,tilebbox[2] + 1e-9,tilebbox[3] + 1e-9)
+                self.assertTrue(covers(tilebbox,latlonbbox),"The tile({},{},{}) of the gridset({}) should cover the latlon bbox({})".format(zoom,x,y,gridsetutil.name,latlonbbox))
+
+class BatchTileMathTest(unittest.TestCase):
+    """
+    The numpy backed batch apis of GridsetUtil should return the same results as the scalar apis
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.gridsetutils = [GridsetUtil.get_instance("EPSG:4326"),GridsetUtil(GRIDSETS["mercator"]),GridsetUtil(GRIDSETS["gda94"])]
+
+    def test_tile_ranges(self):
+        for gridsetutil in self.gridsetutils:
+            bboxes = random_bboxes(gridsetutil,500)
+            zooms = list(range(gridsetutil.maxzoom + 1))
+            ranges = gridsetutil.tile_ranges(bboxes)
+            counts = gridsetutil.tile_counts(bboxes)
+            self.assertEqual(ranges.shape,(len(bboxes),len(zooms),4))
+            for i,bbox in enumerate(bboxes):
+                self.assertEqual([tuple(r) for r in ranges[i].tolist()],[gridsetutil.tile_range(bbox,zoom) for zoom in zooms],"The tile ranges of the bbox({}) in the gridset({}) are different".format(bbox,gridsetutil.name))
+                self.assertEqual(counts[i].tolist(),[gridsetutil.get_tile_count(bbox,zoom) for zoom in zooms],"The tile counts of the bbox({}) in the gridset({}) are different".format(bbox,gridsetutil.name))
+
+            #a subset of the zoom levels
+            self.assertEqual(gridsetutil.tile_counts(bboxes,[3,0,5]).tolist(),[[gridsetutil.get_tile_count(bbox,zoom) for zoom in (3,0,5)] for bbox in bboxes])
+
+    def test_tile_bboxes(self):
+        rand = random.Random(0)
+        for gridsetutil in self.gridsetutils:
+            tiles = []
+            for zoom in range(gridsetutil.maxzoom + 1):
+                matrixwidth,matrixheight = gridsetutil.matrix_size(zoom)
+                tiles.extend((zoom,rand.randrange(matrixwidth),rand.randrange(matrixheight)) for i in range(50))
+            zooms,xs,ys = zip(*tiles)
+            bboxes = gridsetutil.tile_bboxes(zooms,xs,ys)
+            self.assertEqual([tuple(b) for b in bboxes.tolist()],[gridsetutil.tile_bbox(*tile) for tile in tiles])
+            #the zoom level is broadcasted
+            self.assertEqual([tuple(b) for b in gridsetutil.tile_bboxes(5,xs[:10],ys[:10]).tolist()],[gridsetutil.tile_bbox(5,x,y) for x,y in zip(xs[:10],ys[:10])])
+
+    def test_bbox_tiles(self):
+        for gridsetutil in self.gridsetutils:
+            bboxes = random_bboxes(gridsetutil,5000,seed=1)
+            self.assertEqual([tuple(t) for t in gridsetutil.bbox_tiles(bboxes).tolist()],[gridsetutil.get_bbox_tile(bbox) for bbox in bboxes],"The bbox tiles in the gridset({}) are different".format(gridsetutil.name))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import re
 import traceback
 import os
+import hashlib
 
 from datetime import timedelta
 
@@ -108,6 +109,24 @@ def get_bbox(coordinates):
 
     return None if any(c is None for c in bbox) else bbox
 
+def jump_hash(key,buckets):
+    """
+    Jump consistent hash: return the bucket(0 to buckets - 1) of the 64 bits integer key;
+    only 1/buckets of the keys are moved to the new bucket when a bucket is added
+    """
+    b,j = -1,0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xffffffffffffffff
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+def shard_of(key,shards):
+    """
+    Return the shard(0 to shards - 1) of the string key
+    """
+    return jump_hash(int.from_bytes(hashlib.sha1(key.encode()).digest()[:8],"big"),shards)
+
 def remove_file(f):
     if not f:
         return
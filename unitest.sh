@@ -74,3 +74,27 @@ if [[ $? != 0 ]]
 then
     exit 1
 fi
+
+poetry run python -m geoserver_rest.unitest.test_catalogsnapshot
+if [[ $? != 0 ]]
+then
+    exit 1
+fi
+
+poetry run python -m geoserver_rest.unitest.test_tilemath
+if [[ $? != 0 ]]
+then
+    exit 1
+fi
+
+poetry run python -m geoserver_rest.unitest.test_gwcseeder
+if [[ $? != 0 ]]
+then
+    exit 1
+fi
+
+poetry run python -m geoserver_rest.unitest.test_gwctruncater
+if [[ $? != 0 ]]
+then
+    exit 1
+fi